@@ -0,0 +1,120 @@
+import 'reflect-metadata';
+import { Mina, PrivateKey, PublicKey, Field, AccountUpdate, Reducer } from 'snarkyjs';
+import { ConcurrentVoting } from './ConcurrentVoting';
+
+describe('ConcurrentVoting zkApp integration test', () => {
+  let Local: any;
+  let feePayer: PrivateKey;
+  let otherPayer: PrivateKey;
+  let zkAppAddress: PublicKey;
+  let zkAppPrivateKey: PrivateKey;
+  let zkAppInstance: ConcurrentVoting;
+
+  async function castVote(payer: PrivateKey, choice: number, signers?: PrivateKey[]) {
+    const txn = await Mina.transaction(payer, async () => {
+      await zkAppInstance.castVote(Field(choice), Field(12345), Field(1), Field(1), Field(1));
+    });
+    await txn.prove();
+    return txn.sign(signers ?? [payer, zkAppPrivateKey]);
+  }
+
+  async function rollup() {
+    const txn = await Mina.transaction(feePayer, async () => {
+      await zkAppInstance.rollupVotes();
+    });
+    await txn.prove();
+    await txn.sign([feePayer]).send();
+  }
+
+  async function counts() {
+    await zkAppInstance.red.fetch();
+    await zkAppInstance.blue.fetch();
+    await zkAppInstance.green.fetch();
+    await zkAppInstance.totalVoters.fetch();
+    return [
+      zkAppInstance.red.get(),
+      zkAppInstance.blue.get(),
+      zkAppInstance.green.get(),
+      zkAppInstance.totalVoters.get(),
+    ];
+  }
+
+  beforeAll(async () => {
+    // Local blockchain başlat
+    Local = await Mina.LocalBlockchain({ proofsEnabled: false });
+    Mina.setActiveInstance(Local);
+
+    feePayer = Local.testAccounts[0]!.privateKey;
+    otherPayer = Local.testAccounts[1]!.privateKey;
+
+    zkAppPrivateKey = PrivateKey.random();
+    zkAppAddress = zkAppPrivateKey.toPublicKey();
+    zkAppInstance = new ConcurrentVoting(zkAppAddress);
+
+    let txn = await Mina.transaction(feePayer, async () => {
+      AccountUpdate.fundNewAccount(feePayer);
+      await zkAppInstance.deploy({ zkappKey: zkAppPrivateKey });
+    });
+    await txn.prove();
+    await txn.sign([feePayer, zkAppPrivateKey]).send();
+  });
+
+  it('başlangıçta sayaçlar 0, aksiyon durumu boş olmalı', async () => {
+    expect(await counts()).toEqual([Field(0), Field(0), Field(0), Field(0)]);
+    await zkAppInstance.actionState.fetch();
+    expect(zkAppInstance.actionState.get()).toEqual(Reducer.initialActionState);
+  });
+
+  it('oylar sayaçlara dokunmadan yayınlanmalı', async () => {
+    await (await castVote(feePayer, 0)).send();
+    await (await castVote(otherPayer, 1)).send();
+    await (await castVote(feePayer, 0)).send();
+
+    // Rollup'a kadar sayaçlar değişmez
+    expect(await counts()).toEqual([Field(0), Field(0), Field(0), Field(0)]);
+  });
+
+  it('rollup bekleyen oyları sayaçlara eklemeli', async () => {
+    await rollup();
+    expect(await counts()).toEqual([Field(2), Field(1), Field(0), Field(3)]);
+
+    // Bekleyen aksiyon kalmadıysa rollup sayaçları değiştirmez
+    await rollup();
+    expect(await counts()).toEqual([Field(2), Field(1), Field(0), Field(3)]);
+  });
+
+  it('rollup'tan önce hazırlanan oy rollup'tan sonra da geçerli olmalı', async () => {
+    // castVote sayaç precondition'ı taşımadığı için araya giren rollup oyu geçersiz kılmaz
+    await (await castVote(feePayer, 2)).send();
+    const prepared = await castVote(otherPayer, 2);
+    await rollup();
+    expect(await counts()).toEqual([Field(2), Field(1), Field(1), Field(4)]);
+    await prepared.send();
+    await rollup();
+    expect(await counts()).toEqual([Field(2), Field(1), Field(2), Field(5)]);
+  });
+
+  it('zkApp anahtarı imzası olmadan oy reddedilmeli', async () => {
+    // Bayraklara güvenildiği için herhangi bir fee payer oy yayınlayamamalı
+    const unsigned = await castVote(otherPayer, 0, [otherPayer]);
+    await expect(unsigned.send()).rejects.toThrow();
+    await rollup();
+    expect(await counts()).toEqual([Field(2), Field(1), Field(2), Field(5)]);
+  });
+
+  it('yaş kontrolü çalışmalı', async () => {
+    await expect(
+      Mina.transaction(feePayer, async () => {
+        await zkAppInstance.castVote(Field(0), Field(12345), Field(0), Field(1), Field(1));
+      })
+    ).rejects.toThrow('Yaş 18\'den küçük olamaz');
+  });
+
+  it('geçersiz seçim reddedilmeli', async () => {
+    await expect(
+      Mina.transaction(feePayer, async () => {
+        await zkAppInstance.castVote(Field(3), Field(12345), Field(1), Field(1), Field(1));
+      })
+    ).rejects.toThrow('Geçersiz seçim');
+  });
+});
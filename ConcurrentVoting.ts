@@ -0,0 +1,97 @@
+import 'reflect-metadata';
+import { SmartContract, state, State, method, Field, Struct, Reducer } from 'snarkyjs';
+
+// Voting.vote sayaçları okuyup assertEquals ile bağladığı için aynı durum üzerine kurulan iki oy
+// çakışır ve blok başına tek oy girebilir. Bu kontratta her oy bir aksiyon olarak yayınlanır
+// (sayaçlar okunmaz, state precondition'ı yok); rollupVotes bekleyen aksiyonları sayaçlara toplar
+// castVote bayraklara güvendiği için zkApp anahtarının imzasını ister: imza zkApp nonce'unu
+// artırdığı için oylar birbirinin ardından gider, ama rollup işlemleriyle çakışmaz
+
+// Tek rollupVotes işleminin işleyebileceği en fazla castVote işlemi (reduce sınırı)
+// reduce_scheduler.py içindeki REDUCE_MAX_PENDING ile aynı olmalı
+export const MAX_PENDING_ACTIONS = 32;
+
+export class VoteCounts extends Struct({
+  red: Field,
+  blue: Field,
+  green: Field,
+  totalVoters: Field,
+}) {}
+
+export class ConcurrentVoting extends SmartContract {
+  // Aksiyon: seçim (0 kırmızı, 1 mavi, 2 yeşil); kontroller castVote içinde yapıldı
+  reducer = Reducer({ actionType: Field });
+
+  @state(Field) red = State<Field>();
+  @state(Field) blue = State<Field>();
+  @state(Field) green = State<Field>();
+  @state(Field) totalVoters = State<Field>();
+  // Sayaçlara işlenmiş son aksiyon durumu: rollupVotes buradan devam eder
+  @state(Field) actionState = State<Field>();
+
+  deploy(args?: any) {
+    super.deploy(args);
+    this.red.set(Field(0));
+    this.blue.set(Field(0));
+    this.green.set(Field(0));
+    this.totalVoters.set(Field(0));
+    this.actionState.set(Reducer.initialActionState);
+  }
+
+  @method castVote(
+    choice: Field,
+    personHash: Field,    // Kişi verilerinin hash'i
+    ageProof: Field,      // Yaş kontrolü proof'u
+    personProof: Field,   // Kişi doğrulama proof'u
+    voteProof: Field      // Çifte oy engelleme proof'u
+  ) {
+    // Voting.vote ile aynı kontroller; sayaçlara dokunulmadığı için rollup'larla çakışmaz
+    // Kişi ve çifte oy bayrakları kontratta doğrulanamaz: sadece zkApp anahtarını tutan oy worker'ı çağırabilir
+    this.requireSignature();
+
+    ageProof.assertEquals(Field(1), 'Yaş 18\'den küçük olamaz');
+    personProof.assertEquals(Field(1), 'Geçersiz kişi verileri');
+    voteProof.assertEquals(Field(1), 'Bu TC kimlik numarası daha önce oy vermiş');
+    choice.equals(Field(0)).or(choice.equals(Field(1))).or(choice.equals(Field(2))).assertTrue('Geçersiz seçim');
+
+    this.reducer.dispatch(choice);
+  }
+
+  @method rollupVotes() {
+    const red = this.red.get();
+    const blue = this.blue.get();
+    const green = this.green.get();
+    const totalVoters = this.totalVoters.get();
+    const actionState = this.actionState.get();
+
+    // State'leri okuyup bağlıyorum (sadece rollup işlemleri birbiriyle çakışır)
+    this.red.assertEquals(red);
+    this.blue.assertEquals(blue);
+    this.green.assertEquals(green);
+    this.totalVoters.assertEquals(totalVoters);
+    this.actionState.assertEquals(actionState);
+
+    // Son rollup'tan bu yana yayınlanan tüm aksiyonlar; reduce hesabın güncel aksiyon durumunu da
+    // precondition olarak bağlar, yani bekleyen aksiyonların hepsi işlenmek zorunda
+    const pending = this.reducer.getActions({ fromActionState: actionState });
+    const { state: counts, actionState: newActionState } = this.reducer.reduce(
+      pending,
+      VoteCounts,
+      (counts: VoteCounts, choice: Field) =>
+        new VoteCounts({
+          red: counts.red.add(choice.equals(Field(0)).toField()),
+          blue: counts.blue.add(choice.equals(Field(1)).toField()),
+          green: counts.green.add(choice.equals(Field(2)).toField()),
+          totalVoters: counts.totalVoters.add(Field(1)),
+        }),
+      { state: new VoteCounts({ red, blue, green, totalVoters }), actionState },
+      { maxTransactionsWithActions: MAX_PENDING_ACTIONS }
+    );
+
+    this.red.set(counts.red);
+    this.blue.set(counts.blue);
+    this.green.set(counts.green);
+    this.totalVoters.set(counts.totalVoters);
+    this.actionState.set(newActionState);
+  }
+}
@@ -0,0 +1,53 @@
+import 'reflect-metadata';
+import * as fs from 'fs';
+import * as os from 'os';
+import * as path from 'path';
+import { compileVoting, circuitDigest, cachedVerificationKey } from './proof_cache';
+
+// Derleme dakikalar sürebilir
+jest.setTimeout(30 * 60 * 1000);
+
+describe('Voting derleme önbelleği', () => {
+  let cacheRoot: string;
+
+  beforeAll(() => {
+    cacheRoot = fs.mkdtempSync(path.join(os.tmpdir(), 'proof_cache_'));
+  });
+
+  afterAll(() => {
+    fs.rmSync(cacheRoot, { recursive: true, force: true });
+  });
+
+  it('devre özeti sabit olmalı', async () => {
+    expect(await circuitDigest()).toEqual(await circuitDigest());
+  });
+
+  it('ilk derleme önbelleğe yazılmalı', async () => {
+    const info = await compileVoting(cacheRoot);
+    expect(info.cacheHit).toBe(false);
+    expect(info.digest).toEqual(await circuitDigest());
+    expect(fs.existsSync(path.join(info.cacheDir, 'manifest.json'))).toBe(true);
+    expect(cachedVerificationKey(info.digest, cacheRoot)?.hash).toEqual(info.verificationKey.hash);
+  });
+
+  it('ikinci derleme önbellekteki doğrulama anahtarıyla eşleşmeli', async () => {
+    const first = cachedVerificationKey(await circuitDigest(), cacheRoot);
+    const manifest = path.join(cacheRoot, 'Voting', await circuitDigest(), 'manifest.json');
+    const writtenAt = fs.statSync(manifest).mtimeMs;
+    const info = await compileVoting(cacheRoot);
+    expect(info.verificationKey.hash).toEqual(first?.hash);
+    expect(info.cacheHit).toBe(true);
+    // İsabette manifest yeniden yazılmaz
+    expect(fs.statSync(manifest).mtimeMs).toEqual(writtenAt);
+  });
+
+  it('farklı önbellek klasörü isabet vermemeli', async () => {
+    const otherRoot = fs.mkdtempSync(path.join(os.tmpdir(), 'proof_cache_'));
+    try {
+      const info = await compileVoting(otherRoot);
+      expect(info.cacheHit).toBe(false);
+    } finally {
+      fs.rmSync(otherRoot, { recursive: true, force: true });
+    }
+  });
+});
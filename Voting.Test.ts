@@ -4,9 +4,25 @@ import {
   PrivateKey,
   PublicKey,
   Field,
+  Bool,
   AccountUpdate,
+  MerkleTree,
+  MerkleMap,
+  dummyBase64Proof,
 } from 'snarkyjs';
-import { Voting } from './Voting';
+import {
+  Voting,
+  Ballot,
+  BallotBatch,
+  BallotProof,
+  BallotStatement,
+  RegistryWitness,
+  BATCH_SIZE,
+  REGISTRY_TREE_HEIGHT,
+  EMPTY_NULLIFIER_ROOT,
+  NULLIFIER_SPENT,
+  nullifierFor,
+} from './Voting';
 
 describe('Voting zkApp integration test', () => {
   let feePayer: PrivateKey;
@@ -46,6 +62,11 @@ describe('Voting zkApp integration test', () => {
     expect(zkAppInstance.green.get()).toEqual(Field(0));
   });
 
+  it('başlangıçta nullifier haritası boş olmalı', async () => {
+    await zkAppInstance.nullifierRoot.fetch();
+    expect(zkAppInstance.nullifierRoot.get()).toEqual(EMPTY_NULLIFIER_ROOT);
+  });
+
   it('red için oy verilmeli', async () => {
     let txn = await Mina.transaction(feePayer, async () => {
       await zkAppInstance.vote(
@@ -57,7 +78,7 @@ describe('Voting zkApp integration test', () => {
       );
     });
     await txn.prove();
-    await txn.sign([feePayer]).send();
+    await txn.sign([feePayer, zkAppPrivateKey]).send();
 
     await zkAppInstance.red.fetch();
     await zkAppInstance.totalVoters.fetch();
@@ -76,7 +97,7 @@ describe('Voting zkApp integration test', () => {
       );
     });
     await txn.prove();
-    await txn.sign([feePayer]).send();
+    await txn.sign([feePayer, zkAppPrivateKey]).send();
 
     await zkAppInstance.blue.fetch();
     await zkAppInstance.totalVoters.fetch();
@@ -96,7 +117,7 @@ describe('Voting zkApp integration test', () => {
       );
     });
     await txn.prove();
-    await txn.sign([feePayer]).send();
+    await txn.sign([feePayer, zkAppPrivateKey]).send();
 
     await zkAppInstance.green.fetch();
     await zkAppInstance.totalVoters.fetch();
@@ -116,11 +137,258 @@ describe('Voting zkApp integration test', () => {
       );
     });
     await txn.prove();
-    await txn.sign([feePayer]).send();
+    await txn.sign([feePayer, zkAppPrivateKey]).send();
 
     await zkAppInstance.red.fetch();
     await zkAppInstance.totalVoters.fetch();
     expect(zkAppInstance.red.get()).toEqual(Field(2));
     expect(zkAppInstance.totalVoters.get()).toEqual(Field(4));
   });
+
+  it('zkApp anahtarı imzası olmadan bayraklı oy reddedilmeli', async () => {
+    // vote/batchVote/voteWithMembership bayrakları doğrulamaz: sadece zkApp anahtarını tutan worker çağırabilir
+    let txn = await Mina.transaction(feePayer, async () => {
+      await zkAppInstance.vote(Field(2), Field(99999), Field(1), Field(1), Field(1));
+    });
+    await txn.prove();
+    await expect(txn.sign([feePayer]).send()).rejects.toThrow();
+
+    await zkAppInstance.totalVoters.fetch();
+    expect(zkAppInstance.totalVoters.get()).toEqual(Field(4));
+  });
+
+  it('toplu oy verilmeli', async () => {
+    // İki gerçek oy, geri kalan slotlar doldurma
+    const ballots = [
+      new Ballot({
+        choice: Field(0),           // kırmızı
+        personHash: Field(11111),   // person hash (TC+isim+soyisim+yaş)
+        ageProof: Field(1),         // yaş kanıtı
+        personProof: Field(1),      // person kanıtı
+        voteProof: Field(1),        // oy kanıtı
+        isDummy: Bool(false),
+      }),
+      new Ballot({
+        choice: Field(1),           // mavi
+        personHash: Field(22222),   // person hash (TC+isim+soyisim+yaş)
+        ageProof: Field(1),         // yaş kanıtı
+        personProof: Field(1),      // person kanıtı
+        voteProof: Field(1),        // oy kanıtı
+        isDummy: Bool(false),
+      }),
+    ];
+    while (ballots.length < BATCH_SIZE) ballots.push(Ballot.dummy());
+
+    let txn = await Mina.transaction(feePayer, async () => {
+      await zkAppInstance.batchVote(new BallotBatch({ ballots }));
+    });
+    await txn.prove();
+    await txn.sign([feePayer, zkAppPrivateKey]).send();
+
+    await zkAppInstance.red.fetch();
+    await zkAppInstance.blue.fetch();
+    await zkAppInstance.green.fetch();
+    await zkAppInstance.totalVoters.fetch();
+    expect(zkAppInstance.red.get()).toEqual(Field(3));
+    expect(zkAppInstance.blue.get()).toEqual(Field(2));
+    expect(zkAppInstance.green.get()).toEqual(Field(1));
+    expect(zkAppInstance.totalVoters.get()).toEqual(Field(6));
+  });
+
+  it('kayıt ağacı üyeliği ile oy verilmeli', async () => {
+    // Kayıt ağacı: yapraklar kişi hash'lerinden türetilen değerler
+    const registry = new MerkleTree(REGISTRY_TREE_HEIGHT);
+    registry.setLeaf(0n, Field(66666));
+    registry.setLeaf(1n, Field(77777));
+
+    // Kökü sadece zkApp anahtarı güncelleyebilir
+    let txn = await Mina.transaction(feePayer, async () => {
+      await zkAppInstance.setRegistryRoot(registry.getRoot());
+    });
+    await txn.prove();
+    await txn.sign([feePayer, zkAppPrivateKey]).send();
+
+    txn = await Mina.transaction(feePayer, async () => {
+      await zkAppInstance.voteWithMembership(
+        Field(1),                                     // mavi
+        Field(77777),                                 // kişinin yaprağı
+        new RegistryWitness(registry.getWitness(1n)), // yapraktan köke yol
+        Field(1),                                     // yaş kanıtı
+        Field(1)                                      // oy kanıtı
+      );
+    });
+    await txn.prove();
+    await txn.sign([feePayer, zkAppPrivateKey]).send();
+
+    await zkAppInstance.blue.fetch();
+    await zkAppInstance.totalVoters.fetch();
+    await zkAppInstance.registryRoot.fetch();
+    expect(zkAppInstance.blue.get()).toEqual(Field(3));
+    expect(zkAppInstance.totalVoters.get()).toEqual(Field(7));
+    expect(zkAppInstance.registryRoot.get()).toEqual(registry.getRoot());
+  });
+
+  it('kayıtta olmayan kişi reddedilmeli', async () => {
+    const registry = new MerkleTree(REGISTRY_TREE_HEIGHT);
+    registry.setLeaf(0n, Field(66666));
+    registry.setLeaf(1n, Field(77777));
+
+    // Yanlış yaprak: tanıktan hesaplanan kök registryRoot ile eşleşmez
+    await expect(
+      Mina.transaction(feePayer, async () => {
+        await zkAppInstance.voteWithMembership(
+          Field(0),
+          Field(88888),
+          new RegistryWitness(registry.getWitness(1n)),
+          Field(1),
+          Field(1)
+        );
+      })
+    ).rejects.toThrow('Geçersiz kişi verileri');
+  });
+
+  it('boş kayıt slotunun tanığı (yaprak 0) ile oy reddedilmeli', async () => {
+    const registry = new MerkleTree(REGISTRY_TREE_HEIGHT);
+    registry.setLeaf(0n, Field(66666));
+    registry.setLeaf(1n, Field(77777));
+    const nullifiers = new MerkleMap();
+
+    // Slot 5 boş: 0 yaprağı tanıkla birlikte gerçek kökü verir, ama kontrat 0 yaprağı kabul etmez
+    expect(new RegistryWitness(registry.getWitness(5n)).calculateRoot(Field(0))).toEqual(registry.getRoot());
+    await expect(
+      Mina.transaction(feePayer, async () => {
+        await zkAppInstance.voteWithNullifier(
+          Field(0),
+          Field(0),
+          new RegistryWitness(registry.getWitness(5n)),
+          nullifiers.getWitness(nullifierFor(Field(0))),
+          Field(1)
+        );
+      })
+    ).rejects.toThrow('Geçersiz kişi verileri');
+    await expect(
+      Mina.transaction(feePayer, async () => {
+        await zkAppInstance.voteWithMembership(
+          Field(0),
+          Field(0),
+          new RegistryWitness(registry.getWitness(5n)),
+          Field(1),
+          Field(1)
+        );
+      })
+    ).rejects.toThrow('Geçersiz kişi verileri');
+  });
+
+  it('nullifier ile oy verilmeli, aynı kişinin ikinci oyu reddedilmeli', async () => {
+    // Kayıt kökü önceki testte yazıldı (yapraklar 66666 ve 77777)
+    const registry = new MerkleTree(REGISTRY_TREE_HEIGHT);
+    registry.setLeaf(0n, Field(66666));
+    registry.setLeaf(1n, Field(77777));
+    const nullifiers = new MerkleMap();
+    const nullifier = nullifierFor(Field(66666));
+
+    let txn = await Mina.transaction(feePayer, async () => {
+      await zkAppInstance.voteWithNullifier(
+        Field(0),                                     // kırmızı
+        Field(66666),                                 // kişinin yaprağı
+        new RegistryWitness(registry.getWitness(0n)), // kayıt ağacında yol
+        nullifiers.getWitness(nullifier),             // boş yaprak tanığı
+        Field(1)                                      // yaş kanıtı
+      );
+    });
+    await txn.prove();
+    await txn.sign([feePayer]).send();
+
+    nullifiers.set(nullifier, NULLIFIER_SPENT);
+    await zkAppInstance.red.fetch();
+    await zkAppInstance.totalVoters.fetch();
+    await zkAppInstance.nullifierRoot.fetch();
+    expect(zkAppInstance.red.get()).toEqual(Field(4));
+    expect(zkAppInstance.totalVoters.get()).toEqual(Field(8));
+    expect(zkAppInstance.nullifierRoot.get()).toEqual(nullifiers.getRoot());
+
+    // Güncel tanıkta yaprak 1: boş yaprak kanıtı kökle eşleşmez
+    await expect(
+      Mina.transaction(feePayer, async () => {
+        await zkAppInstance.voteWithNullifier(
+          Field(1),
+          Field(66666),
+          new RegistryWitness(registry.getWitness(0n)),
+          nullifiers.getWitness(nullifier),
+          Field(1)
+        );
+      })
+    ).rejects.toThrow('Bu TC kimlik numarası daha önce oy vermiş');
+  });
+
+  it('başka kişinin nullifier tanığı reddedilmeli', async () => {
+    const registry = new MerkleTree(REGISTRY_TREE_HEIGHT);
+    registry.setLeaf(0n, Field(66666));
+    registry.setLeaf(1n, Field(77777));
+    const nullifiers = new MerkleMap();
+    nullifiers.set(nullifierFor(Field(66666)), NULLIFIER_SPENT);
+
+    // Boş ama farklı bir anahtarın tanığı: hesaplanan anahtar kişinin nullifier'ı değil
+    await expect(
+      Mina.transaction(feePayer, async () => {
+        await zkAppInstance.voteWithNullifier(
+          Field(1),
+          Field(77777),
+          new RegistryWitness(registry.getWitness(1n)),
+          nullifiers.getWitness(Field(12345)),
+          Field(1)
+        );
+      })
+    ).rejects.toThrow('Geçersiz nullifier tanığı');
+  });
+
+  it('prover havuzundan gelen proof ile oy verilmeli, aynı proof tekrar kullanılamamalı', async () => {
+    // Kayıt kökü ve harcanmış nullifier (66666) önceki testlerden
+    const registry = new MerkleTree(REGISTRY_TREE_HEIGHT);
+    registry.setLeaf(0n, Field(66666));
+    registry.setLeaf(1n, Field(77777));
+    const nullifiers = new MerkleMap();
+    nullifiers.set(nullifierFor(Field(66666)), NULLIFIER_SPENT);
+    const nullifier = nullifierFor(Field(77777));
+
+    // proofsEnabled=false: prover worker'ın döndürdüğü gibi sahte proof kullanıyorum
+    const ballotProof = (registryRoot: Field) =>
+      BallotProof.fromJSON({
+        publicInput: BallotStatement.toFields(
+          new BallotStatement({ choice: Field(2), registryRoot, nullifier })
+        ).map(String),
+        publicOutput: [],
+        maxProofsVerified: 0,
+        proof: dummyBase64Proof(),
+      });
+    const proof = ballotProof(registry.getRoot());
+
+    // Başka bir kayıt köküne bağlı proof kabul edilmez
+    await expect(
+      Mina.transaction(feePayer, async () => {
+        await zkAppInstance.voteWithProof(ballotProof(Field(123)), nullifiers.getWitness(nullifier));
+      })
+    ).rejects.toThrow('Geçersiz kişi verileri');
+
+    let txn = await Mina.transaction(feePayer, async () => {
+      await zkAppInstance.voteWithProof(proof, nullifiers.getWitness(nullifier));
+    });
+    await txn.prove();
+    await txn.sign([feePayer]).send();
+
+    nullifiers.set(nullifier, NULLIFIER_SPENT);
+    await zkAppInstance.green.fetch();
+    await zkAppInstance.totalVoters.fetch();
+    await zkAppInstance.nullifierRoot.fetch();
+    expect(zkAppInstance.green.get()).toEqual(Field(2));
+    expect(zkAppInstance.totalVoters.get()).toEqual(Field(9));
+    expect(zkAppInstance.nullifierRoot.get()).toEqual(nullifiers.getRoot());
+
+    // Aynı proof tekrar gönderilirse nullifier artık harcanmış
+    await expect(
+      Mina.transaction(feePayer, async () => {
+        await zkAppInstance.voteWithProof(proof, nullifiers.getWitness(nullifier));
+      })
+    ).rejects.toThrow('Bu TC kimlik numarası daha önce oy vermiş');
+  });
 });
@@ -8,13 +8,102 @@ import {
   Bool,
   Provable,
   CircuitString,
+  Struct,
+  Experimental,
+  MerkleWitness,
+  MerkleMap,
+  MerkleMapWitness,
+  Poseidon,
 } from 'snarkyjs';
 
+// Tek işlemde işlenebilecek en fazla oy sayısı (boş slotlar isDummy ile doldurulur)
+export const BATCH_SIZE = 8;
+
+// Seçmen kaydı Merkle ağacının yüksekliği: 2^27 (~134 milyon) yaprak
+// merkle_tree.py içindeki REGISTRY_TREE_HEIGHT ile aynı olmalı
+export const REGISTRY_TREE_HEIGHT = 28;
+
+export class RegistryWitness extends MerkleWitness(REGISTRY_TREE_HEIGHT) {}
+
+// Harcanmış nullifier'ların seyrek Merkle haritası (MerkleMap, yükseklik 256) boşken kökü
+// nullifier_set.py aynı kökü Poseidon ile hesaplar
+export const EMPTY_NULLIFIER_ROOT = new MerkleMap().getRoot();
+// Haritada harcanmış nullifier'ın değeri (boş yaprak 0)
+export const NULLIFIER_SPENT = Field(1);
+
+export function nullifierFor(personLeaf: Field) {
+  // Nullifier kişinin kayıt yaprağından türetilir: aynı kişi her zaman aynı nullifier'ı üretir
+  return Poseidon.hash([personLeaf]);
+}
+
+export class Ballot extends Struct({
+  choice: Field,
+  personHash: Field,    // Kişi verilerinin hash'i
+  ageProof: Field,      // Yaş kontrolü proof'u
+  personProof: Field,   // Kişi doğrulama proof'u
+  voteProof: Field,     // Çifte oy engelleme proof'u
+  isDummy: Bool,        // Doldurma slotu: doğrulanmaz ve sayılmaz
+}) {
+  static dummy() {
+    return new Ballot({
+      choice: Field(0),
+      personHash: Field(0),
+      ageProof: Field(0),
+      personProof: Field(0),
+      voteProof: Field(0),
+      isDummy: Bool(true),
+    });
+  }
+}
+
+export class BallotBatch extends Struct({
+  ballots: Provable.Array(Ballot, BATCH_SIZE),
+}) {}
+
+// Oy pusulası proof'unun açık girdisi: seçim, proof'un bağlı olduğu kayıt kökü ve kişinin nullifier'ı
+// Kişinin yaprağı gizli kalır; proof başka bir kişiye veya köke taşınamaz ve kontrat nullifier'ı
+// harcadığı için aynı proof ikinci kez kullanılamaz
+export class BallotStatement extends Struct({
+  choice: Field,
+  registryRoot: Field,
+  nullifier: Field,
+}) {}
+
+// Oy pusulası kontrolleri (kayıt üyeliği, nullifier türetme, yaş, seçim) kontrat durumuna bağlı değil:
+// proof'lar prover havuzunda paralel üretilir. Kontrat işlemi (proof doğrulama + nullifier harcama)
+// durum ön koşullarına bağlı olduğu için yine sırayla proof'lanır
+export const BallotProgram = Experimental.ZkProgram({
+  publicInput: BallotStatement,
+
+  methods: {
+    verifyBallot: {
+      privateInputs: [Field, RegistryWitness, Field],
+
+      method(statement: BallotStatement, personLeaf: Field, registryWitness: RegistryWitness, ageProof: Field) {
+        // voteWithNullifier ile aynı kişi kontrolü (boş slotun 0 yaprağı üyelik sayılmaz)
+        personLeaf.equals(Field(0)).assertFalse('Geçersiz kişi verileri');
+        registryWitness.calculateRoot(personLeaf).assertEquals(statement.registryRoot, 'Geçersiz kişi verileri');
+        nullifierFor(personLeaf).assertEquals(statement.nullifier, 'Geçersiz nullifier');
+        ageProof.assertEquals(Field(1), 'Yaş 18\'den küçük olamaz');
+
+        const choice = statement.choice;
+        choice.equals(Field(0)).or(choice.equals(Field(1))).or(choice.equals(Field(2))).assertTrue('Geçersiz seçim');
+      },
+    },
+  },
+});
+
+export class BallotProof extends Experimental.ZkProgram.Proof(BallotProgram) {}
+
 export class Voting extends SmartContract {
   @state(Field) red = State<Field>();
   @state(Field) blue = State<Field>();
   @state(Field) green = State<Field>();
   @state(Field) totalVoters = State<Field>();
+  // Hash'lenmiş seçmen kaydının Merkle kökü (yapraklar: kişi hash'lerinden türetilen Field'lar)
+  @state(Field) registryRoot = State<Field>();
+  // Harcanmış nullifier'ların seyrek Merkle haritasının kökü (çifte oy zincirde engellenir)
+  @state(Field) nullifierRoot = State<Field>();
 
   deploy(args?: any) {
     super.deploy(args);
@@ -22,6 +111,112 @@ export class Voting extends SmartContract {
     this.blue.set(Field(0));
     this.green.set(Field(0));
     this.totalVoters.set(Field(0));
+    this.registryRoot.set(Field(0));
+    this.nullifierRoot.set(EMPTY_NULLIFIER_ROOT);
+  }
+
+  @method setRegistryRoot(root: Field) {
+    // Kayıt kökünü sadece zkApp anahtarının sahibi güncelleyebilir
+    this.requireSignature();
+    this.registryRoot.set(root);
+  }
+
+  @method setNullifierRoot(root: Field) {
+    // Worker yeniden başlatılınca diskteki nullifier haritasının kökünü geri yüklemek için
+    this.requireSignature();
+    this.nullifierRoot.set(root);
+  }
+
+  @method voteWithNullifier(
+    choice: Field,
+    personLeaf: Field,                  // Kişi hash'inin kayıt ağacındaki yaprak değeri
+    registryWitness: RegistryWitness,   // Kayıt ağacında yapraktan köke yol
+    nullifierWitness: MerkleMapWitness, // Nullifier haritasında nullifier'ın yolu
+    ageProof: Field                     // Yaş kontrolü proof'u
+  ) {
+    const red = this.red.get();
+    const blue = this.blue.get();
+    const green = this.green.get();
+    const totalVoters = this.totalVoters.get();
+    const registryRoot = this.registryRoot.get();
+    const nullifierRoot = this.nullifierRoot.get();
+
+    // State'leri okuyup bağlıyorum
+    this.red.assertEquals(red);
+    this.blue.assertEquals(blue);
+    this.green.assertEquals(green);
+    this.totalVoters.assertEquals(totalVoters);
+    this.registryRoot.assertEquals(registryRoot);
+    this.nullifierRoot.assertEquals(nullifierRoot);
+
+    // Kişi kontrolü: kayıt ağacında üyelik
+    // Boş ve silinmiş slotların yaprağı 0 (gerçek yapraklar merkle_tree.py'de etiketli, asla 0 değil):
+    // 0 yaprağı reddedilmezse herhangi bir boş slotun tanığıyla üyelik kanıtlanabilirdi
+    personLeaf.equals(Field(0)).assertFalse('Geçersiz kişi verileri');
+    registryWitness.calculateRoot(personLeaf).assertEquals(registryRoot, 'Geçersiz kişi verileri');
+
+    // Çifte oy kontrolü: voteProof bayrağı yerine nullifier'ın haritada boş olduğu kanıtlanıyor
+    const [emptyRoot, key] = nullifierWitness.computeRootAndKey(Field(0));
+    emptyRoot.assertEquals(nullifierRoot, 'Bu TC kimlik numarası daha önce oy vermiş');
+    key.assertEquals(nullifierFor(personLeaf), 'Geçersiz nullifier tanığı');
+
+    ageProof.assertEquals(Field(1), 'Yaş 18\'den küçük olamaz');
+
+    const isRed = choice.equals(Field(0));
+    const isBlue = choice.equals(Field(1));
+    const isGreen = choice.equals(Field(2));
+    isRed.or(isBlue).or(isGreen).assertTrue('Geçersiz seçim');
+
+    // Aynı tanıkla nullifier harcanmış olarak işaretlenir, yeni kök state'e yazılır
+    const [spentRoot] = nullifierWitness.computeRootAndKey(NULLIFIER_SPENT);
+    this.nullifierRoot.set(spentRoot);
+
+    this.red.set(red.add(isRed.toField()));
+    this.blue.set(blue.add(isBlue.toField()));
+    this.green.set(green.add(isGreen.toField()));
+    this.totalVoters.set(totalVoters.add(Field(1)));
+  }
+
+  @method voteWithMembership(
+    choice: Field,
+    personLeaf: Field,          // Kişi hash'inin kayıt ağacındaki yaprak değeri
+    witness: RegistryWitness,   // Yapraktan köke yol
+    ageProof: Field,            // Yaş kontrolü proof'u
+    voteProof: Field            // Çifte oy engelleme proof'u
+  ) {
+    // voteProof bayrağı kontratta doğrulanamaz: sadece zkApp anahtarını tutan oy worker'ı çağırabilir
+    this.requireSignature();
+
+    const red = this.red.get();
+    const blue = this.blue.get();
+    const green = this.green.get();
+    const totalVoters = this.totalVoters.get();
+    const registryRoot = this.registryRoot.get();
+
+    // State'leri okuyup bağlıyorum
+    this.red.assertEquals(red);
+    this.blue.assertEquals(blue);
+    this.green.assertEquals(green);
+    this.totalVoters.assertEquals(totalVoters);
+    this.registryRoot.assertEquals(registryRoot);
+
+    // Kişi kontrolü: personProof bayrağı yerine kayıt ağacında üyelik kanıtlanıyor
+    // (boş slotun 0 yaprağı üyelik sayılmaz)
+    personLeaf.equals(Field(0)).assertFalse('Geçersiz kişi verileri');
+    witness.calculateRoot(personLeaf).assertEquals(registryRoot, 'Geçersiz kişi verileri');
+
+    ageProof.assertEquals(Field(1), 'Yaş 18\'den küçük olamaz');
+    voteProof.assertEquals(Field(1), 'Bu TC kimlik numarası daha önce oy vermiş');
+
+    const isRed = choice.equals(Field(0));
+    const isBlue = choice.equals(Field(1));
+    const isGreen = choice.equals(Field(2));
+    isRed.or(isBlue).or(isGreen).assertTrue('Geçersiz seçim');
+
+    this.red.set(red.add(isRed.toField()));
+    this.blue.set(blue.add(isBlue.toField()));
+    this.green.set(green.add(isGreen.toField()));
+    this.totalVoters.set(totalVoters.add(Field(1)));
   }
 
   @method vote(
@@ -31,6 +226,10 @@ export class Voting extends SmartContract {
     personProof: Field,   // Kişi doğrulama proof'u
     voteProof: Field      // Çifte oy engelleme proof'u
   ) {
+    // Kişi ve çifte oy kontrolleri bayrakla geliyor: sadece zkApp anahtarını tutan oy worker'ı çağırabilir
+    // (anahtarsız çağrılar için voteWithNullifier / voteWithProof)
+    this.requireSignature();
+
     const red = this.red.get();
     const blue = this.blue.get();
     const green = this.green.get();
@@ -76,4 +275,90 @@ export class Voting extends SmartContract {
 
     // Kimlik bilgileri gizli kalıyor, sadece proof'lar ve seçim açık
   }
+
+  @method batchVote(batch: BallotBatch) {
+    // vote ile aynı: bayraklara güvenildiği için zkApp anahtarının imzası gerekiyor
+    this.requireSignature();
+
+    const red = this.red.get();
+    const blue = this.blue.get();
+    const green = this.green.get();
+    const totalVoters = this.totalVoters.get();
+
+    // State'leri okuyup bağlıyorum
+    this.red.assertEquals(red);
+    this.blue.assertEquals(blue);
+    this.green.assertEquals(green);
+    this.totalVoters.assertEquals(totalVoters);
+
+    let redDelta = Field(0);
+    let blueDelta = Field(0);
+    let greenDelta = Field(0);
+    let voterDelta = Field(0);
+
+    for (let i = 0; i < BATCH_SIZE; i++) {
+      const ballot = batch.ballots[i]!;
+      const isReal = ballot.isDummy.not();
+
+      // Gerçek oylar için tek oyla aynı kontrolleri yapıyorum
+      ballot.isDummy.or(ballot.ageProof.equals(Field(1))).assertTrue('Yaş 18\'den küçük olamaz');
+      ballot.isDummy.or(ballot.personProof.equals(Field(1))).assertTrue('Geçersiz kişi verileri');
+      ballot.isDummy.or(ballot.voteProof.equals(Field(1))).assertTrue('Bu TC kimlik numarası daha önce oy vermiş');
+
+      const isRed = ballot.choice.equals(Field(0));
+      const isBlue = ballot.choice.equals(Field(1));
+      const isGreen = ballot.choice.equals(Field(2));
+      ballot.isDummy.or(isRed.or(isBlue).or(isGreen)).assertTrue('Geçersiz seçim');
+
+      // Değişimleri topluyorum, state'e tek seferde yazılacak
+      redDelta = redDelta.add(isReal.and(isRed).toField());
+      blueDelta = blueDelta.add(isReal.and(isBlue).toField());
+      greenDelta = greenDelta.add(isReal.and(isGreen).toField());
+      voterDelta = voterDelta.add(isReal.toField());
+    }
+
+    this.red.set(red.add(redDelta));
+    this.blue.set(blue.add(blueDelta));
+    this.green.set(green.add(greenDelta));
+    this.totalVoters.set(totalVoters.add(voterDelta));
+  }
+
+  @method voteWithProof(
+    proof: BallotProof,                 // Prover havuzunda üretilen oy pusulası proof'u
+    nullifierWitness: MerkleMapWitness  // Nullifier haritasında proof'taki nullifier'ın yolu
+  ) {
+    // Üyelik, yaş ve seçim kontrolleri prover havuzunda kanıtlandı: burada proof doğrulanıp
+    // güncel kayıt köküne bağlı olduğu kontrol ediliyor ve nullifier harcanıyor
+    proof.verify();
+
+    const red = this.red.get();
+    const blue = this.blue.get();
+    const green = this.green.get();
+    const totalVoters = this.totalVoters.get();
+    const registryRoot = this.registryRoot.get();
+    const nullifierRoot = this.nullifierRoot.get();
+
+    // State'leri okuyup bağlıyorum
+    this.red.assertEquals(red);
+    this.blue.assertEquals(blue);
+    this.green.assertEquals(green);
+    this.totalVoters.assertEquals(totalVoters);
+    this.registryRoot.assertEquals(registryRoot);
+    this.nullifierRoot.assertEquals(nullifierRoot);
+
+    proof.publicInput.registryRoot.assertEquals(registryRoot, 'Geçersiz kişi verileri');
+
+    // Çifte oy kontrolü voteWithNullifier ile aynı: nullifier haritada boş olmalı, sonra harcanır
+    const [emptyRoot, key] = nullifierWitness.computeRootAndKey(Field(0));
+    emptyRoot.assertEquals(nullifierRoot, 'Bu TC kimlik numarası daha önce oy vermiş');
+    key.assertEquals(proof.publicInput.nullifier, 'Geçersiz nullifier tanığı');
+    const [spentRoot] = nullifierWitness.computeRootAndKey(NULLIFIER_SPENT);
+    this.nullifierRoot.set(spentRoot);
+
+    const choice = proof.publicInput.choice;
+    this.red.set(red.add(choice.equals(Field(0)).toField()));
+    this.blue.set(blue.add(choice.equals(Field(1)).toField()));
+    this.green.set(green.add(choice.equals(Field(2)).toField()));
+    this.totalVoters.set(totalVoters.add(Field(1)));
+  }
 }
@@ -0,0 +1,243 @@
+import argparse
+import json
+import math
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+# Stress testleri için gecikme histogramı, rapor ve baseline karşılaştırması
+# Ortalama süre kuyruk gecikmesini gizler: raporlar p50/p90/p99/max üzerinden yapılıyor
+
+PERCENTILES = (50, 90, 99)
+# Karşılaştırmada bu oranın üzerindeki kötüleşme regresyon sayılır
+DEFAULT_REGRESSION_THRESHOLD = 0.10
+
+class LatencyHistogram:
+    # Log-lineer histogram: her 2'nin kuvveti aralığı eşit alt kovalara bölünür
+    # Bellek ölçüm sayısından bağımsız, göreli hata ~1/2^sub_bits
+    def __init__(self, sub_bits=5, unit=1e-6):
+        self.sub_bits = sub_bits
+        self.unit = unit  # Kova çözünürlüğü (saniye): varsayılan mikrosaniye
+        self.counts = {}
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def _index(self, ticks):
+        if ticks < (1 << self.sub_bits):
+            return ticks
+        shift = ticks.bit_length() - self.sub_bits
+        return shift * (1 << (self.sub_bits - 1)) + (ticks >> shift)
+
+    def _bucket_value(self, index):
+        # Kovanın orta noktası (saniye)
+        half = 1 << (self.sub_bits - 1)
+        if index < (1 << self.sub_bits):
+            return index * self.unit
+        shift = index // half - 1
+        mantissa = index - shift * half
+        low = mantissa << shift
+        return (low + (1 << shift) / 2) * self.unit
+
+    def record(self, seconds):
+        ticks = max(0, int(seconds / self.unit))
+        index = self._index(ticks)
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.count += 1
+        self.total += seconds
+        self.min = seconds if self.min is None else min(self.min, seconds)
+        self.max = seconds if self.max is None else max(self.max, seconds)
+
+    def merge(self, other):
+        for index, count in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + count
+        self.count += other.count
+        self.total += other.total
+        if other.count:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+            self.max = other.max if self.max is None else max(self.max, other.max)
+
+    def percentile(self, p):
+        if not self.count:
+            return 0.0
+        rank = max(1, math.ceil(p / 100 * self.count))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                # Kova orta noktası gerçek max'ı geçmesin
+                return min(self._bucket_value(index), self.max)
+        return self.max
+
+    def summary(self):
+        result = {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else 0.0,
+            "min": self.min or 0.0,
+            "max": self.max or 0.0,
+        }
+        for p in PERCENTILES:
+            result[f"p{p}"] = self.percentile(p)
+        return result
+
+def build_report(name, results, duration, warmup=0):
+    # results: stress testlerinin sonuç sözlükleri ('status', 'latency', 'timestamp', 'error')
+    # Tamamlanma sırasına göre ilk `warmup` sonuç ısınma fazına, kalanlar kararlı faza yazılır
+    ordered = sorted(results, key=lambda r: r['timestamp'])
+    phases = {"warmup": ordered[:warmup], "steady": ordered[warmup:]}
+    report = {"name": name, "requests": len(results), "duration": duration, "phases": {}}
+    for phase, phase_results in phases.items():
+        histogram = LatencyHistogram()
+        errors = {}
+        for result in phase_results:
+            if 'latency' in result:
+                histogram.record(result['latency'])
+            if result['status'] == 'error':
+                errors[result['error']] = errors.get(result['error'], 0) + 1
+        if len(phase_results) > 1:
+            window = phase_results[-1]['timestamp'] - phase_results[0]['timestamp']
+        else:
+            window = duration if phase_results else 0.0
+        report["phases"][phase] = {
+            "requests": len(phase_results),
+            "success": sum(1 for r in phase_results if r['status'] == 'success'),
+            "errors": errors,
+            "throughput": len(phase_results) / window if window > 0 else 0.0,
+            "latency": histogram.summary(),
+        }
+    return report
+
+def print_report(report):
+    steady = report["phases"]["steady"]
+    latency = steady["latency"]
+    print(f"   ⏱️  Gecikme (kararlı faz, {steady['requests']} istek):")
+    print(f"      p50: {latency['p50']*1000:.1f} ms  p90: {latency['p90']*1000:.1f} ms  "
+          f"p99: {latency['p99']*1000:.1f} ms  max: {latency['max']*1000:.1f} ms")
+    print(f"   🚀 Kararlı Faz Throughput: {steady['throughput']:.2f} istek/saniye")
+    warmup = report["phases"]["warmup"]
+    if warmup["requests"]:
+        print(f"   🔥 Isınma: {warmup['requests']} istek (p99: {warmup['latency']['p99']*1000:.1f} ms, rapora katılmadı)")
+
+def save_reports(reports, path):
+    # Makinece okunabilir sonuç dosyası (baseline olarak da kullanılır)
+    data = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "host": {"platform": platform.platform(), "python": platform.python_version(), "cpus": os.cpu_count()},
+        "reports": reports,
+    }
+    with open(path, 'w') as f:
+        json.dump(data, f, indent=2)
+
+def load_reports(path):
+    with open(path, 'r') as f:
+        return {report["name"]: report for report in json.load(f)["reports"]}
+
+def compare_reports(baseline, current, threshold=DEFAULT_REGRESSION_THRESHOLD):
+    # Aynı isimli testlerin kararlı faz metriklerini karşılaştırıyorum
+    # Gecikme threshold oranından fazla artarsa veya throughput o kadar düşerse regresyon
+    rows = []
+    for name, report in current.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        base_steady = base["phases"]["steady"]
+        steady = report["phases"]["steady"]
+        metrics = [(f"p{p}", base_steady["latency"][f"p{p}"], steady["latency"][f"p{p}"], True) for p in PERCENTILES]
+        metrics.append(("throughput", base_steady["throughput"], steady["throughput"], False))
+        for metric, old, new, lower_is_better in metrics:
+            change = (new - old) / old if old else 0.0
+            regression = change > threshold if lower_is_better else change < -threshold
+            rows.append({"name": name, "metric": metric, "baseline": old, "current": new,
+                         "change": change, "regression": regression})
+    return rows
+
+def benchmark_compile_cache(runs=3, cache_dir=None, startup_timeout=1800):
+    # Proof'lu modda worker başlatma: soğuk (boş önbellek) ve sıcak (aynı önbellek klasörü) süreleri
+    # snarkyjs 0.12 prover anahtarlarını diske yazamadığı için her başlatmada kontrat derlenir;
+    # sıcak başlatmada sadece doğrulama anahtarı önbellekteki ile karşılaştırılır (hızlanma beklenmez)
+    from vote_worker_client import VoteWorkerClient
+    cache_dir = cache_dir or tempfile.mkdtemp(prefix='proof_cache_')
+
+    def start_worker():
+        worker = VoteWorkerClient(startup_timeout=startup_timeout,
+                                  extra_env={'PROOFS_ENABLED': '1', 'PROOF_CACHE_DIR': cache_dir})
+        start = time.perf_counter()
+        worker.start()
+        startup = time.perf_counter() - start
+        compile_info = (worker.ready_info or {}).get('compile') or {}
+        worker.close()
+        return {
+            "startup": startup,
+            "compile": compile_info.get('seconds', 0.0),
+            "cache_hit": compile_info.get('cacheHit', False),
+        }
+
+    cold = start_worker()
+    warm = [start_worker() for _ in range(runs)]
+    warm_startup = statistics.median(run["startup"] for run in warm)
+    return {
+        "cache_dir": cache_dir,
+        "cold": cold,
+        "warm": warm,
+        "warm_startup_median": warm_startup,
+        "speedup": cold["startup"] / warm_startup if warm_startup > 0 else 0.0,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Stress test sonuçlarını karşılaştırır")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    compare = subparsers.add_parser('compare', help="Sonuçları baseline ile karşılaştır")
+    compare.add_argument('baseline')
+    compare.add_argument('current')
+    compare.add_argument('--threshold', type=float, default=DEFAULT_REGRESSION_THRESHOLD,
+                         help="Regresyon eşiği (0.10 = %%10)")
+    show = subparsers.add_parser('show', help="Sonuç dosyasını yazdır")
+    show.add_argument('path')
+    compile_cache = subparsers.add_parser('compile-cache', help="Proof'lu modda soğuk ve sıcak (önbellekli) worker başlatmayı karşılaştır")
+    compile_cache.add_argument('--runs', type=int, default=3, help="Sıcak başlatma sayısı")
+    compile_cache.add_argument('--cache-dir', help="Önbellek klasörü (varsayılan: geçici boş klasör)")
+    compile_cache.add_argument('--json', help="Sonuçların yazılacağı JSON dosyası")
+    args = parser.parse_args()
+
+    if args.command == 'compile-cache':
+        result = benchmark_compile_cache(args.runs, args.cache_dir)
+        print(f"🔑 Derleme önbelleği ({result['cache_dir']})")
+        print(f"   🥶 Soğuk başlatma: {result['cold']['startup']:.1f} saniye "
+              f"(derleme {result['cold']['compile']:.1f} saniye)")
+        for i, run in enumerate(result['warm'], 1):
+            print(f"   🔥 Sıcak başlatma {i}: {run['startup']:.1f} saniye "
+                  f"(derleme {run['compile']:.1f} saniye, doğrulama anahtarı {'eşleşti' if run['cache_hit'] else 'yeni'})")
+        print(f"   🚀 Hızlanma: {result['speedup']:.1f}x")
+        print("   ℹ️ snarkyjs 0.12 prover anahtarlarını saklayamaz: her başlatmada derleme yapılır")
+        if args.json:
+            with open(args.json, 'w') as f:
+                json.dump(result, f, indent=2)
+        return
+
+    if args.command == 'show':
+        for report in load_reports(args.path).values():
+            print(f"\n📊 {report['name']}")
+            print_report(report)
+        return
+
+    rows = compare_reports(load_reports(args.baseline), load_reports(args.current), args.threshold)
+    if not rows:
+        print("⚠️ Karşılaştırılacak ortak test bulunamadı")
+        sys.exit(2)
+    for row in rows:
+        unit = 1 if row["metric"] == "throughput" else 1000
+        flag = "❌ REGRESYON" if row["regression"] else "✅"
+        print(f"{flag} {row['name']} {row['metric']}: {row['baseline']*unit:.2f} -> {row['current']*unit:.2f} "
+              f"({row['change']*100:+.1f}%)")
+    regressions = sum(1 for row in rows if row["regression"])
+    if regressions:
+        print(f"\n❌ {regressions} regresyon (eşik: %{args.threshold*100:.0f})")
+        sys.exit(1)
+    print(f"\n✅ Regresyon yok (eşik: %{args.threshold*100:.0f})")
+
+if __name__ == "__main__":
+    main()
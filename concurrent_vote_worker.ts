@@ -0,0 +1,230 @@
+import 'reflect-metadata';
+import * as readline from 'readline';
+import { Mina, PrivateKey, Field, AccountUpdate } from 'snarkyjs';
+import { ConcurrentVoting, MAX_PENDING_ACTIONS } from './ConcurrentVoting';
+import { compileConcurrentVoting, CompileInfo } from './proof_cache';
+
+// Aksiyon/reducer tabanlı oy worker'ı: ConcurrentVoting'i bir kez deploy edip stdin/stdout üzerinden
+// istek alıyorum. castVote sayaçları okumadığı için oylar rollup'ı beklemez; rollup işlemini
+// reduce_scheduler.py birikmiş oy sayısına veya süreye göre tetikler
+// Protokol vote_worker ile aynı: her satır bir JSON mesajı (istek: {id, op, ...}, yanıt: {id, ok, result | error})
+
+// stdout sadece protokol mesajları için kullanılıyor, loglar stderr'e gidiyor
+const protocolOut = process.stdout;
+console.log = (...args: unknown[]) => console.error(...args);
+
+type CastVoteRequest = {
+  id: number;
+  op: 'castVote';
+  choice: number;
+  personHash: string;
+  ageProof: number;
+  personProof: number;
+  voteProof: number;
+};
+
+type Request =
+  | CastVoteRequest
+  | { id: number; op: 'rollup' }
+  | { id: number; op: 'state' }
+  | { id: number; op: 'ping' };
+
+let feePayer: PrivateKey;
+let zkAppPrivateKey: PrivateKey;
+let zkAppInstance: ConcurrentVoting;
+
+const PROOFS_ENABLED = process.env.PROOFS_ENABLED === '1';
+let compileInfo: CompileInfo | undefined;
+let cast = 0;
+let rollups = 0;
+
+function send(message: object) {
+  protocolOut.write(JSON.stringify(message) + '\n');
+}
+
+// vote_worker ile aynı: işlemin aşama süreleri (saniye)
+class PhaseTimer {
+  timings: Record<string, number> = {};
+  private last = performance.now();
+
+  mark(phase: string) {
+    const now = performance.now();
+    this.timings[phase] = (now - this.last) / 1000;
+    this.last = now;
+  }
+}
+
+async function setup() {
+  let Local = await Mina.LocalBlockchain({ proofsEnabled: PROOFS_ENABLED });
+  Mina.setActiveInstance(Local);
+  if (PROOFS_ENABLED) {
+    compileInfo = await compileConcurrentVoting();
+    console.error(
+      `🔑 ConcurrentVoting derlendi${compileInfo.cacheHit ? ' (doğrulama anahtarı önbellekle aynı)' : ''} ` +
+        `(${compileInfo.seconds.toFixed(1)} sn, ${compileInfo.digest})`
+    );
+  }
+
+  feePayer = Local.testAccounts[0]!.privateKey;
+  zkAppPrivateKey = PrivateKey.random();
+  zkAppInstance = new ConcurrentVoting(zkAppPrivateKey.toPublicKey());
+
+  const verificationKey = compileInfo && {
+    data: compileInfo.verificationKey.data,
+    hash: Field(compileInfo.verificationKey.hash),
+  };
+  let txn = await Mina.transaction(feePayer, async () => {
+    AccountUpdate.fundNewAccount(feePayer);
+    await zkAppInstance.deploy(
+      verificationKey ? { zkappKey: zkAppPrivateKey, verificationKey } : { zkappKey: zkAppPrivateKey }
+    );
+  });
+  await txn.prove();
+  await txn.sign([feePayer, zkAppPrivateKey]).send();
+}
+
+async function pendingActions() {
+  // Son rollup'tan bu yana yayınlanmış, sayaçlara işlenmemiş oylar (işlem başına aksiyon listesi)
+  await zkAppInstance.actionState.fetch();
+  const actions = await zkAppInstance.reducer.fetchActions({
+    fromActionState: zkAppInstance.actionState.get(),
+  });
+  const pending = { red: 0, blue: 0, green: 0, totalVoters: 0, transactions: actions.length };
+  for (const transaction of actions) {
+    for (const choice of transaction) {
+      const value = Number(choice.toBigInt());
+      if (value === 0) pending.red += 1;
+      if (value === 1) pending.blue += 1;
+      if (value === 2) pending.green += 1;
+      pending.totalVoters += 1;
+    }
+  }
+  return pending;
+}
+
+async function readState() {
+  await zkAppInstance.red.fetch();
+  await zkAppInstance.blue.fetch();
+  await zkAppInstance.green.fetch();
+  await zkAppInstance.totalVoters.fetch();
+
+  return {
+    red: zkAppInstance.red.get().toString(),
+    blue: zkAppInstance.blue.get().toString(),
+    green: zkAppInstance.green.get().toString(),
+    totalVoters: zkAppInstance.totalVoters.get().toString(),
+    pending: await pendingActions(),
+  };
+}
+
+async function castVote(req: CastVoteRequest) {
+  // Oy aksiyon olarak yayınlanır; sayaçlar bir sonraki rollup'ta güncellenir
+  const timer = new PhaseTimer();
+  let txn = await Mina.transaction(feePayer, async () => {
+    await zkAppInstance.castVote(
+      Field(req.choice),
+      Field(req.personHash),
+      Field(req.ageProof),
+      Field(req.personProof),
+      Field(req.voteProof)
+    );
+  });
+  timer.mark('build');
+  await txn.prove();
+  timer.mark('prove');
+  // castVote zkApp anahtarının imzasını ister (bayraklı oylar sadece bu worker'dan gelebilir)
+  await txn.sign([feePayer, zkAppPrivateKey]).send();
+  timer.mark('send');
+  cast += 1;
+  return { dispatched: true, timings: timer.timings };
+}
+
+async function rollup() {
+  // Bekleyen tüm aksiyonlar tek işlemde sayaçlara eklenir (en fazla MAX_PENDING_ACTIONS işlem)
+  const timer = new PhaseTimer();
+  const pending = await pendingActions();
+  timer.mark('fetch');
+  if (pending.transactions === 0) {
+    return { reduced: 0, state: await readState(), timings: timer.timings };
+  }
+  if (pending.transactions > MAX_PENDING_ACTIONS) {
+    throw new Error(
+      `Bekleyen ${pending.transactions} oy işlemi tek rollup sınırını (${MAX_PENDING_ACTIONS}) aşıyor`
+    );
+  }
+  let txn = await Mina.transaction(feePayer, async () => {
+    await zkAppInstance.rollupVotes();
+  });
+  timer.mark('build');
+  await txn.prove();
+  timer.mark('prove');
+  await txn.sign([feePayer]).send();
+  timer.mark('send');
+  rollups += 1;
+  const state = await readState();
+  timer.mark('state');
+  return { reduced: pending.transactions, state, timings: timer.timings };
+}
+
+async function handle(req: Request) {
+  switch (req.op) {
+    case 'castVote':
+      return castVote(req);
+    case 'rollup':
+      return rollup();
+    case 'state':
+      return readState();
+    case 'ping':
+      return { pong: true, maxPendingActions: MAX_PENDING_ACTIONS, proofsEnabled: PROOFS_ENABLED, cast, rollups };
+    default:
+      throw new Error(`Bilinmeyen işlem: ${(req as { op: string }).op}`);
+  }
+}
+
+async function processLine(line: string) {
+  if (!line.trim()) return;
+  let req: Request;
+  try {
+    req = JSON.parse(line);
+  } catch (err) {
+    send({ id: null, ok: false, error: `Geçersiz mesaj: ${line}` });
+    return;
+  }
+  try {
+    send({ id: req.id, ok: true, result: await handle(req) });
+  } catch (err) {
+    send({ id: req.id, ok: false, error: err instanceof Error ? err.message : String(err) });
+  }
+}
+
+async function main() {
+  await setup();
+
+  // LocalBlockchain işlemleri tek tek uygular: istekler geliş sırasıyla işleniyor.
+  // Sıra rollup'ın hangi oyları kapsadığını da belirler (rollup'tan önce gelen oylar dahil)
+  let queue = Promise.resolve();
+  const rl = readline.createInterface({ input: process.stdin });
+  rl.on('line', (line) => {
+    queue = queue.then(() => processLine(line));
+  });
+  rl.on('close', () => {
+    queue.then(() => process.exit(0));
+  });
+
+  send({
+    event: 'ready',
+    proofsEnabled: PROOFS_ENABLED,
+    maxPendingActions: MAX_PENDING_ACTIONS,
+    compile: compileInfo && {
+      digest: compileInfo.digest,
+      cacheHit: compileInfo.cacheHit,
+      seconds: compileInfo.seconds,
+      verificationKeyHash: compileInfo.verificationKey.hash,
+    },
+  });
+}
+
+main().catch((err) => {
+  console.error(err);
+  process.exit(1);
+});
@@ -1,8 +1,15 @@
 import hashlib
 import json
+import mmap
 import os
+import struct
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
 from dotenv import load_dotenv
 
+import metrics
+
 # .env dosyasını yükle
 load_dotenv()
 
@@ -10,6 +17,18 @@ load_dotenv()
 SALT = os.getenv('SALT', 'zkp_voting_salt_2024')  # Varsayılan değer
 PEPPER = os.getenv('PEPPER', 'mina_protocol_pepper')  # Varsayılan değer
 
+# Kayıt formatı: 'json' (hex listesi) veya 'bin' (sıralı 32 byte'lık digest'ler, mmap ile okunur)
+REGISTRY_FORMAT = os.getenv('REGISTRY_FORMAT', 'json')
+# Depolama motoru: 'file' (kayıt dosyaları) veya 'sqlite' (önce: python3 sqlite_store.py import)
+STORAGE_BACKEND = os.getenv('STORAGE_BACKEND', 'file')
+
+# Binary kayıt başlığı: magic, versiyon, algoritma, kayıt sayısı, salt uzunluğu (+ salt)
+BINARY_MAGIC = b'ZKRG'
+BINARY_VERSION = 1
+BINARY_HEADER = struct.Struct('<4sHHQH')
+DIGEST_SIZE = 32
+ALGORITHMS = {1: 'SHA-256'}
+
 def hash_id(tc_id):
     # TC kimlik numarasını güvenli şekilde hash'liyorum
     # Salt + TC ID + Pepper kombinasyonu
@@ -22,6 +41,179 @@ def hash_person_data(tc_id, first_name, last_name, age):
     combined = SALT + tc_id + first_name + last_name + str(age) + PEPPER
     return hashlib.sha256(combined.encode()).hexdigest()
 
+def write_binary_registry(path, hashes, salt=SALT):
+    # Hash'leri sıralı, sabit genişlikli binary kayıt olarak yazıyorum
+    # hashes: hex string'ler veya 32 byte'lık digest'ler
+    digests = sorted({bytes.fromhex(h) if isinstance(h, str) else bytes(h) for h in hashes})
+    salt_bytes = salt.encode()
+    tmp_path = f"{path}.tmp.{os.getpid()}"
+    with open(tmp_path, 'wb') as f:
+        f.write(BINARY_HEADER.pack(BINARY_MAGIC, BINARY_VERSION, 1, len(digests), len(salt_bytes)))
+        f.write(salt_bytes)
+        f.write(b''.join(digests))
+    # Okuyucular eski dosyayı mmap'lemiş olabilir; os.replace onları etkilemez
+    os.replace(tmp_path, path)
+    return len(digests)
+
+class BinaryRegistry:
+    # Sıralı binary kaydı mmap ile açıp binary search ile arıyorum
+    # Dosya belleğe kopyalanmaz, sadece dokunulan sayfalar okunur
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, algorithm, count, salt_len = BINARY_HEADER.unpack_from(self._mmap, 0)
+        if magic != BINARY_MAGIC or version != BINARY_VERSION:
+            raise ValueError(f"Geçersiz binary kayıt dosyası: {path}")
+        self.algorithm = ALGORITHMS.get(algorithm, str(algorithm))
+        self.count = count
+        self._offset = BINARY_HEADER.size + salt_len
+        self.salt = self._mmap[BINARY_HEADER.size:self._offset].decode()
+        if len(self._mmap) != self._offset + count * DIGEST_SIZE:
+            raise ValueError(f"Binary kayıt dosyası eksik: {path}")
+
+    def __contains__(self, digest):
+        mm = self._mmap
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            start = self._offset + mid * DIGEST_SIZE
+            current = mm[start:start + DIGEST_SIZE]
+            if current == digest:
+                return True
+            if current < digest:
+                lo = mid + 1
+            else:
+                hi = mid
+        return False
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        for i in range(self.count):
+            start = self._offset + i * DIGEST_SIZE
+            yield self._mmap[start:start + DIGEST_SIZE]
+
+class RegistryVerifier:
+    # Hash'lenmiş kayıt dosyasını bir kez belleğe alıp set üzerinden O(1) arama yapıyorum
+    # Dosya sadece mtime veya boyutu değişince yeniden yükleniyor
+    def __init__(self, path, key, check_interval=1.0):
+        self.path = path
+        self.key = key
+        self.check_interval = check_interval  # Dosya değişikliği kontrolleri arası süre (saniye)
+        self._index = None
+        self._signature = None
+        self._last_check = 0.0
+        self._reload_lock = threading.Lock()
+        self.reload_count = 0
+
+    def _file_signature(self):
+        stat = os.stat(self.path)
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _build_index(self):
+        # Binary kayıt mmap ile açılır; JSON kayıttaki hex string'ler 32 byte'lık
+        # digest'lere çevrilip frozenset oluşturulur
+        if self.path.endswith('.bin'):
+            return BinaryRegistry(self.path)
+        with open(self.path, 'r') as f:
+            data = json.load(f)
+        return frozenset(bytes.fromhex(h) for h in data[self.key])
+
+    def _refresh(self):
+        # Gerekirse index'i yeniliyorum
+        if self._index is not None and time.monotonic() - self._last_check < self.check_interval:
+            return
+
+        # İlk yüklemede beklemek zorundayız; sonraki yenilemelerde başka bir thread
+        # zaten yüklüyorsa eski index ile devam ediyorum
+        if not self._reload_lock.acquire(blocking=self._index is None):
+            return
+        try:
+            if self._index is not None and time.monotonic() - self._last_check < self.check_interval:
+                return
+            try:
+                signature = self._file_signature()
+            except OSError:
+                signature = None
+
+            if signature != self._signature or self._index is None:
+                try:
+                    with metrics.timer('registry_load', registry=self.key):
+                        index = self._build_index() if signature is not None else frozenset()
+                except (OSError, ValueError, KeyError):
+                    # Dosya yazılırken okunmuş olabilir; eski index ile devam edip sonra tekrar deniyorum
+                    index = None
+                if index is not None:
+                    # Referans ataması atomik: okuyucular ya eski ya yeni index'i görür
+                    self._index = index
+                    self._signature = signature
+                    self.reload_count += 1
+                elif self._index is None:
+                    self._index = frozenset()
+            self._last_check = time.monotonic()
+        finally:
+            self._reload_lock.release()
+
+    def warm_up(self, background=True):
+        # Index'i ilk istekten önce yüklüyorum
+        if not background:
+            self._refresh()
+            return None
+        thread = threading.Thread(target=self._refresh, daemon=True)
+        thread.start()
+        return thread
+
+    def contains_digest(self, digest):
+        # 32 byte'lık digest index'te var mı kontrol ediyorum
+        self._refresh()
+        return digest in self._index
+
+    def snapshot(self):
+        # Toplu aramalar için güncel index'i bir kez alıyorum (frozenset veya BinaryRegistry)
+        self._refresh()
+        return self._index
+
+    def contains(self, hex_hash):
+        # Hex formatındaki hash index'te var mı kontrol ediyorum
+        try:
+            return self.contains_digest(bytes.fromhex(hex_hash))
+        except ValueError:
+            return False
+
+    def __len__(self):
+        self._refresh()
+        return len(self._index)
+
+# Tüm modüllerin paylaştığı doğrulayıcılar
+if STORAGE_BACKEND == 'sqlite':
+    from sqlite_store import SqliteRegistry, get_database
+    id_verifier = SqliteRegistry(get_database(), 'hashed_ids')
+    people_verifier = SqliteRegistry(get_database(), 'hashed_people')
+else:
+    _registry_ext = 'bin' if REGISTRY_FORMAT == 'bin' else 'json'
+    id_verifier = RegistryVerifier(f'secure_valid_ids.{_registry_ext}', 'hashed_ids')
+    people_verifier = RegistryVerifier(f'secure_people_data.{_registry_ext}', 'hashed_people')
+
+def warm_up_verifiers(background=True):
+    # Her iki kayıt index'ini önceden yüklüyorum
+    threads = [id_verifier.warm_up(background), people_verifier.warm_up(background)]
+    return [t for t in threads if t is not None]
+
+REGISTRY_DESCRIPTIONS = {
+    "hashed_ids": "SHA-256 ile hash'lenmiş geçerli TC kimlik numaraları (salt+pepper ile)",
+    "hashed_people": "SHA-256 ile hash'lenmiş kişi verileri (TC+isim+soyisim+yaş+salt+pepper)",
+}
+
+def registry_metadata(key):
+    # Güvenli kayıt dosyalarındaki açıklama alanları
+    return {
+        "description": REGISTRY_DESCRIPTIONS[key],
+        "salt": SALT,
+        "algorithm": "SHA-256",
+        "note": "Pepper değeri .env dosyasında saklanır ve GitHub'a yüklenmez"
+    }
+
 def create_hashed_id_list():
     # TC kimlik numaralarını hash'leyip güvenli liste oluşturuyorum
     # TC kimlik numaralarını people_data.json dosyasından oku
@@ -44,13 +236,7 @@ def create_hashed_id_list():
         hashed_id = hash_id(tc_id)
         hashed_ids.append(hashed_id)
     
-    return {
-        "hashed_ids": hashed_ids,
-        "description": "SHA-256 ile hash'lenmiş geçerli TC kimlik numaraları (salt+pepper ile)",
-        "salt": SALT,
-        "algorithm": "SHA-256",
-        "note": "Pepper değeri .env dosyasında saklanır ve GitHub'a yüklenmez"
-    }
+    return dict({"hashed_ids": hashed_ids}, **registry_metadata('hashed_ids'))
 
 def create_hashed_people_list():
     # Kişi verilerini hash'leyip güvenli liste oluşturuyorum
@@ -72,45 +258,154 @@ def create_hashed_people_list():
         )
         hashed_people.append(hashed_person)
     
+    return dict({"hashed_people": hashed_people}, **registry_metadata('hashed_people'))
+
+# Toplu hash'lemede SALT öneki her kayıt için tekrar işlenmesin diye önceden beslenmiş SHA-256 durumu
+_SALT_STATE = hashlib.sha256(SALT.encode())
+# Bu sayının altındaki batch'ler process havuzuna gönderilmez (havuz maliyeti kazançtan büyük)
+BATCH_PARALLEL_THRESHOLD = 20000
+_batch_pool = None
+_batch_pool_workers = 0
+_batch_pool_lock = threading.Lock()
+
+def _person_fields(record):
+    if isinstance(record, dict):
+        return record['tc_id'], record['first_name'], record['last_name'], record['age']
+    return record
+
+def _hash_people_chunk(records):
+    # Kayıtları hash'leyip digest'leri tek bytes nesnesinde birleştiriyorum
+    seeded = _SALT_STATE
+    digests = []
+    for tc_id, first_name, last_name, age in records:
+        h = seeded.copy()
+        h.update((tc_id + first_name + last_name + str(age) + PEPPER).encode())
+        digests.append(h.digest())
+    return b''.join(digests)
+
+def _get_batch_pool(workers):
+    # Process havuzu çağrılar arasında paylaşılıyor (her batch'te yeniden başlatılmaz)
+    global _batch_pool, _batch_pool_workers
+    with _batch_pool_lock:
+        if _batch_pool is None or _batch_pool_workers != workers:
+            if _batch_pool is not None:
+                _batch_pool.shutdown()
+            _batch_pool = ProcessPoolExecutor(max_workers=workers)
+            _batch_pool_workers = workers
+        return _batch_pool
+
+def hash_people_batch(records, workers=None, chunk_size=5000):
+    # Çok sayıda kişi kaydını hash'liyorum; sonuç n*32 byte'lık tek bytes nesnesi
+    # (i. kaydın digest'i: result[i*32:(i+1)*32], hex için .hex())
+    records = [_person_fields(record) for record in records]
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1 or len(records) < BATCH_PARALLEL_THRESHOLD:
+        return _hash_people_chunk(records)
+    chunks = [records[i:i + chunk_size] for i in range(0, len(records), chunk_size)]
+    return b''.join(_get_batch_pool(workers).map(_hash_people_chunk, chunks))
+
+def validate_people_batch(records, workers=None):
+    # Çok sayıda kişi kaydını doğruluyorum; sonuç bytearray (1 = geçerli, 0 = geçersiz)
+    with metrics.timer('hash', kind='batch'):
+        digests = hash_people_batch(records, workers)
+    index = people_verifier.snapshot()
+    count = len(digests) // DIGEST_SIZE
+    result = bytearray(count)
+    with metrics.timer('registry_lookup', registry='people_batch'):
+        for i in range(count):
+            if digests[i * DIGEST_SIZE:(i + 1) * DIGEST_SIZE] in index:
+                result[i] = 1
+    return result
+
+def benchmark_batch(records, workers=None):
+    # Tek tek is_valid_person döngüsü ile validate_people_batch'i karşılaştırıyorum
+    records = [_person_fields(record) for record in records]
+    people_verifier.warm_up(background=False)
+
+    start = time.perf_counter()
+    loop_result = bytearray(1 if is_valid_person(*record) else 0 for record in records)
+    loop_duration = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch_result = validate_people_batch(records, workers)
+    batch_duration = time.perf_counter() - start
+
+    if loop_result != batch_result:
+        raise AssertionError("Toplu doğrulama sonucu tek tek doğrulama ile aynı değil")
     return {
-        "hashed_people": hashed_people,
-        "description": "SHA-256 ile hash'lenmiş kişi verileri (TC+isim+soyisim+yaş+salt+pepper)",
-        "salt": SALT,
-        "algorithm": "SHA-256",
-        "note": "Pepper değeri .env dosyasında saklanır ve GitHub'a yüklenmez"
+        "records": len(records),
+        "loop_seconds": loop_duration,
+        "batch_seconds": batch_duration,
+        "speedup": loop_duration / batch_duration if batch_duration > 0 else float('inf'),
     }
 
 def is_valid_id(tc_id):
     # TC kimlik numarasının geçerli olup olmadığını kontrol ediyorum
     try:
-        with open('secure_valid_ids.json', 'r') as f:
-            data = json.load(f)
-            hashed_ids = data['hashed_ids']
-            
         # Gelen TC ID'yi hash'le
-        input_hash = hash_id(tc_id)
+        with metrics.timer('hash', kind='id'):
+            input_hash = hash_id(tc_id)
         
-        # Hash'lenmiş listede var mı kontrol et
-        return input_hash in hashed_ids
+        # Bellekteki hash index'inde var mı kontrol et
+        with metrics.timer('registry_lookup', registry='ids'):
+            return id_verifier.contains(input_hash)
     except:
         return False
 
 def is_valid_person(tc_id, first_name, last_name, age):
     # Kişi verilerinin geçerli olup olmadığını kontrol ediyorum
     try:
-        with open('secure_people_data.json', 'r') as f:
-            data = json.load(f)
-            hashed_people = data['hashed_people']
-            
         # Gelen kişi verilerini hash'le
-        input_hash = hash_person_data(tc_id, first_name, last_name, age)
+        with metrics.timer('hash', kind='person'):
+            input_hash = hash_person_data(tc_id, first_name, last_name, age)
         
-        # Hash'lenmiş listede var mı kontrol et
-        return input_hash in hashed_people
+        # Bellekteki hash index'inde var mı kontrol et
+        with metrics.timer('registry_lookup', registry='people'):
+            return people_verifier.contains(input_hash)
     except:
         return False
 
+def convert_json_registries_to_binary():
+    # Mevcut JSON kayıtlarını people_data.json olmadan binary formata çeviriyorum
+    counts = {}
+    for json_path, key in (('secure_valid_ids.json', 'hashed_ids'), ('secure_people_data.json', 'hashed_people')):
+        with open(json_path, 'r') as f:
+            data = json.load(f)
+        bin_path = json_path[:-len('.json')] + '.bin'
+        counts[bin_path] = write_binary_registry(bin_path, data[key], data.get('salt', SALT))
+    return counts
+
 if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) > 1 and sys.argv[1] == 'bench-batch':
+        # Kullanım: python3 hash_utils.py bench-batch [tekrar] [nüfus dosyası]
+        # Dosya verilmezse people_data.json, o da yoksa population.py ile üretilen 1000 kişi kullanılır
+        repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+        people_path = sys.argv[3] if len(sys.argv) > 3 else 'people_data.json'
+        if os.path.exists(people_path):
+            from registry_builder import iter_people_records
+            base = list(iter_people_records(people_path))
+        elif len(sys.argv) > 3:
+            print(f"❌ Nüfus dosyası bulunamadı: {people_path}")
+            sys.exit(1)
+        else:
+            from population import iter_population
+            print(f"⚠️ {people_path} yok: population.py ile üretilmiş 1000 kişi kullanılıyor "
+                  "(kayıtta yoksa hepsi geçersiz sayılır, ölçüm yine hash + arama süresidir)")
+            base = list(iter_population(1000))
+        result = benchmark_batch(base * repeat)
+        print(f"📊 {result['records']:,} kayıt")
+        print(f"   🔁 Tek tek: {result['loop_seconds']:.3f} saniye")
+        print(f"   📦 Toplu:   {result['batch_seconds']:.3f} saniye")
+        print(f"   🚀 Hızlanma: {result['speedup']:.1f}x")
+        sys.exit(0)
+
+    if len(sys.argv) > 1 and sys.argv[1] == 'to-bin':
+        for bin_path, count in convert_json_registries_to_binary().items():
+            print(f"✅ {bin_path}: {count} kayıt")
+        sys.exit(0)
+
     # Güvenli ID listesi oluştur
     secure_data = create_hashed_id_list()
     
@@ -129,6 +424,22 @@ if __name__ == "__main__":
     print("✅ Güvenli kişi verileri listesi oluşturuldu: secure_people_data.json")
     print(f"📊 Toplam {len(secure_people_data['hashed_people'])} hash'lenmiş kişi verisi")
     
+    # Aynı kayıtların mmap ile okunabilen binary sürümleri
+    write_binary_registry('secure_valid_ids.bin', secure_data['hashed_ids'])
+    write_binary_registry('secure_people_data.bin', secure_people_data['hashed_people'])
+    print("✅ Binary kayıtlar oluşturuldu: secure_valid_ids.bin, secure_people_data.bin")
+    
+    # Kişi kaydının Merkle ağacı (kök kontrata registryRoot olarak yazılır)
+    from merkle_tree import build_from_registry
+    from vote_worker_client import VoteWorkerError
+    try:
+        tree, leaf_count, _ = build_from_registry('secure_people_data.json')
+        print(f"✅ Kayıt Merkle ağacı oluşturuldu: {leaf_count} yaprak, kök {tree.root}")
+        tree.close()
+        tree.hasher.close()
+    except (OSError, VoteWorkerError) as e:
+        print(f"⚠️ Kayıt Merkle ağacı oluşturulamadı ({e}); Poseidon için önce: npm run build")
+    
     # Test
     test_id = "12345678901"
     print(f"\n🧪 Test ID: {test_id}")
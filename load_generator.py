@@ -0,0 +1,233 @@
+import argparse
+import asyncio
+import os
+import random
+import shutil
+import time
+
+from benchmark import LatencyHistogram, build_report, print_report, save_reports
+from population import add_sampler_arguments, load_sampler, sampler_options
+
+# Açık döngü (open-loop) yük üreticisi: oylar önceki oyların bitmesini beklemeden
+# hedef geliş hızında gönderilir. Gecikme planlanan gönderim anından ölçülür; böylece
+# sistem yetişemediğinde biriken kuyruk gecikmesi (coordinated omission) gizlenmez
+
+# Bu hata türleri sistemin doğru cevabıdır (ör. çifte oy reddi), kapasite hatası sayılmaz
+BUSINESS_ERRORS = ('invalid_person', 'already_voted', 'rejected')
+
+def poisson_schedule(rate, duration, seed=None):
+    # Sabit ortalama hızda Poisson gelişleri: planlanan gönderim anları (saniye)
+    return ramp_schedule([(duration, rate, rate)], seed)
+
+def ramp_schedule(stages, seed=None):
+    # stages: (süre, başlangıç hızı, bitiş hızı) listesi; hız aşama içinde doğrusal değişir
+    # Gelişler değişken hızlı Poisson süreci (her adımda o anki hız kullanılır)
+    rng = random.Random(seed)
+    offsets = []
+    stage_start = 0.0
+    for duration, start_rate, end_rate in stages:
+        t = 0.0
+        while True:
+            rate = start_rate + (end_rate - start_rate) * (t / duration)
+            if rate <= 0:
+                # Hız sıfırsa küçük adımlarla ilerliyorum
+                t += 0.01
+            else:
+                t += rng.expovariate(rate)
+            if t >= duration:
+                break
+            offsets.append(stage_start + t)
+        stage_start += duration
+    return offsets
+
+def parse_ramp(script):
+    # "10:50,30:50-400,10:400" -> 10 sn 50/s, 30 sn 50'den 400/s'ye, 10 sn 400/s
+    stages = []
+    for part in script.split(','):
+        duration, rates = part.split(':')
+        start_rate, _, end_rate = rates.partition('-')
+        stages.append((float(duration), float(start_rate), float(end_rate or start_rate)))
+    return stages
+
+async def run_open_loop(operation, schedule, max_in_flight=10000):
+    # operation(i): i. isteği gönderen async fonksiyon
+    # Gönderimler planlanan anlarda başlatılır; cevabı beklenmez (açık döngü)
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    results = []
+    tasks = set()
+
+    async def fire(index, offset):
+        status, error = 'success', None
+        try:
+            await operation(index)
+        except Exception as e:
+            status, error = 'error', getattr(e, 'reason', None) or type(e).__name__
+        results.append({
+            'index': index,
+            'offset': offset,
+            'status': status,
+            'error': error,
+            'latency': loop.time() - (start + offset),
+            'timestamp': time.time(),
+        })
+
+    for index, offset in enumerate(schedule):
+        delay = start + offset - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if len(tasks) >= max_in_flight:
+            # Güvenlik sınırı: gönderilemeyen istek kapasite hatası olarak sayılır
+            results.append({'index': index, 'offset': offset, 'status': 'error', 'error': 'dropped',
+                            'latency': 0.0, 'timestamp': time.time()})
+            continue
+        task = asyncio.create_task(fire(index, offset))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+
+    if tasks:
+        await asyncio.gather(*tasks)
+    return results, loop.time() - start
+
+def analyze_windows(results, window=1.0, slo=1.0, max_error_ratio=0.01):
+    # Sonuçları planlanan gönderim anına göre pencerelere bölüp her pencerede
+    # sunulan hız, p99 ve kapasite hatası oranını hesaplıyorum
+    # Sürdürülebilir throughput: bu hıza kadar (dahil) sunulan hızdaki her pencerede
+    # p99 <= slo ve hata oranı <= max_error_ratio olan en yüksek sunulan hız
+    # Tek bir şanslı pencere yetmez: daha düşük hızlı bir pencere bile SLO'yu kaçırdıysa sınır oradadır
+    windows = {}
+    for result in results:
+        windows.setdefault(int(result['offset'] // window), []).append(result)
+    rows = []
+    for index in sorted(windows):
+        window_results = windows[index]
+        histogram = LatencyHistogram()
+        failures = 0
+        for result in window_results:
+            histogram.record(result['latency'])
+            if result['status'] == 'error' and result['error'] not in BUSINESS_ERRORS:
+                failures += 1
+        offered = len(window_results) / window
+        p99 = histogram.percentile(99)
+        error_ratio = failures / len(window_results)
+        healthy = p99 <= slo and error_ratio <= max_error_ratio
+        rows.append({
+            "start": index * window,
+            "offered_rate": offered,
+            "p50": histogram.percentile(50),
+            "p99": p99,
+            "error_ratio": error_ratio,
+            "healthy": healthy,
+        })
+    return rows, sustainable_rate(rows)
+
+def sustainable_rate(rows):
+    # Pencereleri sunulan hıza göre artan sırada geziyorum; ilk sağlıksız hızda duruyorum
+    # Aynı hızda hem sağlıklı hem sağlıksız pencere varsa o hız sürdürülebilir sayılmaz
+    by_rate = {}
+    for row in rows:
+        by_rate[row["offered_rate"]] = by_rate.get(row["offered_rate"], True) and row["healthy"]
+    sustainable = 0.0
+    for rate in sorted(by_rate):
+        if not by_rate[rate]:
+            break
+        sustainable = rate
+    return sustainable
+
+def _people_operation(pipeline, sampler):
+    async def vote(index):
+        person = sampler.sample()
+        await pipeline.submit_vote(person['tc_id'], person['first_name'], person['last_name'],
+                                   person['age'], random.randint(0, 2))
+    return vote
+
+def main():
+    parser = argparse.ArgumentParser(description="Oy akışı için açık döngü yük üreticisi")
+    parser.add_argument('--rate', type=float, default=50, help="Sabit hedef geliş hızı (oy/saniye)")
+    parser.add_argument('--duration', type=float, default=20, help="Sabit hızda test süresi (saniye)")
+    parser.add_argument('--ramp', help="Aşamalı hız planı, ör. '10:50,30:50-400,10:400' (süre:hız[-hız])")
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--submit-delay', type=float, default=0.5, help="Simüle edilen blockchain işlem süresi")
+    parser.add_argument('--real', action='store_true', help="Simülasyon yerine Node oy worker'ını kullan")
+    parser.add_argument('--submit-concurrency', type=int, default=64)
+    parser.add_argument('--slo', type=float, default=1.0, help="p99 gecikme hedefi (saniye)")
+    parser.add_argument('--window', type=float, default=1.0, help="Analiz penceresi (saniye)")
+    parser.add_argument('--warmup', type=int, default=0, help="Rapora katılmayan ısınma isteği sayısı")
+    parser.add_argument('--json', help="Sonuçların yazılacağı JSON dosyası")
+    add_sampler_arguments(parser)
+    args = parser.parse_args()
+
+    # Ağır modülleri sadece yük testi çalıştırılırken yüklüyorum
+    from hash_utils import warm_up_verifiers
+    from voted_tc_tracker import reset_votes
+    from vote_pipeline import VotePipeline, nullifier_submit, simulated_submit
+
+    schedule = ramp_schedule(parse_ramp(args.ramp), args.seed) if args.ramp \
+        else poisson_schedule(args.rate, args.duration, args.seed)
+    sampler = load_sampler(**sampler_options(args))
+
+    print("🧪 Açık Döngü Yük Testi")
+    print("=" * 50)
+    print(f"   📋 Plan: {len(schedule)} oy, {schedule[-1] if schedule else 0:.1f} saniye "
+          f"({args.ramp or f'{args.rate}/s Poisson'})")
+    warm_up_verifiers(background=False)
+    reset_votes()
+
+    worker = voter = None
+    ballot_builder = None
+    if args.real:
+        # Web arayüzüyle aynı yol: voteWithNullifier. Her koşu yeni deploy edilen kontratla
+        # başladığı için nullifier haritası geçici dizinde boş açılır
+        import tempfile
+        from merkle_tree import open_registry_tree
+        from nullifier_set import NullifierVoter, open_nullifier_set
+        from vote_worker_client import VoteWorkerClient
+        worker = VoteWorkerClient()
+        worker.start()
+        nullifier_dir = tempfile.mkdtemp(prefix='load_nullifiers_')
+        voter = NullifierVoter(worker, open_registry_tree(),
+                               open_nullifier_set(os.path.join(nullifier_dir, 'nullifiers.sqlite')))
+        submit = nullifier_submit(voter)
+        ballot_builder = voter.ballot_for
+    else:
+        submit = simulated_submit(args.submit_delay)
+
+    pipeline = VotePipeline(submit, concurrency={'submit': args.submit_concurrency},
+                            ballot_builder=ballot_builder)
+
+    async def run():
+        results, duration = await run_open_loop(_people_operation(pipeline, sampler), schedule)
+        await pipeline.close()
+        return results, duration
+
+    try:
+        results, duration = asyncio.run(run())
+    finally:
+        if voter is not None:
+            voter.nullifiers.close()
+            voter.registry_tree.close()
+            shutil.rmtree(nullifier_dir, ignore_errors=True)
+            worker.close()
+
+    name = f"Açık Döngü ({args.ramp or f'{args.rate:g}/s'})"
+    report = build_report(name, results, duration, args.warmup)
+    rows, sustainable = analyze_windows(results, args.window, args.slo)
+    report["windows"] = rows
+    report["sustainable_rate"] = sustainable
+
+    print(f"\n📊 {name} Sonuçları:")
+    print(f"   ⏱️  Toplam Süre: {duration:.2f} saniye")
+    print_report(report)
+    print(f"\n🪟 Pencereler (p99 hedefi {args.slo*1000:.0f} ms):")
+    for row in rows:
+        flag = "✅" if row["healthy"] else "❌"
+        print(f"   {flag} {row['start']:6.1f}s  sunulan {row['offered_rate']:7.1f}/s  "
+              f"p50 {row['p50']*1000:7.1f} ms  p99 {row['p99']*1000:7.1f} ms  hata %{row['error_ratio']*100:.1f}")
+    print(f"\n🚀 Sürdürülebilir throughput: {sustainable:.1f} oy/saniye")
+
+    if args.json:
+        save_reports([report], args.json)
+        print(f"💾 Sonuçlar kaydedildi: {args.json}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,656 @@
+import argparse
+import hashlib
+import heapq
+import json
+import mmap
+import os
+import struct
+import tempfile
+import time
+
+from dotenv import load_dotenv
+
+import metrics
+from hash_utils import DIGEST_SIZE, hash_person_data
+
+load_dotenv()
+
+# Seçmen kaydı için artımlı Merkle ağacı
+# Yapraklar kişi hash'lerinden (secure_people_data) türetilen Field değerleri; kök kontratta
+# registryRoot olarak saklanır ve oy verirken üyelik devre içinde kanıtlanır (voteWithMembership)
+# Her seviye diskte ayrı dosyada tutulur (katman önbelleği): tanık (witness) üretimi sadece
+# log n düğüm okur, tek kişilik güncelleme sadece yaprağından köke giden yolu yeniden hash'ler
+
+# Voting.ts içindeki REGISTRY_TREE_HEIGHT ile aynı olmalı
+REGISTRY_TREE_HEIGHT = 28
+NODE_SIZE = 32
+
+MERKLE_DIR = os.getenv('REGISTRY_MERKLE_DIR', 'registry_merkle')
+# poseidon: kontrattaki MerkleWitness ile uyumlu (Node worker gerekir)
+# sha256: sadece çevrimdışı deneme ve benchmark için, kontrat kökü olarak kullanılamaz
+MERKLE_HASHER = os.getenv('MERKLE_HASHER', 'poseidon')
+MERKLE_WORKER_SCRIPT = 'dist/merkle_worker.js'
+# Worker'a tek istekte gönderilen en fazla çift sayısı
+HASH_BATCH_SIZE = 20000
+# Bu kadar yeni yapraktan sonra bellekteki index kaydı sıralı index dosyasına birleştirilir
+INDEX_COMPACT_THRESHOLD = int(os.getenv('MERKLE_INDEX_COMPACT_THRESHOLD', '200000'))
+
+META_FILE = 'meta.json'
+INDEX_FILE = 'index.bin'
+INDEX_LOG_FILE = 'index.log'
+# Index kaydı: 32 byte digest + yaprak sırası
+INDEX_RECORD = struct.Struct('<32sQ')
+# Kişi yaprakları 2^248 bitiyle etiketlenir: gerçek bir yaprak asla 0 olmaz, boş ve silinmiş slotlar 0'dır
+# Kontrat 0 yaprağı reddeder; böylece boş slotun tanığıyla sahte üyelik kanıtlanamaz
+LEAF_TAG = 1 << 248
+# Yaprak formatı değişince eski ağaçlar açılmaz (yeniden kurulmalı)
+LEAF_FORMAT = 'tagged-v1'
+
+def leaf_value(digest):
+    # 32 byte'lık kişi hash'ini Field'a çeviriyorum (ilk 31 byte + etiket biti: alan modülünden küçük)
+    if isinstance(digest, str):
+        digest = bytes.fromhex(digest)
+    return LEAF_TAG | int.from_bytes(digest[:31], 'big')
+
+def _sha256_field(*values):
+    data = b''.join(value.to_bytes(NODE_SIZE, 'big') for value in values)
+    return int.from_bytes(hashlib.sha256(data).digest()[:31], 'big')
+
+class Sha256PairHasher:
+    name = 'sha256'
+
+    def hash_pairs(self, pairs):
+        sha256 = hashlib.sha256
+        return [
+            int.from_bytes(sha256(left.to_bytes(NODE_SIZE, 'big') + right.to_bytes(NODE_SIZE, 'big'))
+                           .digest()[:31], 'big')
+            for left, right in pairs
+        ]
+
+    def hash_path(self, leaf, steps):
+        # steps: (kardeş, düğüm sol çocuk mu); sonuç: yapraktan sonraki her seviyedeki düğüm
+        result = []
+        node = leaf
+        for sibling, is_left in steps:
+            node = _sha256_field(node, sibling) if is_left else _sha256_field(sibling, node)
+            result.append(node)
+        return result
+
+    def hash_fields(self, inputs):
+        return [_sha256_field(*values) for values in inputs]
+
+    def close(self):
+        pass
+
+class PoseidonPairHasher:
+    # Poseidon hash'i snarkyjs ile birebir aynı olsun diye Node worker'ında hesaplanıyor
+    name = 'poseidon'
+
+    def __init__(self, client=None, timeout=120):
+        from vote_worker_client import VoteWorkerClient
+        self.client = client or VoteWorkerClient(MERKLE_WORKER_SCRIPT, startup_timeout=30)
+        self.timeout = timeout
+
+    def hash_pairs(self, pairs):
+        result = []
+        for i in range(0, len(pairs), HASH_BATCH_SIZE):
+            chunk = pairs[i:i + HASH_BATCH_SIZE]
+            hashes = self.client.request('hashPairs', timeout=self.timeout,
+                                         pairs=[[str(left), str(right)] for left, right in chunk])
+            result.extend(int(h) for h in hashes)
+        return result
+
+    def hash_path(self, leaf, steps):
+        # Ardışık hash'ler tek istekte: her adımda worker'a gidip gelmek yerine
+        hashes = self.client.request('hashPath', timeout=self.timeout, leaf=str(leaf),
+                                     steps=[[str(sibling), bool(is_left)] for sibling, is_left in steps])
+        return [int(h) for h in hashes]
+
+    def hash_fields(self, inputs):
+        hashes = self.client.request('hashFields', timeout=self.timeout,
+                                     inputs=[[str(value) for value in values] for values in inputs])
+        return [int(h) for h in hashes]
+
+    def close(self):
+        self.client.close()
+
+HASHERS = {
+    'poseidon': PoseidonPairHasher,
+    'sha256': Sha256PairHasher,
+}
+
+def get_hasher(name=None):
+    name = name or MERKLE_HASHER
+    if name not in HASHERS:
+        raise ValueError(f"Bilinmeyen Merkle hash'i: {name}")
+    return HASHERS[name]()
+
+class MerkleLayerStore:
+    # Seviye başına bir dosya: düğüm i -> [i*32, (i+1)*32) aralığı (big-endian)
+    # Dosyalar mmap ile açılır; büyüdükçe kapasite ikiye katlanır
+    def __init__(self, directory, height):
+        self.directory = directory
+        self.height = height
+        os.makedirs(directory, exist_ok=True)
+        self._files = []
+        self._maps = []
+        for level in range(height):
+            path = self._path(level)
+            if not os.path.exists(path):
+                open(path, 'wb').close()
+            f = open(path, 'r+b')
+            self._files.append(f)
+            self._maps.append(self._map(f))
+
+    def _path(self, level):
+        return os.path.join(self.directory, f'level_{level:02d}.bin')
+
+    @staticmethod
+    def _map(f):
+        size = os.fstat(f.fileno()).st_size
+        return mmap.mmap(f.fileno(), size) if size else None
+
+    def capacity(self, level):
+        mm = self._maps[level]
+        return len(mm) // NODE_SIZE if mm is not None else 0
+
+    def reserve(self, level, count):
+        capacity = self.capacity(level)
+        if count <= capacity:
+            return
+        new_capacity = max(count, capacity * 2, 1024)
+        if self._maps[level] is not None:
+            self._maps[level].close()
+        self._files[level].truncate(new_capacity * NODE_SIZE)
+        self._maps[level] = self._map(self._files[level])
+
+    def read(self, level, index):
+        start = index * NODE_SIZE
+        return int.from_bytes(self._maps[level][start:start + NODE_SIZE], 'big')
+
+    def read_range(self, level, start, stop):
+        if stop <= start:
+            return []
+        data = self._maps[level][start * NODE_SIZE:stop * NODE_SIZE]
+        return [int.from_bytes(data[i:i + NODE_SIZE], 'big') for i in range(0, len(data), NODE_SIZE)]
+
+    def write(self, level, index, value):
+        self.reserve(level, index + 1)
+        start = index * NODE_SIZE
+        self._maps[level][start:start + NODE_SIZE] = value.to_bytes(NODE_SIZE, 'big')
+
+    def write_range(self, level, start, values):
+        if not values:
+            return
+        self.reserve(level, start + len(values))
+        self._maps[level][start * NODE_SIZE:(start + len(values)) * NODE_SIZE] = \
+            b''.join(value.to_bytes(NODE_SIZE, 'big') for value in values)
+
+    def clear(self):
+        for level in range(self.height):
+            if self._maps[level] is not None:
+                self._maps[level].close()
+                self._maps[level] = None
+            self._files[level].truncate(0)
+
+    def flush(self):
+        for mm in self._maps:
+            if mm is not None:
+                mm.flush()
+
+    def close(self):
+        for mm in self._maps:
+            if mm is not None:
+                mm.close()
+        for f in self._files:
+            f.close()
+        self._maps = [None] * self.height
+
+class RegistryMerkleTree:
+    # Yapraklar ekleme sırasıyla dizilir; digest -> yaprak sırası index'i iki parçalı:
+    # sıralı index.bin (mmap + binary search) ve son eklenenler için append-only index.log
+    def __init__(self, directory=MERKLE_DIR, height=REGISTRY_TREE_HEIGHT, hasher=None):
+        self.directory = directory
+        self.height = height
+        self.hasher = hasher or get_hasher()
+        os.makedirs(directory, exist_ok=True)
+        meta = self._read_meta()
+        if meta is not None and (meta['height'] != height or meta['hasher'] != self.hasher.name
+                                 or meta.get('leaf_format') != LEAF_FORMAT):
+            raise ValueError(f"{directory} farklı bir ağaç içeriyor (yükseklik {meta['height']}, "
+                             f"hash {meta['hasher']}, yaprak formatı {meta.get('leaf_format', 'eski')}); "
+                             f"yeniden oluşturun")
+        self.count = meta['count'] if meta else 0
+        self.zeros = [int(z) for z in meta['zeros']] if meta else self._compute_zeros()
+        self.layers = MerkleLayerStore(directory, height)
+        self._index = None
+        self._index_count = 0
+        self._overlay = {}
+        self._open_index()
+
+    def _read_meta(self):
+        try:
+            with open(os.path.join(self.directory, META_FILE), 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def _write_meta(self):
+        path = os.path.join(self.directory, META_FILE)
+        tmp_path = f"{path}.tmp.{os.getpid()}"
+        with open(tmp_path, 'w') as f:
+            json.dump({
+                "height": self.height,
+                "hasher": self.hasher.name,
+                "leaf_format": LEAF_FORMAT,
+                "count": self.count,
+                "root": str(self.root),
+                "zeros": [str(z) for z in self.zeros],
+                "updated_at": time.time(),
+            }, f, indent=2)
+        os.replace(tmp_path, path)
+
+    def _compute_zeros(self):
+        # Boş alt ağaçların kökleri: zeros[0] = 0, zeros[l+1] = H(zeros[l], zeros[l])
+        zeros = [0]
+        for _ in range(self.height - 1):
+            zeros.append(self.hasher.hash_pairs([(zeros[-1], zeros[-1])])[0])
+        return zeros
+
+    def _open_index(self):
+        if self._index is not None:
+            self._index.close()
+            self._index = None
+        path = os.path.join(self.directory, INDEX_FILE)
+        if os.path.exists(path) and os.path.getsize(path):
+            with open(path, 'rb') as f:
+                self._index = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._index_count = len(self._index) // INDEX_RECORD.size if self._index is not None else 0
+        # Kaydedilmemiş (meta'dan sonra yazılmış) log kayıtları yok sayılıyor
+        self._overlay = {}
+        log_path = os.path.join(self.directory, INDEX_LOG_FILE)
+        if os.path.exists(log_path):
+            with open(log_path, 'rb') as f:
+                data = f.read()
+            for offset in range(0, len(data) - INDEX_RECORD.size + 1, INDEX_RECORD.size):
+                digest, position = INDEX_RECORD.unpack_from(data, offset)
+                if position < self.count:
+                    self._overlay[digest] = position
+
+    def _index_digest(self, i):
+        start = i * INDEX_RECORD.size
+        return self._index[start:start + DIGEST_SIZE]
+
+    def index_of(self, digest):
+        # Digest'in yaprak sırası (yoksa None): önce son eklenenler, sonra sıralı index
+        if isinstance(digest, str):
+            digest = bytes.fromhex(digest)
+        position = self._overlay.get(digest)
+        if position is not None or self._index is None:
+            return position
+        lo, hi = 0, self._index_count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            current = self._index_digest(mid)
+            if current == digest:
+                return INDEX_RECORD.unpack_from(self._index, mid * INDEX_RECORD.size)[1]
+            if current < digest:
+                lo = mid + 1
+            else:
+                hi = mid
+        return None
+
+    def _iter_index(self):
+        for i in range(self._index_count):
+            yield INDEX_RECORD.unpack_from(self._index, i * INDEX_RECORD.size)
+
+    def compact_index(self):
+        # index.log'daki kayıtları sıralı index.bin ile birleştiriyorum (tek geçişli birleştirme)
+        path = os.path.join(self.directory, INDEX_FILE)
+        tmp_path = f"{path}.tmp.{os.getpid()}"
+        with open(tmp_path, 'wb') as f:
+            for digest, position in heapq.merge(self._iter_index(), sorted(self._overlay.items())):
+                f.write(INDEX_RECORD.pack(digest, position))
+        if self._index is not None:
+            self._index.close()
+            self._index = None
+        os.replace(tmp_path, path)
+        open(os.path.join(self.directory, INDEX_LOG_FILE), 'wb').close()
+        self._open_index()
+
+    def level_count(self, level):
+        # Seviyedeki dolu düğüm sayısı (sağındakiler boş alt ağaç)
+        return (self.count + (1 << level) - 1) >> level
+
+    def node(self, level, index):
+        if index >= self.level_count(level):
+            return self.zeros[level]
+        return self.layers.read(level, index)
+
+    @property
+    def root(self):
+        return self.node(self.height - 1, 0)
+
+    def __len__(self):
+        return self.count
+
+    def leaf(self, index):
+        return self.node(0, index)
+
+    def _rehash_range(self, lo, hi):
+        # [lo, hi) yapraklarının üstündeki düğümleri seviye seviye, her seviyede tek toplu istekle hesaplıyorum
+        for level in range(self.height - 1):
+            parent_lo, parent_hi = lo >> 1, ((hi - 1) >> 1) + 1
+            stored = self.level_count(level)
+            children = self.layers.read_range(level, parent_lo * 2, min(parent_hi * 2, stored))
+            children.extend([self.zeros[level]] * (2 * (parent_hi - parent_lo) - len(children)))
+            pairs = list(zip(children[0::2], children[1::2]))
+            self.layers.write_range(level + 1, parent_lo, self.hasher.hash_pairs(pairs))
+            lo, hi = parent_lo, parent_hi
+
+    def _rehash_indices(self, indices):
+        # Dağınık yaprak güncellemeleri: her seviyede sadece değişen düğümlerin ebeveynleri
+        dirty = sorted(set(indices))
+        for level in range(self.height - 1):
+            parents = sorted({i >> 1 for i in dirty})
+            pairs = [(self.node(level, 2 * p), self.node(level, 2 * p + 1)) for p in parents]
+            for parent, value in zip(parents, self.hasher.hash_pairs(pairs)):
+                self.layers.write(level + 1, parent, value)
+            dirty = parents
+
+    def append(self, digests):
+        # Yeni kişi hash'lerini yaprak olarak ekliyorum: O(k + log n) hash
+        # Zaten ağaçta olan hash'ler atlanır (aynı kişi iki kez eklenmez); silinmiş (yaprağı 0)
+        # kişi tekrar eklenirse yaprağı eski sırasına geri yazılır
+        start = time.perf_counter()
+        new = []
+        restored = []
+        seen = set()
+        for digest in digests:
+            if isinstance(digest, str):
+                digest = bytes.fromhex(digest)
+            if digest in seen:
+                continue
+            seen.add(digest)
+            index = self.index_of(digest)
+            if index is None:
+                new.append(digest)
+            elif self.leaf(index) == 0:
+                restored.append((index, leaf_value(digest)))
+        if restored:
+            self.update_many(restored)
+        if not new:
+            return len(restored)
+        lo = self._append_leaves(new)
+        with open(os.path.join(self.directory, INDEX_LOG_FILE), 'ab') as log:
+            log.write(b''.join(INDEX_RECORD.pack(digest, lo + i) for i, digest in enumerate(new)))
+        for i, digest in enumerate(new):
+            self._overlay[digest] = lo + i
+        if len(self._overlay) >= INDEX_COMPACT_THRESHOLD:
+            self.compact_index()
+        metrics.observe('merkle_append', time.perf_counter() - start, hasher=self.hasher.name)
+        return len(new) + len(restored)
+
+    def _append_leaves(self, digests):
+        # Yaprakları sona yazıp üstlerini yeniden hash'liyorum; ilk yaprağın sırasını döndürüyorum
+        if self.count + len(digests) > 1 << (self.height - 1):
+            raise ValueError("Merkle ağacı dolu")
+        lo = self.count
+        self.layers.write_range(0, lo, [leaf_value(digest) for digest in digests])
+        self.count += len(digests)
+        self._rehash_range(lo, self.count)
+        return lo
+
+    def update(self, index, value):
+        # Tek yaprak değişimi: sadece yaprağın köke giden yolu yeniden hash'lenir (log n hash)
+        self.update_many([(index, value)])
+
+    def update_many(self, items):
+        start = time.perf_counter()
+        indices = []
+        for index, value in items:
+            if not 0 <= index < self.count:
+                raise IndexError(f"Yaprak {index} ağaçta yok")
+            self.layers.write(0, index, value)
+            indices.append(index)
+        if indices:
+            self._rehash_indices(indices)
+        metrics.observe('merkle_update', time.perf_counter() - start, hasher=self.hasher.name)
+
+    def remove(self, digests):
+        # Silinen kişilerin yaprakları sıfırlanır (sıra korunur, diğer tanıklar geçerli kalır)
+        items = []
+        for digest in digests:
+            index = self.index_of(digest)
+            if index is not None:
+                items.append((index, 0))
+        self.update_many(items)
+        return len(items)
+
+    def build(self, digests, batch_size=100000, run_size=1_000_000):
+        # Ağacı sıfırdan kuruyorum; kişi hash'leri parça parça eklenir
+        self.start_build(run_size)
+        batch = []
+        for digest in digests:
+            batch.append(digest)
+            if len(batch) >= batch_size:
+                self.build_append(batch)
+                batch = []
+        self.build_append(batch)
+        return self.finish_build()
+
+    def start_build(self, run_size=1_000_000):
+        # Akış halinde kurulum (ör. registry_builder yazıcısı): start_build -> build_append ... -> finish_build
+        # Index, BinaryRegistryWriter gibi harici sıralama ile yazılır (bellekte en fazla run_size kayıt)
+        self.layers.clear()
+        self.count = 0
+        if self._index is not None:
+            self._index.close()
+            self._index = None
+        for name in (INDEX_FILE, INDEX_LOG_FILE):
+            open(os.path.join(self.directory, name), 'wb').close()
+        self._open_index()
+        self._build_started = time.perf_counter()
+        self._run_size = run_size
+        self._run_dir = tempfile.mkdtemp(prefix='merkle_index_', dir=self.directory)
+        self._run_paths = []
+        self._run = []
+
+    def build_append(self, digests):
+        if not digests:
+            return
+        digests = [bytes.fromhex(d) if isinstance(d, str) else bytes(d) for d in digests]
+        lo = self._append_leaves(digests)
+        self._run.extend((digest, lo + i) for i, digest in enumerate(digests))
+        if len(self._run) >= self._run_size:
+            self._flush_run()
+
+    def _flush_run(self):
+        self._run.sort()
+        run_path = os.path.join(self._run_dir, f"run_{len(self._run_paths):05d}.bin")
+        with open(run_path, 'wb') as f:
+            f.write(b''.join(INDEX_RECORD.pack(digest, position) for digest, position in self._run))
+        self._run_paths.append(run_path)
+        self._run = []
+
+    def finish_build(self):
+        if self._run:
+            self._flush_run()
+        # Parçaları birleştiriyorum; tekrar eden hash'lerde ilk yaprak geçerli
+        path = os.path.join(self.directory, INDEX_FILE)
+        with open(path, 'wb') as f:
+            previous = None
+            for digest, position in heapq.merge(*(self._read_run(p) for p in self._run_paths)):
+                if digest != previous:
+                    f.write(INDEX_RECORD.pack(digest, position))
+                    previous = digest
+        for run_path in self._run_paths:
+            os.remove(run_path)
+        os.rmdir(self._run_dir)
+        self._run_paths = []
+        self._open_index()
+        self.save()
+        metrics.observe('merkle_build', time.perf_counter() - self._build_started, hasher=self.hasher.name)
+        return self.count
+
+    @staticmethod
+    def _read_run(path):
+        with open(path, 'rb') as f:
+            while True:
+                block = f.read(INDEX_RECORD.size * 4096)
+                if not block:
+                    return
+                for offset in range(0, len(block), INDEX_RECORD.size):
+                    yield INDEX_RECORD.unpack_from(block, offset)
+
+    def save(self):
+        self.layers.flush()
+        self._write_meta()
+
+    def witness(self, index):
+        # MerkleWitness biçimi: her seviyede kardeş düğüm ve düğümün sol çocuk olup olmadığı
+        if not 0 <= index < self.count:
+            raise IndexError(f"Yaprak {index} ağaçta yok")
+        path = []
+        for level in range(self.height - 1):
+            path.append({"isLeft": index % 2 == 0, "sibling": str(self.node(level, index ^ 1))})
+            index >>= 1
+        return path
+
+    def witness_for_digest(self, digest):
+        # Kişi hash'i için (yaprak değeri, tanık); kişi ağaçta yoksa veya silindiyse None
+        index = self.index_of(digest)
+        if index is None:
+            return None
+        leaf = leaf_value(digest)
+        if self.leaf(index) != leaf:
+            return None
+        with metrics.timer('merkle_witness'):
+            return leaf, self.witness(index)
+
+    def witness_for_person(self, tc_id, first_name, last_name, age):
+        return self.witness_for_digest(hash_person_data(tc_id, first_name, last_name, age))
+
+    def calculate_root(self, leaf, witness):
+        # Tanıktan kökü hesaplıyorum (kontrattaki calculateRoot ile aynı)
+        node = leaf
+        for step in witness:
+            sibling = int(step["sibling"])
+            pair = (node, sibling) if step["isLeft"] else (sibling, node)
+            node = self.hasher.hash_pairs([pair])[0]
+        return node
+
+    def close(self):
+        self.layers.close()
+        if self._index is not None:
+            self._index.close()
+            self._index = None
+
+def open_registry_tree(directory=MERKLE_DIR, hasher=None):
+    return RegistryMerkleTree(directory, REGISTRY_TREE_HEIGHT, hasher or get_hasher())
+
+def build_from_registry(registry_path, directory=MERKLE_DIR, hasher=None):
+    # Mevcut kişi kaydından (secure_people_data.json/.bin) ağacı kuruyorum
+    from registry_builder import iter_registry_hashes
+    tree = open_registry_tree(directory, hasher)
+    start = time.perf_counter()
+    count = tree.build(iter_registry_hashes(registry_path))
+    return tree, count, time.perf_counter() - start
+
+def _bench(count, hasher_name, directory, samples=1000):
+    # Sentetik digest'lerle kurulum, tek yaprak güncellemesi ve tanık üretim süreleri
+    import random
+    import shutil
+    shutil.rmtree(directory, ignore_errors=True)
+    rng = random.Random(0)
+    digests = [rng.getrandbits(256).to_bytes(32, 'big') for _ in range(count)]
+    tree = RegistryMerkleTree(directory, REGISTRY_TREE_HEIGHT, get_hasher(hasher_name))
+    try:
+        start = time.perf_counter()
+        tree.build(digests)
+        build_seconds = time.perf_counter() - start
+
+        indices = [rng.randrange(count) for _ in range(samples)]
+        start = time.perf_counter()
+        for index in indices:
+            tree.witness(index)
+        witness_seconds = (time.perf_counter() - start) / samples
+
+        start = time.perf_counter()
+        for index in indices[:100]:
+            tree.update(index, tree.leaf(index))
+        update_seconds = (time.perf_counter() - start) / min(100, samples)
+
+        start = time.perf_counter()
+        tree.append([rng.getrandbits(256).to_bytes(32, 'big')])
+        append_seconds = time.perf_counter() - start
+
+        leaf, witness = tree.witness_for_digest(digests[indices[0]])
+        ok = tree.calculate_root(leaf, witness) == tree.root
+        tree.save()
+    finally:
+        tree.close()
+        tree.hasher.close()
+    return {
+        "count": count,
+        "build_seconds": build_seconds,
+        "witness_seconds": witness_seconds,
+        "update_seconds": update_seconds,
+        "append_seconds": append_seconds,
+        "witness_ok": ok,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Seçmen kaydı Merkle ağacı")
+    parser.add_argument('--dir', default=MERKLE_DIR, help="Katman önbelleği klasörü")
+    parser.add_argument('--hasher', choices=sorted(HASHERS), default=MERKLE_HASHER)
+    sub = parser.add_subparsers(dest='command', required=True)
+    build = sub.add_parser('build', help="Kişi kaydından ağacı oluştur")
+    build.add_argument('--registry', default='secure_people_data.json')
+    sub.add_parser('root', help="Kaydedilmiş ağacın kökünü yazdır")
+    witness = sub.add_parser('witness', help="Kişi için üyelik tanığı üret")
+    witness.add_argument('tc_id')
+    witness.add_argument('first_name')
+    witness.add_argument('last_name')
+    witness.add_argument('age', type=int)
+    bench = sub.add_parser('bench', help="Kurulum / tanık / güncelleme süreleri")
+    bench.add_argument('--count', type=int, default=100000)
+    bench.add_argument('--bench-dir', default='registry_merkle_bench')
+    args = parser.parse_args()
+
+    if args.command == 'bench':
+        result = _bench(args.count, args.hasher, args.bench_dir)
+        print(f"🌳 {result['count']:,} yaprak ({args.hasher})")
+        print(f"   🏗️  Kurulum: {result['build_seconds']:.2f} saniye "
+              f"({result['count'] / result['build_seconds']:,.0f} yaprak/saniye)")
+        print(f"   🧾 Tanık: {result['witness_seconds'] * 1e6:.1f} µs")
+        print(f"   ✏️  Tek yaprak güncellemesi: {result['update_seconds'] * 1000:.2f} ms")
+        print(f"   ➕ Tek yaprak ekleme: {result['append_seconds'] * 1000:.2f} ms")
+        print(f"   ✅ Tanık doğrulama: {'başarılı' if result['witness_ok'] else 'BAŞARISIZ'}")
+        return
+
+    hasher = get_hasher(args.hasher)
+    try:
+        if args.command == 'build':
+            tree, count, seconds = build_from_registry(args.registry, args.dir, hasher)
+            print(f"✅ {count:,} yaprak {seconds:.2f} saniyede eklendi")
+            print(f"🌳 Kök: {tree.root}")
+            tree.close()
+        elif args.command == 'root':
+            tree = open_registry_tree(args.dir, hasher)
+            print(f"🌳 {len(tree):,} yaprak, kök: {tree.root}")
+            tree.close()
+        elif args.command == 'witness':
+            tree = open_registry_tree(args.dir, hasher)
+            result = tree.witness_for_person(args.tc_id, args.first_name, args.last_name, args.age)
+            tree.close()
+            if result is None:
+                print("❌ Kişi kayıt ağacında yok")
+                return
+            leaf, path = result
+            print(json.dumps({"personLeaf": str(leaf), "witness": path}))
+    finally:
+        hasher.close()
+
+if __name__ == "__main__":
+    main()
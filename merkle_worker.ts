@@ -0,0 +1,98 @@
+import * as readline from 'readline';
+import { Field, Poseidon } from 'snarkyjs';
+
+// Merkle ağacı hash worker'ı: Python tarafındaki ağaçlar (merkle_tree.py, nullifier_set.py) düğümleri
+// kontrattaki MerkleWitness / MerkleMapWitness ile aynı Poseidon hash'i ile hesaplasın diye
+// çift hash'lerini toplu hesaplıyorum
+// Protokol vote_worker ile aynı: her satır bir JSON mesajı (istek: {id, op, ...}, yanıt: {id, ok, result | error})
+
+// stdout sadece protokol mesajları için kullanılıyor, loglar stderr'e gidiyor
+const protocolOut = process.stdout;
+console.log = (...args: unknown[]) => console.error(...args);
+
+type Request =
+  | { id: number; op: 'hashPairs'; pairs: [string, string][] }
+  | { id: number; op: 'hashPath'; leaf: string; steps: [string, boolean][] }
+  | { id: number; op: 'hashFields'; inputs: string[][] }
+  | { id: number; op: 'ping' };
+
+let hashed = 0;
+
+function send(message: object) {
+  protocolOut.write(JSON.stringify(message) + '\n');
+}
+
+function hashPairs(pairs: [string, string][]) {
+  // MerkleTree düğümü: Poseidon.hash([sol, sağ])
+  const result = new Array<string>(pairs.length);
+  for (let i = 0; i < pairs.length; i++) {
+    const [left, right] = pairs[i]!;
+    result[i] = Poseidon.hash([Field(left), Field(right)]).toString();
+  }
+  hashed += pairs.length;
+  return result;
+}
+
+function hashPath(leaf: string, steps: [string, boolean][]) {
+  // Yapraktan yukarı ardışık hash'ler (her adım bir öncekine bağlı): tek istekte tüm yol
+  // steps[i] = [kardeş, düğüm sol çocuk mu]; sonuç[i] = i+1. seviyedeki düğüm
+  const result = new Array<string>(steps.length);
+  let node = Field(leaf);
+  for (let i = 0; i < steps.length; i++) {
+    const [sibling, isLeft] = steps[i]!;
+    node = isLeft ? Poseidon.hash([node, Field(sibling)]) : Poseidon.hash([Field(sibling), node]);
+    result[i] = node.toString();
+  }
+  hashed += steps.length;
+  return result;
+}
+
+function hashFields(inputs: string[][]) {
+  // Serbest uzunluklu Poseidon.hash (ör. kayıt yaprağından nullifier türetme)
+  hashed += inputs.length;
+  return inputs.map((fields) => Poseidon.hash(fields.map((f) => Field(f))).toString());
+}
+
+function handle(req: Request) {
+  switch (req.op) {
+    case 'hashPairs':
+      return hashPairs(req.pairs);
+    case 'hashPath':
+      return hashPath(req.leaf, req.steps);
+    case 'hashFields':
+      return hashFields(req.inputs);
+    case 'ping':
+      return { pong: true, hashed };
+    default:
+      throw new Error(`Bilinmeyen işlem: ${(req as { op: string }).op}`);
+  }
+}
+
+function processLine(line: string) {
+  if (!line.trim()) return;
+  let req: Request;
+  try {
+    req = JSON.parse(line);
+  } catch (err) {
+    send({ id: null, ok: false, error: `Geçersiz mesaj: ${line}` });
+    return;
+  }
+  try {
+    send({ id: req.id, ok: true, result: handle(req) });
+  } catch (err) {
+    send({ id: req.id, ok: false, error: err instanceof Error ? err.message : String(err) });
+  }
+}
+
+async function main() {
+  // Hash işlemleri senkron: satırlar geliş sırasıyla işleniyor
+  const rl = readline.createInterface({ input: process.stdin });
+  rl.on('line', processLine);
+  rl.on('close', () => process.exit(0));
+  send({ event: 'ready' });
+}
+
+main().catch((err) => {
+  console.error(err);
+  process.exit(1);
+});
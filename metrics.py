@@ -0,0 +1,348 @@
+import argparse
+import atexit
+import json
+import os
+import threading
+import time
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Aşama bazında süre ve sayaç ölçümü (hash, kayıt araması, oy kaydı yazma, worker başlatma, proof, gönderim)
+# Kapalıyken timer() paylaşılan boş bir context manager döndürür: ölçüm noktalarının maliyeti bir fonksiyon çağrısı
+# Açıkken ölçümler bellekte toplanır ve çıktı(lar)a (sink) yazılır:
+#   prometheus - Prometheus text formatında dosya (node_exporter textfile collector ile okunabilir)
+#   jsonl      - her ölçüm için bir satır (iz/trace dosyası)
+
+# Virgülle ayrılmış sink listesi: '' (kapalı), 'prometheus', 'jsonl' veya 'prometheus,jsonl'
+METRICS = os.getenv('METRICS', '')
+# {pid} yer tutucusu ile her process kendi dosyasına yazar (çok process'li stress testleri için)
+# Prometheus dosyası her flush'ta baştan yazılır: {pid} olmadan process'ler birbirinin ölçümlerini siler
+METRICS_PROM_FILE = os.getenv('METRICS_PROM_FILE', 'metrics.{pid}.prom')
+METRICS_TRACE_FILE = os.getenv('METRICS_TRACE_FILE', 'metrics_trace.jsonl')
+# Sink'lerin diske yazma aralığı (saniye)
+METRICS_FLUSH_INTERVAL = float(os.getenv('METRICS_FLUSH_INTERVAL', '5'))
+METRICS_PREFIX = 'zkp'
+
+# Aşama süresi histogram sınırları (saniye): hash'leme mikro saniye, proof/gönderim saniyeler sürer
+STAGE_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0)
+
+class _NullTimer:
+    # Ölçüm kapalıyken kullanılan boş context manager (tek örnek paylaşılır)
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+_NULL_TIMER = _NullTimer()
+
+class _Timer:
+    __slots__ = ('registry', 'stage', 'labels', 'start')
+
+    def __init__(self, registry, stage, labels):
+        self.registry = registry
+        self.stage = stage
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.registry.observe(self.stage, time.perf_counter() - self.start, exc_type is not None, **self.labels)
+        return False
+
+class StageMetric:
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * len(STAGE_BUCKETS)
+
+    def record(self, seconds, error):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        if error:
+            self.errors += 1
+        for i, bound in enumerate(STAGE_BUCKETS):
+            if seconds <= bound:
+                self.buckets[i] += 1
+                break
+
+    def as_dict(self):
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "sum": self.total,
+            "avg": self.total / self.count if self.count else 0.0,
+            "max": self.max,
+        }
+
+def _label_key(labels):
+    return tuple(sorted(labels.items())) if labels else ()
+
+def _format_labels(pairs):
+    if not pairs:
+        return ''
+    body = ','.join(f'{k}="{v}"' for k, v in pairs)
+    return '{' + body + '}'
+
+class MetricsRegistry:
+    # Process içindeki tüm ölçümler; sink eklenince açılır
+    def __init__(self):
+        self.enabled = False
+        self.sinks = []
+        self._lock = threading.Lock()
+        self._stages = {}
+        self._counters = {}
+        self._events = False
+        self._flusher = None
+        self.started_at = time.time()
+
+    def add_sink(self, sink):
+        self.sinks.append(sink)
+        self._events = any(getattr(s, 'wants_events', False) for s in self.sinks)
+        self.enabled = True
+        self._start_flusher()
+
+    def _start_flusher(self):
+        if self._flusher is not None:
+            return
+        self._flusher = threading.Thread(target=self._flush_loop, name='metrics-flush', daemon=True)
+        self._flusher.start()
+        atexit.register(self.flush)
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(METRICS_FLUSH_INTERVAL)
+            try:
+                self.flush()
+            except OSError:
+                # Ölçüm yazılamadı: uygulamayı etkilemesin, bir sonraki aralıkta tekrar denenir
+                pass
+
+    def _emit(self, event):
+        event['ts'] = time.time()
+        event['pid'] = os.getpid()
+        for sink in self.sinks:
+            if getattr(sink, 'wants_events', False):
+                sink.event(event)
+
+    def observe(self, stage, seconds, error=False, **labels):
+        key = (stage, _label_key(labels))
+        with self._lock:
+            metric = self._stages.get(key)
+            if metric is None:
+                metric = self._stages[key] = StageMetric()
+            metric.record(seconds, error)
+            if self._events:
+                self._emit(dict(labels, stage=stage, seconds=seconds, error=error))
+
+    def increment(self, name, value=1, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+            if self._events:
+                self._emit(dict(labels, counter=name, value=value))
+
+    def snapshot(self):
+        # Aşama ve sayaçların kopyası: {'stages': {'claim': {...}}, 'counters': {'votes{outcome=ok}': 3}}
+        with self._lock:
+            stages = {stage + _format_labels(labels): metric.as_dict()
+                      for (stage, labels), metric in self._stages.items()}
+            counters = {name + _format_labels(labels): value
+                        for (name, labels), value in self._counters.items()}
+        return {"stages": stages, "counters": counters}
+
+    def render_prometheus(self):
+        # Prometheus text exposition formatı
+        p = METRICS_PREFIX
+        lines = [
+            f'# HELP {p}_stage_seconds Aşama süreleri',
+            f'# TYPE {p}_stage_seconds histogram',
+        ]
+        with self._lock:
+            stages = sorted(self._stages.items())
+            counters = sorted(self._counters.items())
+        for (stage, labels), metric in stages:
+            base = (('stage', stage),) + labels
+            cumulative = 0
+            for bound, count in zip(STAGE_BUCKETS, metric.buckets):
+                cumulative += count
+                lines.append(f'{p}_stage_seconds_bucket{_format_labels(base + (("le", repr(bound)),))} {cumulative}')
+            lines.append(f'{p}_stage_seconds_bucket{_format_labels(base + (("le", "+Inf"),))} {metric.count}')
+            lines.append(f'{p}_stage_seconds_sum{_format_labels(base)} {metric.total!r}')
+            lines.append(f'{p}_stage_seconds_count{_format_labels(base)} {metric.count}')
+        if stages:
+            lines.append(f'# TYPE {p}_stage_errors_total counter')
+            for (stage, labels), metric in stages:
+                lines.append(f'{p}_stage_errors_total{_format_labels((("stage", stage),) + labels)} {metric.errors}')
+        seen = set()
+        for (name, labels), value in counters:
+            if name not in seen:
+                seen.add(name)
+                lines.append(f'# TYPE {p}_{name}_total counter')
+            lines.append(f'{p}_{name}_total{_format_labels(labels)} {value}')
+        lines.append(f'# TYPE {p}_process_start_time_seconds gauge')
+        lines.append(f'{p}_process_start_time_seconds {self.started_at!r}')
+        return '\n'.join(lines) + '\n'
+
+    def flush(self):
+        for sink in self.sinks:
+            sink.flush(self)
+
+    def reset(self):
+        with self._lock:
+            self._stages = {}
+            self._counters = {}
+
+class PrometheusFileSink:
+    # Tüm ölçümleri her flush'ta dosyaya atomik olarak (geçici dosya + os.replace) yazıyorum
+    wants_events = False
+
+    def __init__(self, path=METRICS_PROM_FILE):
+        self.path = path.format(pid=os.getpid())
+
+    def flush(self, registry):
+        tmp_path = f"{self.path}.tmp.{os.getpid()}"
+        with open(tmp_path, 'w') as f:
+            f.write(registry.render_prometheus())
+        os.replace(tmp_path, self.path)
+
+class JsonlTraceSink:
+    # Her ölçümü bir JSON satırı olarak biriktirip flush'ta tek write ile dosyaya ekliyorum
+    wants_events = True
+
+    def __init__(self, path=METRICS_TRACE_FILE, max_buffer=10000):
+        self.path = path.format(pid=os.getpid())
+        self.max_buffer = max_buffer
+        self._buffer = []
+        self._buffer_lock = threading.Lock()  # Sadece tampon değişimi için (disk yazması sırasında tutulmaz)
+        self._lock = threading.Lock()  # Flush'ları sıraya koyar
+
+    def event(self, event):
+        line = json.dumps(event, ensure_ascii=False) + '\n'
+        # Flush tamponu değiştirirken eklenen satır eski listeye düşüp kaybolmasın
+        with self._buffer_lock:
+            self._buffer.append(line)
+            size = len(self._buffer)
+        if size >= self.max_buffer and not self._lock.locked():
+            # Ölçüm yolunda diske yazmamak için flush'ı ayrı thread'e bırakıyorum
+            threading.Thread(target=self.flush, daemon=True).start()
+
+    def flush(self, registry=None):
+        with self._lock:
+            with self._buffer_lock:
+                lines, self._buffer = self._buffer, []
+            if not lines:
+                return
+            # O_APPEND + tek write: aynı dosyaya yazan process'lerin satırları karışmaz
+            fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, ''.join(lines).encode())
+            finally:
+                os.close(fd)
+
+SINKS = {
+    'prometheus': PrometheusFileSink,
+    'jsonl': JsonlTraceSink,
+}
+
+registry = MetricsRegistry()
+
+def configure(spec=METRICS):
+    # METRICS değerindeki sink'leri ekliyorum (bilinmeyen isim hata verir)
+    for name in filter(None, (part.strip() for part in spec.split(','))):
+        if name not in SINKS:
+            raise ValueError(f"Bilinmeyen metrics sink'i: {name} (seçenekler: {', '.join(SINKS)})")
+        registry.add_sink(SINKS[name]())
+    return registry
+
+def is_enabled():
+    return registry.enabled
+
+def timer(stage, **labels):
+    # with timer('registry_lookup'): ...  (kapalıyken ölçüm yapılmaz)
+    if not registry.enabled:
+        return _NULL_TIMER
+    return _Timer(registry, stage, labels)
+
+def observe(stage, seconds, error=False, **labels):
+    if registry.enabled:
+        registry.observe(stage, seconds, error, **labels)
+
+def increment(name, value=1, **labels):
+    if registry.enabled:
+        registry.increment(name, value, **labels)
+
+def flush():
+    registry.flush()
+
+def snapshot():
+    return registry.snapshot()
+
+def print_stage_summary(stages):
+    # snapshot()['stages'] veya summarize_trace() çıktısını tablo olarak yazdırıyorum
+    for stage, stats in sorted(stages.items(), key=lambda item: -item[1]['sum']):
+        line = (f"   {stage}: {stats['count']} kez, ortalama {stats['avg']*1000:.2f} ms, "
+                f"max {stats['max']*1000:.2f} ms, toplam {stats['sum']:.2f} s")
+        if 'p99' in stats:
+            line += f", p99 {stats['p99']*1000:.2f} ms"
+        if stats['errors']:
+            line += f", {stats['errors']} hata"
+        print(line)
+
+def summarize_trace(path):
+    # JSONL iz dosyasındaki ölçümleri aşama bazında özetliyorum (tüm process'ler birlikte)
+    from benchmark import LatencyHistogram
+    histograms = {}
+    errors = {}
+    counters = {}
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            event = json.loads(line)
+            if 'counter' in event:
+                labels = {k: v for k, v in event.items() if k not in ('counter', 'value', 'ts', 'pid')}
+                name = event['counter'] + _format_labels(_label_key(labels))
+                counters[name] = counters.get(name, 0) + event['value']
+                continue
+            labels = {k: v for k, v in event.items() if k not in ('stage', 'seconds', 'error', 'ts', 'pid')}
+            stage = event['stage'] + _format_labels(_label_key(labels))
+            histograms.setdefault(stage, LatencyHistogram()).record(event['seconds'])
+            errors[stage] = errors.get(stage, 0) + (1 if event['error'] else 0)
+    stages = {}
+    for stage, histogram in histograms.items():
+        summary = histogram.summary()
+        stages[stage] = {
+            "count": summary['count'],
+            "errors": errors[stage],
+            "sum": histogram.total,
+            "avg": summary['mean'],
+            "max": summary['max'],
+            "p50": summary['p50'],
+            "p99": summary['p99'],
+        }
+    return {"stages": stages, "counters": counters}
+
+configure()
+
+def main():
+    parser = argparse.ArgumentParser(description="Aşama ölçümlerini özetler")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    summary = subparsers.add_parser('summary', help="JSONL iz dosyasını aşama bazında özetle")
+    summary.add_argument('path', nargs='?', default=METRICS_TRACE_FILE)
+    args = parser.parse_args()
+
+    result = summarize_trace(args.path)
+    print(f"⏱️  Aşamalar ({args.path}):")
+    print_stage_summary(result['stages'])
+    if result['counters']:
+        print("🔢 Sayaçlar:")
+        for name, value in sorted(result['counters'].items()):
+            print(f"   {name}: {value}")
+
+if __name__ == "__main__":
+    main()
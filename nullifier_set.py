@@ -0,0 +1,561 @@
+import argparse
+import bisect
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from dotenv import load_dotenv
+
+import metrics
+from hash_utils import hash_person_data
+from merkle_tree import HASHERS, MERKLE_HASHER, NODE_SIZE, get_hasher, leaf_value
+from sqlite_store import SQLITE_BUSY_TIMEOUT_MS, SQLITE_SYNCHRONOUS
+from vote_worker_client import VoteWorkerTimeout, VoteWorkerUnavailable
+
+load_dotenv()
+
+# Harcanmış nullifier'ların seyrek Merkle haritası (snarkyjs MerkleMap ile aynı yapı)
+# Kontrat sadece kökü (nullifierRoot) tutar; oy verirken nullifier'ın haritada boş olduğu
+# kanıtlanır ve aynı tanıkla yaprağa 1 yazılarak yeni kök hesaplanır (voteWithNullifier)
+# Derinlik 256 olduğu için tüm düğümler saklanmıyor: sadece dallanma düğümleri (iki çocuğu da dolu)
+# ve onların çocukları SQLite'ta tutulur. Tek yapraklı zincirlerin ara düğümleri gerektiğinde
+# boş alt ağaç hash'leriyle hesaplanır ve LRU düğüm önbelleğinde tutulur
+
+# Voting.ts içindeki MerkleMap ile aynı: yükseklik 256, 255 kardeş
+NULLIFIER_TREE_HEIGHT = 256
+KEY_BITS = NULLIFIER_TREE_HEIGHT - 1
+NULLIFIER_DB = os.getenv('NULLIFIER_DB', 'nullifiers.sqlite')
+# Bellekte tutulan en fazla düğüm sayısı
+NULLIFIER_CACHE_SIZE = int(os.getenv('NULLIFIER_CACHE_SIZE', '1000000'))
+# Kontrattaki NULLIFIER_SPENT ile aynı (boş yaprak 0)
+NULLIFIER_SPENT = 1
+
+SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS leaves (idx BLOB PRIMARY KEY, value BLOB NOT NULL) WITHOUT ROWID",
+    "CREATE TABLE IF NOT EXISTS nodes (level INTEGER NOT NULL, idx BLOB NOT NULL, hash BLOB NOT NULL, "
+    "PRIMARY KEY (level, idx)) WITHOUT ROWID",
+    "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)",
+)
+
+class NullifierSpent(ValueError):
+    pass
+
+def key_to_index(key):
+    # MerkleMap._keyToIndex: anahtarın 255 bitinin ters sırası yaprak sırası olur
+    if not 0 <= key < 1 << KEY_BITS:
+        raise ValueError(f"Anahtar {KEY_BITS} bite sığmıyor: {key}")
+    return int(format(key, f'0{KEY_BITS}b')[::-1], 2)
+
+def index_to_key(index):
+    return int(format(index, f'0{KEY_BITS}b')[::-1], 2)
+
+def _pack(value):
+    # 32 byte big-endian: SQLite BLOB sıralaması sayı sıralamasıyla aynı
+    return value.to_bytes(NODE_SIZE, 'big')
+
+def _unpack(blob):
+    return int.from_bytes(blob, 'big')
+
+class SparseMerkleMap:
+    # Yaprak sırası i, seviye l'deki düğüm i >> l; kök 255. seviyede
+    def __init__(self, path=NULLIFIER_DB, hasher=None, cache_size=NULLIFIER_CACHE_SIZE):
+        self.path = path
+        self.height = NULLIFIER_TREE_HEIGHT
+        self.hasher = hasher or get_hasher()
+        self.cache_size = cache_size
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self._cache = OrderedDict()
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, timeout=SQLITE_BUSY_TIMEOUT_MS / 1000,
+                                     isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(f"PRAGMA synchronous={SQLITE_SYNCHRONOUS}")
+        for statement in SCHEMA:
+            self._conn.execute(statement)
+
+        hasher_name = self._get_meta('hasher')
+        if hasher_name is not None and hasher_name != self.hasher.name:
+            raise ValueError(f"{path} farklı bir hash ile oluşturulmuş ({hasher_name}); yeniden oluşturun")
+        zeros = self._get_meta('zeros')
+        if zeros is None:
+            self.zeros = self._compute_zeros()
+            with self._transaction() as conn:
+                self._set_meta(conn, 'hasher', self.hasher.name)
+                self._set_meta(conn, 'zeros', json.dumps([str(z) for z in self.zeros]))
+                self._set_meta(conn, 'root', self.zeros[-1])
+                self._set_meta(conn, 'count', 0)
+        else:
+            self.zeros = [int(z) for z in json.loads(zeros)]
+        self.root = int(self._get_meta('root'))
+        self.count = int(self._get_meta('count'))
+
+    def _compute_zeros(self):
+        # Boş alt ağaçların kökleri: zeros[0] = 0, zeros[l+1] = H(zeros[l], zeros[l])
+        zeros = [0]
+        for _ in range(self.height - 1):
+            zeros.append(self.hasher.hash_pairs([(zeros[-1], zeros[-1])])[0])
+        return zeros
+
+    def _get_meta(self, key):
+        row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    @staticmethod
+    def _set_meta(conn, key, value):
+        conn.execute(
+            "INSERT INTO meta (key, value) VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+            (key, str(value)),
+        )
+
+    @contextmanager
+    def _transaction(self):
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield self._conn
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._conn.execute("COMMIT")
+
+    def __len__(self):
+        return self.count
+
+    def _remember(self, key, value):
+        self._cache[key] = value
+        self._cache.move_to_end(key)
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def _cached(self, level, idx):
+        # Saklanan (veya daha önce hesaplanmış) düğüm hash'i; None = saklanmıyor:
+        # düğüm ya boş ya da tek yapraklı bir zincirin ara düğümü
+        key = (level, idx)
+        try:
+            value = self._cache[key]
+        except KeyError:
+            self.cache_misses += 1
+            row = self._conn.execute("SELECT hash FROM nodes WHERE level = ? AND idx = ?",
+                                     (level, _pack(idx))).fetchone()
+            value = _unpack(row[0]) if row else None
+            self._remember(key, value)
+            return value
+        self.cache_hits += 1
+        self._cache.move_to_end(key)
+        return value
+
+    def _leaf_value(self, index):
+        row = self._conn.execute("SELECT value FROM leaves WHERE idx = ?", (_pack(index),)).fetchone()
+        return _unpack(row[0]) if row else None
+
+    def _leaf_bounds(self, level, idx):
+        # Alt ağaçtaki en küçük ve en büyük yaprak sırası (boşsa None)
+        lo, hi = _pack(idx << level), _pack((idx + 1) << level)
+        first = self._conn.execute("SELECT idx FROM leaves WHERE idx >= ? AND idx < ? ORDER BY idx LIMIT 1",
+                                   (lo, hi)).fetchone()
+        if first is None:
+            return None
+        last = self._conn.execute("SELECT idx FROM leaves WHERE idx >= ? AND idx < ? ORDER BY idx DESC LIMIT 1",
+                                  (lo, hi)).fetchone()
+        return _unpack(first[0]), _unpack(last[0])
+
+    def _divergence(self, index):
+        # Yaprağın en yakın komşusuyla birleştiği seviye: altındaki kardeşlerin hepsi boş
+        # En uzun ortak önek sıralamadaki önceki veya sonraki yaprakla paylaşılır
+        packed = _pack(index)
+        pred = self._conn.execute("SELECT idx FROM leaves WHERE idx < ? ORDER BY idx DESC LIMIT 1",
+                                  (packed,)).fetchone()
+        succ = self._conn.execute("SELECT idx FROM leaves WHERE idx > ? ORDER BY idx LIMIT 1",
+                                  (packed,)).fetchone()
+        levels = [(_unpack(row[0]) ^ index).bit_length() for row in (pred, succ) if row is not None]
+        return min(levels) if levels else None
+
+    def _top_node(self, level, idx):
+        # Alt ağaçtaki en üst saklanan düğüm: dolu alt ağacın kökü ondan zincirle hesaplanır
+        stored = self._cached(level, idx)
+        if stored is not None:
+            return level, idx, stored
+        bounds = self._leaf_bounds(level, idx)
+        if bounds is None:
+            return None
+        first, last = bounds
+        if first == last:
+            return 0, first, self._leaf_value(first)
+        branch_level = (first ^ last).bit_length()
+        branch = self._cached(branch_level, first >> branch_level)
+        if branch is None:
+            raise RuntimeError(f"{self.path} tutarsız: ({branch_level}, {first >> branch_level}) "
+                               f"dallanma düğümü eksik")
+        return branch_level, first >> branch_level, branch
+
+    def _chain(self, level, idx, value, target_level):
+        # Tek dolu çocuklu düğümler boyunca yukarı: kardeşler boş alt ağaç hash'leri
+        if level == target_level:
+            return value
+        steps = [(self.zeros[l], ((idx >> (l - level)) & 1) == 0) for l in range(level, target_level)]
+        hashes = self.hasher.hash_path(value, steps)
+        for offset, node in enumerate(hashes, start=1):
+            self._remember((level + offset, idx >> offset), node)
+        return hashes[-1]
+
+    def node(self, level, idx):
+        top = self._top_node(level, idx)
+        if top is None:
+            return self.zeros[level]
+        return self._chain(*top, level)
+
+    def _path_siblings(self, index):
+        # (kardeş hash'i, kardeş dolu mu) listesi, yapraktan köke
+        # Ayrılma seviyesinin altı boş; üstünde yaprağın tarafı dolu olduğundan dolu kardeşler
+        # dallanma düğümünün çocuğu, yani saklanıyor: tek zincir hesabı ayrılma seviyesinde
+        divergence = self._divergence(index)
+        steps = []
+        for level in range(KEY_BITS):
+            sibling = (index >> level) ^ 1
+            if divergence is None or level < divergence - 1:
+                steps.append((self.zeros[level], False))
+            elif level == divergence - 1:
+                steps.append((self.node(level, sibling), True))
+            else:
+                stored = self._cached(level, sibling)
+                steps.append((self.zeros[level], False) if stored is None else (stored, True))
+        return steps
+
+    def get(self, key):
+        with self._lock:
+            return self._leaf_value(key_to_index(key)) or 0
+
+    def witness(self, key):
+        # MerkleMapWitness biçimi: (yapraktaki değer, [{isLeft, sibling}] x 255)
+        # Değer 0 ise tanık anahtarın haritada olmadığını kanıtlar
+        with self._lock, metrics.timer('nullifier_witness'):
+            index = key_to_index(key)
+            value = self._leaf_value(index) or 0
+            steps = self._path_siblings(index)
+        return value, [
+            {"isLeft": ((index >> level) & 1) == 0, "sibling": str(sibling)}
+            for level, (sibling, _) in enumerate(steps)
+        ]
+
+    def calculate_root(self, key, value, witness):
+        # Tanıktan kökü ve anahtarı hesaplıyorum (kontrattaki computeRootAndKey ile aynı)
+        steps = [(int(step["sibling"]), step["isLeft"]) for step in witness]
+        root = self.hasher.hash_path(value, steps)[-1]
+        index = sum(1 << level for level, step in enumerate(witness) if not step["isLeft"])
+        return root, index_to_key(index) == key
+
+    def insert(self, key, value=NULLIFIER_SPENT):
+        return self.insert_many([(key, value)])
+
+    def insert_many(self, items):
+        # Aynı değerle zaten olan anahtarlar atlanır; dönen değer değişen yaprak sayısı
+        with self._lock, metrics.timer('nullifier_insert'):
+            updates = {}
+            for key, value in items:
+                updates[key_to_index(key)] = value
+            previous = {index: self._leaf_value(index) for index in updates}
+            changed = sorted(index for index, value in updates.items() if previous[index] != value)
+            if not changed:
+                return 0
+            if len(changed) == 1:
+                index = changed[0]
+                root, writes = self._insert_one(index, updates[index])
+            else:
+                root, writes = self._insert_batch(changed, updates, previous)
+            added = sum(1 for index in changed if previous[index] is None)
+
+            with self._transaction() as conn:
+                conn.executemany("INSERT OR REPLACE INTO leaves (idx, value) VALUES (?, ?)",
+                                 [(_pack(index), _pack(updates[index])) for index in changed])
+                conn.executemany("INSERT OR REPLACE INTO nodes (level, idx, hash) VALUES (?, ?, ?)",
+                                 [(level, _pack(idx), _pack(h)) for (level, idx), h in writes.items()])
+                self._set_meta(conn, 'root', root)
+                self._set_meta(conn, 'count', self.count + added)
+            for key, h in writes.items():
+                self._remember(key, h)
+            self.root = root
+            self.count += added
+            metrics.increment('nullifier_inserts', len(changed))
+            return len(changed)
+
+    def _insert_one(self, index, value):
+        # Tek yaprak: kardeşler bir kez toplanır, yol tek hash_path isteğinde hesaplanır
+        steps = self._path_siblings(index)
+        hashes = self.hasher.hash_path(value, [
+            (sibling, ((index >> level) & 1) == 0) for level, (sibling, _) in enumerate(steps)
+        ])
+        path = [value] + hashes
+        writes = {}
+        for level, (sibling, nonempty) in enumerate(steps):
+            if nonempty:
+                # Kardeş doluysa üstteki düğüm dallanma düğümü, iki çocuğu da saklanır
+                writes[(level, index >> level)] = path[level]
+                writes[(level, (index >> level) ^ 1)] = sibling
+                writes[(level + 1, index >> (level + 1))] = path[level + 1]
+        for level, node in enumerate(path):
+            self._remember((level, index >> level), node)
+        return path[-1], writes
+
+    def _insert_batch(self, changed, updates, previous):
+        # Toplu ekleme seviye seviye: her seviyedeki tüm değişen düğümler tek hash_pairs isteğinde
+        # Yeni anahtarın eski yapıdan ayrıldığı yerde kardeş alt ağacın en üst saklanan düğümü
+        # "tohum" olarak eklenir; zinciri aynı turlarda yeni anahtarlarla birlikte yukarı taşınır
+        # Değişen düğüm -> (yeni hash, kardeşi saklanıyor olabilecek ilk seviye)
+        # Düğümde eski yaprak yoksa kardeşi ya değişmiştir ya da boştur (dolu olsaydı tohum eklenirdi);
+        # eski yaprak varsa dolu kardeş eski bir dallanma düğümünün çocuğudur ve saklanıyor
+        never = self.height
+        current = {index: (updates[index], 0 if previous[index] is not None else never) for index in changed}
+        seeds = {}
+        for index in changed:
+            divergence = self._divergence(index)
+            if divergence is None:
+                continue
+            level = divergence - 1
+            sibling = (index >> level) ^ 1
+            # Kardeş alt ağaçta yeni anahtar varsa o anahtarın kendi yolu zaten hesaplanıyor
+            pos = bisect.bisect_left(changed, sibling << level)
+            if pos < len(changed) and changed[pos] < (sibling + 1) << level:
+                continue
+            top_level, top_idx, top_hash = self._top_node(level, sibling)
+            # Tohumun zinciri ayrılma seviyesine kadar tek yapraklı: kardeşleri boş
+            seeded = seeds.setdefault(top_level, {})
+            seeded[top_idx] = (top_hash, min(divergence, seeded.get(top_idx, (None, never))[1]))
+
+        writes = {}
+        cache = self._cache
+        zeros = self.zeros
+        for level in range(KEY_BITS):
+            for idx, entry in seeds.get(level, {}).items():
+                if idx in current:
+                    current[idx] = (current[idx][0], min(current[idx][1], entry[1]))
+                else:
+                    current[idx] = entry
+            zero = zeros[level]
+            parents, pairs, lookups = [], [], []
+            for idx, (h, lookup_from) in current.items():
+                sibling = idx ^ 1
+                other = current.get(sibling)
+                if other is not None:
+                    if idx & 1:
+                        continue
+                    parents.append(idx >> 1)
+                    pairs.append((h, other[0]))
+                    lookups.append(min(lookup_from, other[1]))
+                    writes[(level, idx)] = h
+                    writes[(level, sibling)] = other[0]
+                    writes[(level + 1, idx >> 1)] = None
+                    continue
+                stored = self._cached(level, sibling) if lookup_from <= level else None
+                parents.append(idx >> 1)
+                if stored is None:
+                    pairs.append((zero, h) if idx & 1 else (h, zero))
+                    lookups.append(lookup_from)
+                else:
+                    pairs.append((stored, h) if idx & 1 else (h, stored))
+                    lookups.append(level + 1)
+                    writes[(level, idx)] = h
+                    writes[(level, sibling)] = stored
+                    writes[(level + 1, idx >> 1)] = None
+            # Önbellekteki eski değerleri güncelliyorum (tüm yolu önbelleğe almak toplu eklemede çok büyük)
+            for idx, (h, _) in current.items():
+                if (level, idx) in cache:
+                    cache[(level, idx)] = h
+            hashes = self.hasher.hash_pairs(pairs)
+            current = {}
+            for parent, h, lookup_from in zip(parents, hashes, lookups):
+                current[parent] = (h, lookup_from)
+                if (level + 1, parent) in writes:
+                    writes[(level + 1, parent)] = h
+        root = current[0][0]
+        self._remember((KEY_BITS, 0), root)
+        return root, writes
+
+    def stats(self):
+        lookups = self.cache_hits + self.cache_misses
+        return {
+            "count": self.count,
+            "root": str(self.root),
+            "stored_nodes": self._conn.execute("SELECT COUNT(*) FROM nodes").fetchone()[0],
+            "cached_nodes": len(self._cache),
+            "cache_hit_ratio": self.cache_hits / lookups if lookups else 0.0,
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+class NullifierSet(SparseMerkleMap):
+    # Nullifier = Poseidon(kişinin kayıt yaprağı): kontrattaki nullifierFor ile aynı
+    def nullifier_for(self, person_leaf):
+        return self.hasher.hash_fields([[person_leaf]])[0]
+
+    def nullifier_for_person(self, tc_id, first_name, last_name, age):
+        return self.nullifier_for(leaf_value(hash_person_data(tc_id, first_name, last_name, age)))
+
+    def is_spent(self, nullifier):
+        return self.get(nullifier) != 0
+
+    def non_membership_witness(self, nullifier):
+        value, witness = self.witness(nullifier)
+        if value != 0:
+            raise NullifierSpent("Bu TC kimlik numarası daha önce oy vermiş")
+        return witness
+
+    def spend(self, nullifier):
+        return self.insert(nullifier, NULLIFIER_SPENT)
+
+    def spend_many(self, nullifiers):
+        return self.insert_many((nullifier, NULLIFIER_SPENT) for nullifier in nullifiers)
+
+def open_nullifier_set(path=NULLIFIER_DB, hasher=None):
+    return NullifierSet(path, hasher or get_hasher())
+
+class NullifierVoter:
+    # Oyları kontrata kayıt tanığı + nullifier tanığıyla gönderiyorum (voteWithNullifier, voteWithProof)
+    # Tanık güncel köke bağlı: tanık üretimi, gönderim ve ekleme tek kilit altında sırayla yapılır
+    # (oy worker'ı da işlemleri sırayla uyguladığı için verim değişmez)
+    def __init__(self, worker, registry_tree, nullifiers):
+        self.worker = worker
+        self.registry_tree = registry_tree
+        self.nullifiers = nullifiers
+        self._lock = threading.Lock()
+        self._synced = False
+
+    def sync_root(self, timeout=60):
+        # Worker yeni başladıysa kontrattaki kök boş haritanın kökü: diskteki haritayla eşitliyorum
+        state = self.worker.state(timeout=timeout)
+        root = str(self.nullifiers.root)
+        if state.get('nullifierRoot') != root:
+            self.worker.set_nullifier_root(root, timeout=timeout)
+        self._synced = True
+        return root
+
+    def ballot_for(self, tc_id, first_name, last_name, age, choice):
+        # Pipeline'ın witness aşaması için: (seçim, kayıt yaprağı, kayıt tanığı, yaş kanıtı)
+        found = self.registry_tree.witness_for_person(tc_id, first_name, last_name, age)
+        if found is None:
+            raise ValueError("Geçersiz kişi verileri")
+        person_leaf, registry_witness = found
+        return (choice, person_leaf, registry_witness, 1 if age >= 18 else 0)
+
+    def vote(self, tc_id, first_name, last_name, age, choice, timeout=60):
+        return self.vote_ballot(*self.ballot_for(tc_id, first_name, last_name, age, choice), timeout=timeout)
+
+    def vote_ballot(self, choice, person_leaf, registry_witness, age_proof, timeout=60):
+        nullifier = self.nullifiers.nullifier_for(person_leaf)
+        return self._send(nullifier, lambda witness: self.worker.vote_with_nullifier(
+            choice, person_leaf, registry_witness, witness, age_proof, timeout=timeout), timeout)
+
+    def vote_with_proof(self, proof, nullifier, timeout=60):
+        # Prover havuzunda üretilen proof: nullifier proof'un açık girdisinden gelir
+        nullifier = int(nullifier)
+        return self._send(nullifier, lambda witness: self.worker.vote_with_proof(
+            proof, witness, timeout=timeout), timeout)
+
+    def _send(self, nullifier, send, timeout):
+        with self._lock:
+            if not self._synced:
+                self.sync_root(timeout=timeout)
+            witness = self.nullifiers.non_membership_witness(nullifier)
+            try:
+                result = send(witness)
+            except VoteWorkerTimeout:
+                # Worker istekleri sırayla işlediği için state yanıtı oydan sonra gelir:
+                # kök değiştiyse oy işlenmiştir, yerel haritayı da güncelliyorum
+                state = self.worker.state(timeout=timeout)
+                if state.get('nullifierRoot') != str(self.nullifiers.root):
+                    self.nullifiers.spend(nullifier)
+                raise
+            except VoteWorkerUnavailable:
+                # Worker yeniden başlarsa kontrat yeniden deploy edilir: kök tekrar yazılmalı
+                self._synced = False
+                raise
+            self.nullifiers.spend(nullifier)
+        return result
+
+def _bench(count, hasher_name, path, samples=200):
+    # Seçimin sonlarına doğru (count harcanmış nullifier) tanık ve ekleme süreleri
+    import random
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    rng = random.Random(0)
+    nullifiers = NullifierSet(path, get_hasher(hasher_name))
+    try:
+        keys = [rng.getrandbits(248) for _ in range(count)]
+        start = time.perf_counter()
+        for i in range(0, count, 10000):
+            nullifiers.spend_many(keys[i:i + 10000])
+        bulk_seconds = time.perf_counter() - start
+
+        fresh = [rng.getrandbits(248) for _ in range(samples)]
+        start = time.perf_counter()
+        witnesses = [nullifiers.non_membership_witness(key) for key in fresh]
+        witness_seconds = (time.perf_counter() - start) / samples
+
+        root, key_ok = nullifiers.calculate_root(fresh[0], 0, witnesses[0])
+        ok = key_ok and root == nullifiers.root
+        start = time.perf_counter()
+        for key in fresh:
+            nullifiers.spend(key)
+        insert_seconds = (time.perf_counter() - start) / samples
+        ok = ok and nullifiers.calculate_root(fresh[-1], NULLIFIER_SPENT, nullifiers.witness(fresh[-1])[1])[0] \
+            == nullifiers.root
+        stats = nullifiers.stats()
+    finally:
+        nullifiers.close()
+        nullifiers.hasher.close()
+    return {
+        **stats,
+        "count": count,
+        "bulk_seconds": bulk_seconds,
+        "witness_seconds": witness_seconds,
+        "insert_seconds": insert_seconds,
+        "witness_ok": ok,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Harcanmış nullifier'ların seyrek Merkle haritası")
+    parser.add_argument('--db', default=NULLIFIER_DB, help="Harita veritabanı")
+    parser.add_argument('--hasher', choices=sorted(HASHERS), default=MERKLE_HASHER)
+    sub = parser.add_subparsers(dest='command', required=True)
+    sub.add_parser('root', help="Haritanın kökünü yazdır")
+    check = sub.add_parser('witness', help="Kişinin nullifier'ı ve boş yaprak tanığı")
+    check.add_argument('tc_id')
+    check.add_argument('first_name')
+    check.add_argument('last_name')
+    check.add_argument('age', type=int)
+    bench = sub.add_parser('bench', help="Toplu ekleme / tanık / tek ekleme süreleri")
+    bench.add_argument('--count', type=int, default=10000)
+    bench.add_argument('--bench-db', default='nullifiers_bench.sqlite')
+    args = parser.parse_args()
+
+    if args.command == 'bench':
+        result = _bench(args.count, args.hasher, args.bench_db)
+        print(f"🧾 {result['count']:,} harcanmış nullifier ({args.hasher})")
+        print(f"   📦 Toplu ekleme: {result['bulk_seconds']:.2f} saniye "
+              f"({result['count'] / result['bulk_seconds']:,.0f} nullifier/saniye)")
+        print(f"   🔍 Boş yaprak tanığı: {result['witness_seconds'] * 1000:.2f} ms")
+        print(f"   ✏️  Tek ekleme: {result['insert_seconds'] * 1000:.2f} ms")
+        print(f"   💾 Saklanan düğüm: {result['stored_nodes']:,}, önbellek isabeti: {result['cache_hit_ratio']:.1%}")
+        print(f"   ✅ Tanık doğrulama: {'başarılı' if result['witness_ok'] else 'BAŞARISIZ'}")
+        return
+
+    nullifiers = open_nullifier_set(args.db, get_hasher(args.hasher))
+    try:
+        if args.command == 'root':
+            print(f"🧾 {len(nullifiers):,} harcanmış nullifier, kök: {nullifiers.root}")
+        elif args.command == 'witness':
+            nullifier = nullifiers.nullifier_for_person(args.tc_id, args.first_name, args.last_name, args.age)
+            value, witness = nullifiers.witness(nullifier)
+            print(json.dumps({"nullifier": str(nullifier), "spent": value != 0, "witness": witness}))
+    finally:
+        nullifiers.close()
+        nullifiers.hasher.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,332 @@
+import argparse
+import bisect
+import itertools
+import json
+import math
+import random
+import threading
+import time
+from array import array
+
+from registry_builder import build_registry_from_records, iter_people_records
+
+# Sentetik nüfus üreticisi ve stress testleri için önceden yüklenmiş örnekleyici
+# Kişiler (seed, sıra) ikilisinden deterministik üretilir: milyonlarca kayıt dosyaya yazılmadan
+# doğrudan hash'lenmiş kayıt formatlarına akıtılabilir, örnekleyici aynı kişileri bellekte yeniden kurar
+
+FIRST_NAMES = (
+    'Ahmet', 'Mehmet', 'Mustafa', 'Ali', 'Hüseyin', 'Hasan', 'İbrahim', 'Murat', 'Emre', 'Burak',
+    'Can', 'Cem', 'Deniz', 'Eren', 'Kerem', 'Oğuz', 'Serkan', 'Tolga', 'Yusuf', 'Ömer',
+    'Ayşe', 'Fatma', 'Emine', 'Hatice', 'Zeynep', 'Elif', 'Merve', 'Büşra', 'Esra', 'Selin',
+    'Derya', 'Gizem', 'İrem', 'Aslı', 'Ceren', 'Damla', 'Ebru', 'Gül', 'Özge', 'Şule',
+)
+LAST_NAMES = (
+    'Yılmaz', 'Kaya', 'Demir', 'Şahin', 'Çelik', 'Yıldız', 'Yıldırım', 'Öztürk', 'Aydın', 'Özdemir',
+    'Arslan', 'Doğan', 'Kılıç', 'Aslan', 'Çetin', 'Kara', 'Koç', 'Kurt', 'Özkan', 'Şimşek',
+    'Polat', 'Korkmaz', 'Erdoğan', 'Güneş', 'Aksoy', 'Avcı', 'Bulut', 'Tekin', 'Ünal', 'Güler',
+)
+
+# İlk 9 hane (ilki sıfır değil) uzayı; sıra -> taban eşlemesi bu uzayda bir permütasyon
+TC_BASE_START = 100_000_000
+TC_BASE_SPACE = 900_000_000
+# 2, 3 ve 5'e bölünmeyen çarpan: (i * çarpan + ofset) mod uzay birebir eşlemedir, TC'ler tekrar etmez
+TC_BASE_MULTIPLIER = 1_000_003
+
+DEFAULT_UNDERAGE_RATIO = 0.2
+# Zipf dağılımı için tutulan en fazla sıra sayısı (CDF bellekte array('d') olarak tutulur)
+ZIPF_MAX_RANKS = 1_000_000
+
+_MASK64 = (1 << 64) - 1
+
+def _mix64(x):
+    # splitmix64: (seed, sıra) -> bağımsız görünen 64 bit
+    x = (x + 0x9E3779B97F4A7C15) & _MASK64
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & _MASK64
+    return x ^ (x >> 31)
+
+def tc_check_digits(base):
+    # 9 haneli tabana TC kimlik algoritmasının 10. ve 11. hanelerini ekliyorum
+    digits = [int(c) for c in str(base)]
+    d10 = ((sum(digits[0::2]) * 7) - sum(digits[1::2])) % 10
+    d11 = (sum(digits) + d10) % 10
+    return base * 100 + d10 * 10 + d11
+
+def is_valid_tc(tc_id):
+    tc_id = str(tc_id)
+    if len(tc_id) != 11 or not tc_id.isdigit() or tc_id[0] == '0':
+        return False
+    return tc_check_digits(int(tc_id[:9])) == int(tc_id)
+
+def person_fields(index, seed=0, underage_ratio=DEFAULT_UNDERAGE_RATIO):
+    # index. kişinin (tc, isim sırası, soyisim sırası, yaş) alanları
+    if index >= TC_BASE_SPACE:
+        raise ValueError(f"Nüfus en fazla {TC_BASE_SPACE:,} kişi olabilir")
+    seed_mix = _mix64(seed)
+    base = (index * TC_BASE_MULTIPLIER + seed_mix) % TC_BASE_SPACE + TC_BASE_START
+    h = _mix64(seed_mix ^ index)
+    if ((h >> 32) & 0xFFFF) < underage_ratio * 0x10000:
+        age = 1 + (h >> 48) % 17
+    else:
+        age = 18 + (h >> 48) % 73
+    return tc_check_digits(base), h % len(FIRST_NAMES), (h >> 16) % len(LAST_NAMES), age
+
+def iter_population(count, seed=0, underage_ratio=DEFAULT_UNDERAGE_RATIO, start=0):
+    # Kişi kayıtlarını tek tek üretiyorum (bellekte tutulmaz)
+    for index in range(start, start + count):
+        tc, first, last, age = person_fields(index, seed, underage_ratio)
+        yield {'tc_id': f'{tc:011d}', 'first_name': FIRST_NAMES[first],
+               'last_name': LAST_NAMES[last], 'age': age}
+
+def _tee_jsonl(records, path):
+    # Kayıtları hash'lemeye akıtırken aynı anda .jsonl nüfus dosyasına da yazıyorum
+    with open(path, 'w', encoding='utf-8') as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False) + '\n')
+            yield record
+
+def generate_population(count, seed=0, underage_ratio=DEFAULT_UNDERAGE_RATIO, output_format='json',
+                        people_out=None, workers=None, chunk_size=10000):
+    # Sentetik nüfusu registry_builder'ın paralel hash'leme ve yazıcılarına akıtıyorum
+    records = iter_population(count, seed, underage_ratio)
+    if people_out:
+        records = _tee_jsonl(records, people_out)
+    return build_registry_from_records(records, workers, chunk_size, output_format)
+
+class PopulationSampler:
+    # Stress testleri için önceden yüklenmiş, dizi tabanlı kişi örnekleyici
+    # Kişiler array'lerde tutulur; sample() dosya okumaz, JSON parse etmez
+    # Dağılımlar:
+    #   repeat_ratio   - daha önce seçilmiş (oy vermiş) kişiyi tekrar seçme oranı
+    #   invalid_ratio  - kayıtta olmayan (bozulmuş) kimlik oranı
+    #   underage_ratio - reşit olmayan kişi oranı (None: nüfustaki doğal oran)
+    #   zipf_s         - 0'dan büyükse kişiler Zipf(s) ile seçilir (az sayıda "sıcak" kişi)
+    def __init__(self, tc_ids, first_idx, last_idx, ages, first_names=FIRST_NAMES, last_names=LAST_NAMES,
+                 repeat_ratio=0.0, invalid_ratio=0.0, underage_ratio=None, zipf_s=0.0, seed=None):
+        if not tc_ids:
+            raise ValueError("Örnekleyici için nüfus boş olamaz")
+        self.tc_ids = tc_ids
+        self.first_idx = first_idx
+        self.last_idx = last_idx
+        self.ages = ages
+        self.first_names = first_names
+        self.last_names = last_names
+        self.repeat_ratio = repeat_ratio
+        self.invalid_ratio = invalid_ratio
+        self.underage_ratio = underage_ratio
+        self.zipf_s = zipf_s
+        self.rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+        # Örnekleme havuzları: doğal oranda tek havuz, aksi halde reşit/reşit olmayan ayrı
+        if underage_ratio is None:
+            self._pools = {'all': array('I', range(len(tc_ids)))}
+        else:
+            self._pools = {'adult': array('I'), 'minor': array('I')}
+            for index, age in enumerate(ages):
+                self._pools['adult' if age >= 18 else 'minor'].append(index)
+        # Her havuz için rastgele başlangıç + aralarında asal adım: tekrarsız dolaşma
+        self._orders = {name: self._random_order(len(pool)) for name, pool in self._pools.items() if pool}
+        self._zipf_cdf = self._build_zipf_cdf(zipf_s, max(len(p) for p in self._pools.values())) if zipf_s > 0 else None
+
+        self._issued = bytearray(len(tc_ids))
+        self._issued_list = array('I')
+        self.counts = dict.fromkeys(('fresh', 'repeat', 'invalid', 'underage'), 0)
+
+    @classmethod
+    def from_records(cls, records, **options):
+        # Kayıtları (dosya veya üretici) sıkıştırılmış dizilere alıyorum; isimler tablo index'i olarak tutulur
+        tc_ids, first_idx, last_idx, ages = array('Q'), array('I'), array('I'), array('B')
+        first_names, last_names = {}, {}
+        for record in records:
+            tc_ids.append(int(record['tc_id']))
+            first_idx.append(first_names.setdefault(record['first_name'], len(first_names)))
+            last_idx.append(last_names.setdefault(record['last_name'], len(last_names)))
+            ages.append(min(int(record['age']), 255))
+        return cls(tc_ids, first_idx, last_idx, ages, tuple(first_names), tuple(last_names), **options)
+
+    @classmethod
+    def from_file(cls, path='people_data.json', **options):
+        return cls.from_records(iter_people_records(path), **options)
+
+    @classmethod
+    def generated(cls, count, population_seed=0, population_underage_ratio=DEFAULT_UNDERAGE_RATIO, **options):
+        # generate_population ile aynı parametrelerle üretilmiş kayıtlardaki kişileri dosyasız kuruyorum
+        tc_ids, first_idx, last_idx, ages = array('Q'), array('I'), array('I'), array('B')
+        for index in range(count):
+            tc, first, last, age = person_fields(index, population_seed, population_underage_ratio)
+            tc_ids.append(tc)
+            first_idx.append(first)
+            last_idx.append(last)
+            ages.append(age)
+        return cls(tc_ids, first_idx, last_idx, ages, **options)
+
+    def _random_order(self, size):
+        step = self.rng.randrange(1, size) if size > 1 else 1
+        while math.gcd(step, size) != 1:
+            step += 1
+        return [self.rng.randrange(size), step, 0]
+
+    @staticmethod
+    def _build_zipf_cdf(s, size):
+        ranks = min(size, ZIPF_MAX_RANKS)
+        cdf = array('d', itertools.accumulate(1.0 / (rank ** s) for rank in range(1, ranks + 1)))
+        total = cdf[-1]
+        for i in range(ranks):
+            cdf[i] /= total
+        return cdf
+
+    def __len__(self):
+        return len(self.tc_ids)
+
+    def person(self, index):
+        return {
+            'tc_id': f'{self.tc_ids[index]:011d}',
+            'first_name': self.first_names[self.first_idx[index]],
+            'last_name': self.last_names[self.last_idx[index]],
+            'age': self.ages[index],
+        }
+
+    def _pick_pool(self):
+        if self.underage_ratio is None:
+            return 'all'
+        wants_minor = self.rng.random() < self.underage_ratio
+        name = 'minor' if wants_minor else 'adult'
+        # İstenen havuz boşsa diğerinden seçiyorum
+        return name if name in self._orders else ('adult' if wants_minor else 'minor')
+
+    def _draw(self):
+        # Havuzdan bir kişi index'i: Zipf açıksa sıcak noktalardan, değilse tekrarsız sırayla
+        name = self._pick_pool()
+        pool = self._pools[name]
+        start, step, cursor = self._orders[name]
+        if self._zipf_cdf is not None:
+            rank = bisect.bisect_left(self._zipf_cdf, self.rng.random())
+            # Sıra -> kişi eşlemesi sabit permütasyon: sıcak kişiler nüfusa dağılır
+            position = (start + min(rank, len(self._zipf_cdf) - 1) * step) % len(pool)
+        else:
+            position = (start + cursor * step) % len(pool)
+            self._orders[name][2] = cursor + 1
+        return pool[position]
+
+    def _corrupt(self, person):
+        # Kayıtta olmayan kimlik: TC kontrol hanesi, isim veya yaş bozuluyor
+        mode = self.rng.randrange(3)
+        if mode == 0:
+            tc = person['tc_id']
+            person['tc_id'] = tc[:-1] + str((int(tc[-1]) + 1 + self.rng.randrange(9)) % 10)
+        elif mode == 1:
+            person['last_name'] = person['last_name'] + 'x'
+        else:
+            person['age'] = person['age'] + 1 + self.rng.randrange(5)
+        return person
+
+    def sample(self):
+        # Bir sonraki test kişisi; 'kind' beklenen sonucu söyler:
+        # fresh (ilk kez), repeat (daha önce seçildi), invalid (kayıtta yok), underage (18 yaş altı)
+        with self._lock:
+            roll = self.rng.random()
+            if roll < self.invalid_ratio:
+                person = self._corrupt(self.person(self._draw()))
+                kind = 'invalid'
+            else:
+                if roll < self.invalid_ratio + self.repeat_ratio and self._issued_list:
+                    index = self._issued_list[self.rng.randrange(len(self._issued_list))]
+                else:
+                    index = self._draw()
+                person = self.person(index)
+                if self._issued[index]:
+                    kind = 'repeat'
+                else:
+                    self._issued[index] = 1
+                    self._issued_list.append(index)
+                    kind = 'fresh' if person['age'] >= 18 else 'underage'
+            self.counts[kind] += 1
+        person['kind'] = kind
+        return person
+
+    def reset(self):
+        # Oy kayıtları sıfırlandığında seçilmiş kişi bilgisini de sıfırlıyorum
+        with self._lock:
+            self._issued = bytearray(len(self.tc_ids))
+            self._issued_list = array('I')
+            self.counts = dict.fromkeys(self.counts, 0)
+
+    def stats(self):
+        return {"population": len(self.tc_ids), "issued": len(self._issued_list), "samples": dict(self.counts)}
+
+def load_sampler(people='people_data.json', population=None, population_seed=0,
+                 population_underage_ratio=DEFAULT_UNDERAGE_RATIO, **options):
+    # Stress testleri için: population verilirse sentetik nüfus, yoksa nüfus dosyası
+    # Seçenekler pickle edilebilir sözlük olarak process'lere de gönderilebilir
+    if population:
+        return PopulationSampler.generated(population, population_seed, population_underage_ratio, **options)
+    return PopulationSampler.from_file(people, **options)
+
+def add_sampler_arguments(parser):
+    # Stress test ve yük üreticisi CLI'larında ortak örnekleyici seçenekleri
+    group = parser.add_argument_group("Test kişileri")
+    group.add_argument('--people', default='people_data.json', help="Nüfus dosyası (JSON dizisi veya .jsonl)")
+    group.add_argument('--population', type=int, default=None,
+                       help="Dosya yerine population.py generate ile üretilmiş N kişilik sentetik nüfus")
+    group.add_argument('--population-seed', type=int, default=0, help="Sentetik nüfusun seed'i")
+    group.add_argument('--population-underage-ratio', type=float, default=DEFAULT_UNDERAGE_RATIO,
+                       help="Sentetik nüfus üretilirken kullanılan 18 yaş altı oranı")
+    group.add_argument('--repeat-ratio', type=float, default=0.0, help="Tekrar oy deneyen seçmen oranı")
+    group.add_argument('--invalid-ratio', type=float, default=0.0, help="Kayıtta olmayan kimlik oranı")
+    group.add_argument('--underage-ratio', type=float, default=None,
+                       help="18 yaş altı kişi oranı (varsayılan: nüfustaki oran)")
+    group.add_argument('--zipf', type=float, default=0.0, help="Zipf üssü (0: kapalı, ör. 1.1 sıcak noktalar)")
+    group.add_argument('--sample-seed', type=int, default=None, help="Örnekleme seed'i")
+
+def sampler_options(args):
+    return {
+        "people": args.people,
+        "population": args.population,
+        "population_seed": args.population_seed,
+        "population_underage_ratio": args.population_underage_ratio,
+        "repeat_ratio": args.repeat_ratio,
+        "invalid_ratio": args.invalid_ratio,
+        "underage_ratio": args.underage_ratio,
+        "zipf_s": args.zipf,
+        "seed": args.sample_seed,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Sentetik nüfus üreticisi")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    generate = subparsers.add_parser('generate', help="Nüfusu üretip hash'lenmiş kayıtlara yaz")
+    generate.add_argument('--count', type=int, required=True, help="Kişi sayısı")
+    generate.add_argument('--seed', type=int, default=0)
+    generate.add_argument('--underage-ratio', type=float, default=DEFAULT_UNDERAGE_RATIO, help="18 yaş altı oranı")
+    generate.add_argument('--format', choices=['json', 'bin', 'both'], default='bin', help="Kayıt formatı")
+    generate.add_argument('--people-out', help="Açık kişi verilerinin de yazılacağı .jsonl dosyası")
+    generate.add_argument('--workers', type=int, default=None, help="Hash process sayısı")
+    generate.add_argument('--chunk-size', type=int, default=10000)
+    sample = subparsers.add_parser('sample', help="Örnekleyici hızını ölç")
+    add_sampler_arguments(sample)
+    sample.add_argument('--samples', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    if args.command == 'generate':
+        print(f"🔄 {args.count:,} kişilik sentetik nüfus üretiliyor (seed={args.seed})")
+        stats = generate_population(args.count, args.seed, args.underage_ratio, args.format,
+                                    args.people_out, args.workers, args.chunk_size)
+        print(f"✅ {stats['records']:,} kayıt {stats['duration']:.2f} saniyede hash'lendi")
+        print(f"🚀 Throughput: {stats['throughput']:,.0f} kayıt/saniye ({stats['workers']} process)")
+        print(f"💡 Stress test: --population {args.count} --population-seed {args.seed}")
+        return
+
+    start = time.perf_counter()
+    sampler = load_sampler(**sampler_options(args))
+    loaded = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in range(args.samples):
+        sampler.sample()
+    duration = time.perf_counter() - start
+    print(f"📋 {len(sampler):,} kişi {loaded:.2f} saniyede yüklendi")
+    print(f"🚀 {args.samples:,} örnek {duration:.2f} saniyede ({args.samples / duration:,.0f} örnek/saniye)")
+    print(f"📊 {sampler.stats()['samples']}")
+
+if __name__ == "__main__":
+    main()
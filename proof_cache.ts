@@ -0,0 +1,176 @@
+import 'reflect-metadata';
+import * as crypto from 'crypto';
+import * as fs from 'fs';
+import * as path from 'path';
+import { Voting, BallotProgram } from './Voting';
+import { ConcurrentVoting } from './ConcurrentVoting';
+
+// Proof'lu modda devreleri (Voting kontratı, BallotProgram) derleyip doğrulama anahtarını devrenin
+// özetine göre ayrı klasörde saklıyorum (<kök>/<isim>/<özet>/manifest.json): devre değişince özet değişir
+// ve eski anahtar kullanılmaz. Deploy betikleri ve doğrulayıcılar anahtarı derlemeden okuyabilir
+// snarkyjs 0.12'de prover anahtarlarını diske yazan bir Cache API'si yok: prover gereken her process
+// devreyi yine derler, bu modül derleme süresini kısaltmaz
+
+export const PROOF_CACHE_DIR = process.env.PROOF_CACHE_DIR ?? '.proof_cache';
+const MANIFEST_FILE = 'manifest.json';
+
+export type VerificationKeyData = { data: string; hash: string };
+
+export type CompileInfo = {
+  name: string;
+  digest: string;
+  cacheDir: string;
+  // Bu özet için saklanan doğrulama anahtarı derlenenle aynıydı (manifest yeniden yazılmadı)
+  cacheHit: boolean;
+  seconds: number;
+  verificationKey: VerificationKeyData;
+};
+
+type Manifest = {
+  digest: string;
+  library: string;
+  verificationKeyHash: string;
+  verificationKey: VerificationKeyData;
+  createdAt: string;
+};
+
+function libraryVersion() {
+  try {
+    return require('snarkyjs/package.json').version as string;
+  } catch {
+    return 'unknown';
+  }
+}
+
+function readManifest(dir: string): Manifest | undefined {
+  try {
+    return JSON.parse(fs.readFileSync(path.join(dir, MANIFEST_FILE), 'utf8'));
+  } catch {
+    return undefined;
+  }
+}
+
+function writeManifest(dir: string, manifest: Manifest) {
+  // Geçici dosya + rename: aynı anda başlayan worker'lar yarım manifest okumaz
+  const target = path.join(dir, MANIFEST_FILE);
+  const tmp = `${target}.tmp.${process.pid}`;
+  fs.writeFileSync(tmp, JSON.stringify(manifest, null, 2));
+  fs.renameSync(tmp, target);
+}
+
+type Compilable = {
+  compile(options?: unknown): Promise<{ verificationKey: { data: string; hash: { toString(): string } } }>;
+  digest?: () => unknown;
+  analyzeMethods?: () => unknown;
+};
+
+export async function circuitDigest(program: Compilable = Voting) {
+  // Devre özeti: metotların kısıt sistemlerinden hesaplanır (derlemeden çok daha hızlı)
+  // digest() olmayan programlarda (eski ZkProgram) metot analizinin hash'i kullanılıyor
+  if (typeof program.digest === 'function') {
+    return String(await program.digest());
+  }
+  const analysis = JSON.stringify(await program.analyzeMethods?.(), (_, value) =>
+    typeof value === 'bigint' ? value.toString() : value
+  );
+  return crypto.createHash('sha256').update(analysis ?? '').digest('hex').slice(0, 32);
+}
+
+export async function compileCached(
+  name: string,
+  program: Compilable,
+  cacheRoot: string = PROOF_CACHE_DIR
+): Promise<CompileInfo> {
+  const start = performance.now();
+  const digest = await circuitDigest(program);
+  const library = libraryVersion();
+  const dir = path.join(cacheRoot, name, digest);
+  fs.mkdirSync(dir, { recursive: true });
+
+  const previous = readManifest(dir);
+  // Kütüphane sürümü değiştiyse anahtar formatı değişmiş olabilir: önbelleği yok sayıyorum
+  const usable = previous !== undefined && previous.library === library;
+
+  const compiled = await program.compile();
+  const verificationKey = {
+    data: compiled.verificationKey.data,
+    hash: compiled.verificationKey.hash.toString(),
+  };
+
+  if (usable && previous.verificationKeyHash !== verificationKey.hash) {
+    console.error(`⚠️ Önbellekteki doğrulama anahtarı eşleşmiyor (${digest}), yeniden yazılıyor`);
+  }
+  const cacheHit = usable && previous.verificationKeyHash === verificationKey.hash;
+  if (!cacheHit) {
+    writeManifest(dir, {
+      digest,
+      library,
+      verificationKeyHash: verificationKey.hash,
+      verificationKey,
+      createdAt: new Date().toISOString(),
+    });
+  }
+
+  return {
+    name,
+    digest,
+    cacheDir: dir,
+    cacheHit,
+    seconds: (performance.now() - start) / 1000,
+    verificationKey,
+  };
+}
+
+export async function compileBallotProgram(cacheRoot: string = PROOF_CACHE_DIR) {
+  // Prover havuzundaki worker'lar sadece oy pusulası programını derler
+  return compileCached('BallotProgram', BallotProgram as unknown as Compilable, cacheRoot);
+}
+
+export async function compileVoting(cacheRoot: string = PROOF_CACHE_DIR): Promise<CompileInfo> {
+  // Voting, BallotProof doğruladığı için önce BallotProgram derlenmeli
+  const ballot = await compileBallotProgram(cacheRoot);
+  const info = await compileCached('Voting', Voting as unknown as Compilable, cacheRoot);
+  return {
+    ...info,
+    cacheHit: info.cacheHit && ballot.cacheHit,
+    seconds: info.seconds + ballot.seconds,
+  };
+}
+
+export async function compileConcurrentVoting(cacheRoot: string = PROOF_CACHE_DIR) {
+  // Aksiyon/reducer tabanlı kontrat (concurrent_vote_worker.ts)
+  return compileCached('ConcurrentVoting', ConcurrentVoting as unknown as Compilable, cacheRoot);
+}
+
+export function cachedVerificationKey(digest: string, cacheRoot: string = PROOF_CACHE_DIR, name = 'Voting') {
+  // Derlemeden doğrulama anahtarını okuyorum (ör. deploy betikleri veya doğrulayıcılar için)
+  return readManifest(path.join(cacheRoot, name, digest))?.verificationKey;
+}
+
+async function main() {
+  // node dist/proof_cache.js [digest|compile|compile-ballot|compile-concurrent]
+  const command = process.argv[2] ?? 'compile';
+  if (command === 'digest') {
+    console.log(await circuitDigest());
+    return;
+  }
+  if (command === 'compile-ballot') {
+    const info = await compileBallotProgram();
+    console.log(JSON.stringify({ ...info, verificationKey: { hash: info.verificationKey.hash } }));
+    return;
+  }
+  if (command === 'compile-concurrent') {
+    const info = await compileConcurrentVoting();
+    console.log(JSON.stringify({ ...info, verificationKey: { hash: info.verificationKey.hash } }));
+    return;
+  }
+  const info = await compileVoting();
+  console.log(JSON.stringify({ ...info, verificationKey: { hash: info.verificationKey.hash } }));
+}
+
+if (require.main === module) {
+  main().catch((err) => {
+    console.error(err);
+    process.exit(1);
+  });
+}
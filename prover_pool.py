@@ -0,0 +1,465 @@
+import argparse
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+from dotenv import load_dotenv
+
+import metrics
+from merkle_tree import open_registry_tree
+from nullifier_set import NullifierVoter, open_nullifier_set
+from vote_worker_client import VoteWorkerClient, VoteWorkerError, VoteWorkerUnavailable
+
+load_dotenv()
+
+# Paralel prover havuzu: oy pusulası proof'ları (BallotProgram) CPU çekirdeği kadar Node
+# prover worker'ında aynı anda üretilir; sıralayıcı (ProofSequencer) hazır proof'ları tek oy
+# worker'ına gönderim sırasıyla iletir. Böylece sonraki oyların proof'u üretilirken önceki oylar
+# zincire gönderilir ve kontrat durumu her zaman tek bir sırayla güncellenir
+# Sadece oy pusulası proof'u paralel: voteWithProof işleminin proof'u (proof.verify + nullifier
+# harcama) nullifier köküne bağlı olduğu için oy worker'ında yine tek tek üretilir
+
+PROVER_SCRIPT = 'dist/prover_worker.js'
+# 0: CPU çekirdeği sayısı
+PROVER_POOL_SIZE = int(os.getenv('PROVER_POOL_SIZE', '0'))
+# Worker başına gönderilen en fazla iş (biri işlenirken sıradaki hazır bekler)
+PROVER_QUEUE_DEPTH = int(os.getenv('PROVER_QUEUE_DEPTH', '2'))
+PROVER_HEALTH_INTERVAL = float(os.getenv('PROVER_HEALTH_INTERVAL', '5'))
+# Bu süre boyunca iş bitirmeyen meşgul worker takılmış sayılıp yeniden başlatılır
+PROVER_STALL_TIMEOUT = float(os.getenv('PROVER_STALL_TIMEOUT', '300'))
+PROVER_MAX_RETRIES = int(os.getenv('PROVER_MAX_RETRIES', '2'))
+
+def default_pool_size():
+    return PROVER_POOL_SIZE or os.cpu_count() or 1
+
+class ProverPoolClosed(VoteWorkerError):
+    pass
+
+class _ProveJob:
+    def __init__(self, payload, future):
+        self.payload = payload
+        self.future = future
+        self.attempts = 0
+        self.queued_at = time.perf_counter()
+
+class _ProverSlot:
+    # Havuzdaki tek worker ve sayaçları
+    def __init__(self, index, client):
+        self.index = index
+        self.client = client
+        self.in_flight = 0
+        self.proved = 0
+        self.failures = 0
+        self.restarts = 0
+        self.restarting = False
+        self.down = False  # Çöktüğü görüldü: yeniden başlatılana kadar iş verilmez
+        self.last_progress = time.monotonic()
+
+    def is_ready(self):
+        return not self.restarting and not self.down and self.client.is_ready()
+
+class ProverPool:
+    def __init__(self, size=None, script=PROVER_SCRIPT, node='node', startup_timeout=600,
+                 queue_depth=PROVER_QUEUE_DEPTH, health_interval=PROVER_HEALTH_INTERVAL,
+                 stall_timeout=PROVER_STALL_TIMEOUT, max_retries=PROVER_MAX_RETRIES, extra_env=None):
+        self.size = size or default_pool_size()
+        self.queue_depth = queue_depth
+        self.health_interval = health_interval
+        self.stall_timeout = stall_timeout
+        self.max_retries = max_retries
+        self._cond = threading.Condition()
+        self._queue = deque()
+        self._closed = False
+        self.retries = 0
+        self.slots = [
+            _ProverSlot(i, VoteWorkerClient(script, node, startup_timeout, extra_env))
+            for i in range(self.size)
+        ]
+        self._dispatcher = threading.Thread(target=self._dispatch_loop, daemon=True)
+        self._health = threading.Thread(target=self._health_loop, daemon=True)
+
+    def start(self, wait=True):
+        # Worker'lar paralel başlatılıyor (her biri programı derler)
+        starters = [threading.Thread(target=self._restart, args=(slot, False), daemon=True)
+                    for slot in self.slots]
+        for starter in starters:
+            starter.start()
+        if wait:
+            for starter in starters:
+                starter.join()
+        self._dispatcher.start()
+        self._health.start()
+        return self
+
+    def prove(self, choice, person_leaf, registry_witness, age_proof):
+        # Proof işini kuyruğa ekleyip {proof, nullifier} sonucunu Future olarak döndürüyorum
+        # Proof kayıt köküne ve kişinin nullifier'ına bağlı: başka bir oy için tekrar kullanılamaz
+        future = Future()
+        payload = {
+            'choice': choice,
+            'personLeaf': str(person_leaf),
+            'registryWitness': registry_witness,
+            'ageProof': age_proof,
+        }
+        with self._cond:
+            if self._closed:
+                raise ProverPoolClosed("Prover havuzu kapatıldı")
+            self._queue.append(_ProveJob(payload, future))
+            self._cond.notify_all()
+        return future
+
+    def _pick_slot(self):
+        # En az işi olan hazır worker (kapasitesi dolmamışsa)
+        best = None
+        for slot in self.slots:
+            if slot.is_ready() and slot.in_flight < self.queue_depth:
+                if best is None or slot.in_flight < best.in_flight:
+                    best = slot
+        return best
+
+    def _dispatch_loop(self):
+        while True:
+            with self._cond:
+                while True:
+                    # Kapanışta işlemdeki işler de bitmeli (çöken worker'ın işi tekrar kuyruğa döner)
+                    if self._closed and not self._queue and not any(s.in_flight for s in self.slots):
+                        self._cond.notify_all()
+                        return
+                    slot = self._pick_slot() if self._queue else None
+                    if slot is not None:
+                        break
+                    # Kuyruk boş veya tüm worker'lar dolu/yeniden başlıyor
+                    self._cond.wait(self.health_interval)
+                job = self._queue.popleft()
+                slot.in_flight += 1
+                slot.last_progress = time.monotonic()
+            self._send(slot, job)
+
+    def _send(self, slot, job):
+        job.attempts += 1
+        metrics.observe('prover_queue', time.perf_counter() - job.queued_at)
+        try:
+            if not slot.client.is_ready():
+                # Seçildikten sonra kapandı: submit() worker'ı burada senkron başlatmasın
+                raise VoteWorkerUnavailable("Prover worker'ı hazır değil")
+            request = slot.client.submit('proveBallot', **job.payload)
+        except VoteWorkerError as e:
+            self._finish(slot, job, error=e)
+            return
+        request.add_done_callback(lambda f: self._finish(slot, job, f))
+
+    def _finish(self, slot, job, request=None, error=None):
+        if error is None:
+            error = request.exception()
+        with self._cond:
+            slot.in_flight -= 1
+            slot.last_progress = time.monotonic()
+            retry = restart = False
+            if error is None:
+                slot.proved += 1
+            elif isinstance(error, VoteWorkerUnavailable):
+                # Worker çöktü veya yeniden başlatıldı: iş başka bir worker'da tekrar denenir
+                slot.failures += 1
+                restart = not slot.down
+                slot.down = True
+                retry = job.attempts <= self.max_retries
+                if retry:
+                    self.retries += 1
+                    job.queued_at = time.perf_counter()
+                    self._queue.appendleft(job)
+            self._cond.notify_all()
+        if restart:
+            print(f"🔁 Prover worker {slot.index} kapandı, yeniden başlatılıyor")
+            threading.Thread(target=self._restart, args=(slot,), daemon=True).start()
+        if retry:
+            metrics.increment('prover_retries')
+        elif error is not None:
+            # Girdi hatası (ör. yaş kontrolü) veya tekrar hakkı bitti
+            job.future.set_exception(error)
+        else:
+            job.future.set_result(request.result())
+
+    def _restart(self, slot, count=True):
+        with self._cond:
+            if slot.restarting:
+                return
+            slot.restarting = True
+        try:
+            if count:
+                slot.restarts += 1
+                metrics.increment('prover_restarts')
+                # Takılan process'i öldürüyorum; bekleyen işler VoteWorkerUnavailable ile tekrar denenir
+                slot.client.kill()
+            slot.client.start()
+        except VoteWorkerError as e:
+            print(f"⚠️ Prover worker {slot.index} başlatılamadı: {e}")
+        finally:
+            with self._cond:
+                slot.restarting = False
+                slot.down = not slot.client.is_ready()
+                slot.last_progress = time.monotonic()
+                self._cond.notify_all()
+
+    def _check(self, slot):
+        # Boşta: ping ile yoklanır. Meşgul: ping proof'un arkasında bekleyeceği için
+        # son ilerleme zamanına bakılır
+        if slot.restarting:
+            return True
+        if slot.down or not slot.client.is_alive():
+            return False
+        if slot.in_flight:
+            return time.monotonic() - slot.last_progress < self.stall_timeout
+        try:
+            slot.client.ping(timeout=max(self.health_interval, 5))
+            return True
+        except VoteWorkerError:
+            return False
+
+    def _health_loop(self):
+        # Kapanışta dağıtıcı bitene kadar devam ediyor: kalan işler için worker'lar gerekebilir
+        while self._dispatcher.is_alive():
+            with self._cond:
+                self._cond.wait(self.health_interval)
+            for slot in self.slots:
+                if not self._check(slot):
+                    print(f"🔁 Prover worker {slot.index} yanıt vermiyor, yeniden başlatılıyor")
+                    threading.Thread(target=self._restart, args=(slot,), daemon=True).start()
+
+    def get_stats(self):
+        with self._cond:
+            return {
+                "size": self.size,
+                "queued": len(self._queue),
+                "retries": self.retries,
+                "workers": [
+                    {
+                        "index": slot.index,
+                        "state": "restarting" if slot.restarting
+                                 else ("ready" if slot.client.is_ready() else "down"),
+                        "in_flight": slot.in_flight,
+                        "proved": slot.proved,
+                        "failures": slot.failures,
+                        "restarts": slot.restarts,
+                    }
+                    for slot in self.slots
+                ],
+            }
+
+    def close(self):
+        # Kuyruktaki işlerin dağıtılmasını bekleyip worker'ları kapatıyorum
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if self._dispatcher.is_alive():
+            self._dispatcher.join()
+        if self._health.is_alive():
+            self._health.join()
+        for slot in self.slots:
+            slot.client.close()
+
+class ProofSequencer:
+    # Proof'ları havuzda paralel üretip NullifierVoter üzerinden geliş sırasıyla gönderiyorum
+    # ordered=True: N. oy, kendinden önceki oylar gönderilmeden gönderilmez (sıra dışı biten
+    # proof'lar yeniden sıralama tamponunda bekler). Gönderim tek thread'de: her oy bir önceki oyun
+    # nullifier köküne bağlı tanıkla gider
+    def __init__(self, pool, voter, ordered=True, timeout=60):
+        self.pool = pool
+        self.voter = voter
+        self.ordered = ordered
+        self.timeout = timeout
+        self._cond = threading.Condition()
+        self._next_seq = 0
+        self._send_seq = 0
+        self._ready = {}
+        self._closed = False
+        self.sent = 0
+        self.prove_failures = 0
+        self.max_reorder = 0
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, choice, person_leaf, registry_witness, age_proof):
+        # Future döndürür: pipeline'a batcher_submit ile bağlanır (oy pusulası NullifierVoter.ballot_for)
+        future = Future()
+        with self._cond:
+            if self._closed:
+                raise VoteWorkerError("Sıralayıcı kapatıldı")
+            seq = self._next_seq
+            self._next_seq += 1
+        try:
+            proof = self.pool.prove(choice, person_leaf, registry_witness, age_proof)
+        except VoteWorkerError as e:
+            proof = Future()
+            proof.set_exception(e)
+        submitted = time.perf_counter()
+        proof.add_done_callback(lambda f: self._proved(seq, f, future, submitted))
+        return future
+
+    def _proved(self, seq, proof, future, submitted):
+        with self._cond:
+            self._ready[seq] = (proof, future, time.perf_counter())
+            self.max_reorder = max(self.max_reorder, len(self._ready))
+            self._cond.notify_all()
+        metrics.observe('sequencer_prove', time.perf_counter() - submitted)
+
+    def _take(self):
+        with self._cond:
+            while True:
+                if self.ordered and self._send_seq in self._ready:
+                    seq = self._send_seq
+                    break
+                if not self.ordered and self._ready:
+                    seq = next(iter(self._ready))
+                    break
+                if self._closed and self._send_seq >= self._next_seq:
+                    return None
+                self._cond.wait()
+            self._send_seq += 1
+            return self._ready.pop(seq)
+
+    def _run(self):
+        while True:
+            item = self._take()
+            if item is None:
+                return
+            proof, future, ready_at = item
+            # Yeniden sıralama tamponunda bekleme süresi
+            metrics.observe('sequencer_reorder', time.perf_counter() - ready_at)
+            if proof.exception() is not None:
+                # Proof üretilemedi (geçersiz girdi veya worker hatası): sıra atlanır
+                self.prove_failures += 1
+                future.set_exception(proof.exception())
+                continue
+            result = proof.result()
+            try:
+                # Nullifier daha önce harcandıysa NullifierSpent (ValueError) ile reddedilir
+                sent = self.voter.vote_with_proof(result['proof'], result['nullifier'], timeout=self.timeout)
+            except (VoteWorkerError, ValueError) as e:
+                future.set_exception(e)
+            else:
+                future.set_result(sent)
+            with self._cond:
+                self.sent += 1
+
+    def get_stats(self):
+        with self._cond:
+            return {
+                "submitted": self._next_seq,
+                "sent": self.sent,
+                "prove_failures": self.prove_failures,
+                "waiting": len(self._ready),
+                "max_reorder": self.max_reorder,
+                "pool": self.pool.get_stats(),
+            }
+
+    def close(self):
+        # Tüm proof'lar gönderilene kadar bekliyorum (havuz ve worker'ı çağıran kapatır)
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join()
+
+def run_bench(workers_list, votes, proofs=True, send=True, ordered=True, seed=0):
+    # Her havuz boyutu için aynı oyları proof'layıp (isteğe bağlı) gönderiyorum
+    # Oylar geçici bir kayıt ağacındaki rastgele kişilerden; her havuz boyutu boş nullifier
+    # haritasıyla ve yeni deploy edilen kontratla başlar
+    rng = random.Random(seed)
+    directory = tempfile.mkdtemp(prefix='prover_bench_')
+    extra_env = {'PROOFS_ENABLED': '1' if proofs else '0', 'REGISTRY_MERKLE_DIR': directory}
+    tree = open_registry_tree(directory)
+    try:
+        digests = [rng.getrandbits(256).to_bytes(32, 'big') for _ in range(votes)]
+        tree.build(digests)
+        ballots = [(rng.randint(0, 2), *tree.witness_for_digest(digest), 1) for digest in digests]
+        return [_bench_pool(size, ballots, tree, directory, extra_env, send, ordered)
+                for size in workers_list]
+    finally:
+        tree.close()
+        tree.hasher.close()
+        shutil.rmtree(directory, ignore_errors=True)
+
+def _bench_pool(size, ballots, tree, directory, extra_env, send, ordered):
+    votes = len(ballots)
+    pool = ProverPool(size, extra_env=extra_env)
+    start = time.perf_counter()
+    pool.start()
+    startup = time.perf_counter() - start
+    worker = sequencer = nullifiers = None
+    try:
+        if send:
+            worker = VoteWorkerClient(extra_env=extra_env, startup_timeout=600)
+            worker.start()
+            path = os.path.join(directory, f'nullifiers_{size}.sqlite')
+            nullifiers = open_nullifier_set(path, tree.hasher)
+            sequencer = ProofSequencer(pool, NullifierVoter(worker, tree, nullifiers), ordered=ordered)
+            submit = sequencer.submit
+        else:
+            submit = pool.prove
+        start = time.perf_counter()
+        futures = [submit(*ballot) for ballot in ballots]
+        errors = 0
+        for future in futures:
+            try:
+                future.result(timeout=3600)
+            except (VoteWorkerError, ValueError):
+                errors += 1
+        duration = time.perf_counter() - start
+        final_state = worker.state() if worker is not None else None
+    finally:
+        if sequencer is not None:
+            sequencer.close()
+        pool.close()
+        if worker is not None:
+            worker.close()
+        if nullifiers is not None:
+            nullifiers.close()
+    return {
+        "workers": size,
+        "votes": votes,
+        "errors": errors,
+        "startup_seconds": startup,
+        "seconds": duration,
+        "throughput": votes / duration if duration else 0.0,
+        "state": final_state,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Paralel prover havuzu")
+    sub = parser.add_subparsers(dest='command', required=True)
+    bench = sub.add_parser('bench', help="Havuz boyutuna göre proof + gönderim throughput'u")
+    bench.add_argument('--workers', default=None,
+                       help="Virgülle ayrılmış havuz boyutları (varsayılan: 1,2,4,... CPU sayısına kadar)")
+    bench.add_argument('--votes', type=int, default=32)
+    bench.add_argument('--no-proofs', action='store_true',
+                       help="Proof üretmeden sadece kuyruk/sıralama yükünü ölç (PROOFS_ENABLED=0)")
+    bench.add_argument('--no-send', action='store_true', help="Sadece proof üretimini ölç")
+    bench.add_argument('--unordered', action='store_true', help="Hazır olan proof'u sırayı beklemeden gönder")
+    args = parser.parse_args()
+
+    if args.workers:
+        sizes = [int(size) for size in args.workers.split(',')]
+    else:
+        sizes, size = [], 1
+        while size < default_pool_size():
+            sizes.append(size)
+            size *= 2
+        sizes.append(default_pool_size())
+
+    print("🧪 Prover Havuzu Benchmark")
+    print("=" * 50)
+    print(f"   📋 {args.votes} oy, proof: {'sahte' if args.no_proofs else 'gerçek'}, "
+          f"gönderim: {'yok' if args.no_send else ('sırasız' if args.unordered else 'sıralı')}")
+    rows = run_bench(sizes, args.votes, not args.no_proofs, not args.no_send, not args.unordered)
+    base = rows[0]["throughput"] or 1.0
+    for row in rows:
+        print(f"   👷 {row['workers']:3d} worker  başlatma {row['startup_seconds']:6.1f} sn  "
+              f"süre {row['seconds']:7.2f} sn  {row['throughput']:7.2f} oy/sn  "
+              f"x{row['throughput'] / base:.2f}  hata {row['errors']}")
+
+if __name__ == "__main__":
+    main()
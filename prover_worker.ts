@@ -0,0 +1,141 @@
+import 'reflect-metadata';
+import * as readline from 'readline';
+import { Field, dummyBase64Proof } from 'snarkyjs';
+import { BallotProgram, BallotStatement, RegistryWitness, nullifierFor } from './Voting';
+import { compileBallotProgram, CompileInfo } from './proof_cache';
+
+// Prover havuzu worker'ı: sadece oy pusulası proof'u (BallotProgram) üretir, kontrat durumuna dokunmaz
+// Her worker ayrı bir process; prover_pool.py CPU çekirdeği kadar worker açıp proof'ları paralel üretir
+// Protokol vote_worker ile aynı: her satır bir JSON mesajı (istek: {id, op, ...}, yanıt: {id, ok, result | error})
+
+// stdout sadece protokol mesajları için kullanılıyor, loglar stderr'e gidiyor
+const protocolOut = process.stdout;
+console.log = (...args: unknown[]) => console.error(...args);
+
+// Kişinin kayıt yaprağı ve tanığı merkle_tree.py'den gelir; proof kayıt köküne ve nullifier'a bağlanır
+type ProveRequest = {
+  id: number;
+  op: 'proveBallot';
+  choice: number;
+  personLeaf: string;
+  registryWitness: { isLeft: boolean; sibling: string }[];
+  ageProof: number;
+};
+
+type Request = ProveRequest | { id: number; op: 'ping' };
+
+// PROOFS_ENABLED=1: gerçek proof üretilir (program proof_cache ile derlenir)
+// Kapalıyken girdiler aynı kurallarla kontrol edilip sahte (dummy) proof döndürülür;
+// LocalBlockchain proofsEnabled=false iken proof doğrulanmadığı için akış aynı kalır
+const PROOFS_ENABLED = process.env.PROOFS_ENABLED === '1';
+let compileInfo: CompileInfo | undefined;
+let proved = 0;
+
+function send(message: object) {
+  protocolOut.write(JSON.stringify(message) + '\n');
+}
+
+function checkBallot(req: ProveRequest) {
+  // BallotProgram.verifyBallot ile aynı kontroller ve hata mesajları
+  // (kayıt kökü ve nullifier tanıktan hesaplandığı için her zaman tutarlı)
+  if (BigInt(req.personLeaf) === 0n) throw new Error('Geçersiz kişi verileri');
+  if (req.ageProof !== 1) throw new Error("Yaş 18'den küçük olamaz");
+  if (![0, 1, 2].includes(req.choice)) throw new Error('Geçersiz seçim');
+}
+
+async function proveBallot(req: ProveRequest) {
+  const start = performance.now();
+  const personLeaf = Field(req.personLeaf);
+  const registryWitness = new RegistryWitness(
+    req.registryWitness.map((step) => ({ isLeft: step.isLeft, sibling: Field(step.sibling) }))
+  );
+  // Açık girdiler gizli yapraktan hesaplanır: proof tanığın köküne ve kişinin nullifier'ına bağlı
+  const statement = new BallotStatement({
+    choice: Field(req.choice),
+    registryRoot: registryWitness.calculateRoot(personLeaf),
+    nullifier: nullifierFor(personLeaf),
+  });
+  let proof;
+  if (PROOFS_ENABLED) {
+    const result = await BallotProgram.verifyBallot(statement, personLeaf, registryWitness, Field(req.ageProof));
+    proof = result.toJSON();
+  } else {
+    checkBallot(req);
+    proof = {
+      publicInput: BallotStatement.toFields(statement).map(String),
+      publicOutput: [],
+      maxProofsVerified: 0,
+      proof: dummyBase64Proof(),
+    };
+  }
+  proved += 1;
+  return {
+    proof,
+    nullifier: statement.nullifier.toString(),
+    timings: { ballot_prove: (performance.now() - start) / 1000 },
+  };
+}
+
+async function handle(req: Request) {
+  switch (req.op) {
+    case 'proveBallot':
+      return proveBallot(req);
+    case 'ping':
+      return { pong: true, proofsEnabled: PROOFS_ENABLED, proved, pid: process.pid };
+    default:
+      throw new Error(`Bilinmeyen işlem: ${(req as { op: string }).op}`);
+  }
+}
+
+async function processLine(line: string) {
+  if (!line.trim()) return;
+  let req: Request;
+  try {
+    req = JSON.parse(line);
+  } catch (err) {
+    send({ id: null, ok: false, error: `Geçersiz mesaj: ${line}` });
+    return;
+  }
+  try {
+    send({ id: req.id, ok: true, result: await handle(req) });
+  } catch (err) {
+    send({ id: req.id, ok: false, error: err instanceof Error ? err.message : String(err) });
+  }
+}
+
+async function main() {
+  if (PROOFS_ENABLED) {
+    compileInfo = await compileBallotProgram();
+    console.error(
+      `🔑 BallotProgram derlendi${compileInfo.cacheHit ? ' (doğrulama anahtarı önbellekle aynı)' : ''} ` +
+        `(${compileInfo.seconds.toFixed(1)} sn, ${compileInfo.digest})`
+    );
+  }
+
+  // Proof üretimi CPU'yu tamamen kullandığı için worker başına istekler sırayla işleniyor;
+  // paralellik havuzdaki worker sayısından geliyor
+  let queue = Promise.resolve();
+  const rl = readline.createInterface({ input: process.stdin });
+  rl.on('line', (line) => {
+    queue = queue.then(() => processLine(line));
+  });
+  rl.on('close', () => {
+    queue.then(() => process.exit(0));
+  });
+
+  send({
+    event: 'ready',
+    proofsEnabled: PROOFS_ENABLED,
+    compile: compileInfo && {
+      digest: compileInfo.digest,
+      cacheHit: compileInfo.cacheHit,
+      seconds: compileInfo.seconds,
+      verificationKeyHash: compileInfo.verificationKey.hash,
+    },
+  });
+}
+
+main().catch((err) => {
+  console.error(err);
+  process.exit(1);
+});
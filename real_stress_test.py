@@ -1,33 +1,47 @@
+import argparse
+import asyncio
 import time
-import json
 import random
 import subprocess
 import os
 import threading
-from concurrent.futures import ThreadPoolExecutor
-from hash_utils import is_valid_person
-from voted_tc_tracker import has_voted, mark_as_voted, get_vote_proof, reset_votes
+import multiprocessing
+import metrics
+from benchmark import build_report, print_report, save_reports
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from hash_utils import is_valid_person, warm_up_verifiers
+from voted_tc_tracker import try_claim_vote, get_claim_stats, reset_votes, hash_id, get_vote_store
+from vote_pipeline import VotePipeline, PipelineError, simulated_submit
+from population import add_sampler_arguments, load_sampler, sampler_options
+from tally_store import TallyStore, CHOICE_FIELDS, TALLY_FIELDS
 
 class RealVotingStressTest:
-    def __init__(self, num_users=100):
+    def __init__(self, num_users=100, warmup=0, sampler_options=None):
         self.num_users = num_users
+        self.warmup = warmup  # Rapora katılmayan ilk (ısınma) istek sayısı
+        self.reports = []
         self.results = []
         self.lock = threading.Lock()
         self.success_count = 0
         self.error_count = 0
         self.start_time = None
         self.end_time = None
+        self.claim_stats = None  # Çok process'li modlarda process'lerden toplanan kilit istatistikleri
+        # Kontrat sayaçlarının yerine geçen sayım: oy "zincire yazıldığında" artırılır,
+        # test sonuçlarından bağımsız tutulur (tutarlılık kontrolü sonuçlarla karşılaştırır)
+        self.tally = TallyStore()
+        self.tally_counts = None  # Çok process'li modlarda process'lerden toplanan sayım
+        # Process'ler örnekleyiciyi aynı seçeneklerle kendileri kurar
+        self.sampler_options = dict(sampler_options or {})
+        self.sampler = load_sampler(**self.sampler_options)
         
     def generate_test_data(self):
-        # Test için rastgele kişi verisi seçiyorum
-        with open('people_data.json', 'r', encoding='utf-8') as f:
-            people_data = json.load(f)
-        
-        # Rastgele kişi seç
-        return random.choice(people_data)
+        # Test için önceden yüklenmiş örnekleyiciden kişi verisi seçiyorum
+        return self.sampler.sample()
     
     def simulate_real_vote(self, user_id):
         # Gerçek oy verme işlemini simüle ediyorum
+        start = time.perf_counter()
         try:
             # Test verisi oluştur
             person = self.generate_test_data()
@@ -47,18 +61,20 @@ class RealVotingStressTest:
                     'user_id': user_id,
                     'status': 'error',
                     'error': 'Invalid person data',
-                    'timestamp': time.time()
+                    'timestamp': time.time(),
+                    'latency': time.perf_counter() - start
                 }
             
-            # Çifte oy kontrolü
-            if has_voted(tc_id):
+            # Çifte oy kontrolü + işaretleme (atomik)
+            if not try_claim_vote(tc_id):
                 with self.lock:
                     self.error_count += 1
                 return {
                     'user_id': user_id,
                     'status': 'error',
                     'error': 'Already voted',
-                    'timestamp': time.time()
+                    'timestamp': time.time(),
+                    'latency': time.perf_counter() - start
                 }
             
             # Hash'leri oluştur
@@ -68,14 +84,12 @@ class RealVotingStressTest:
             # Proof'ları oluştur
             age_proof = 1 if age >= 18 else 0
             person_proof = 1  # Yukarıda zaten doğrulandı
-            vote_proof = get_vote_proof(tc_id)  # Daha önce oy vermemiş kanıtı
+            vote_proof = 1  # Oy hakkı yukarıda bu çağrıya ayrıldı
             
             # Smart contract çağrısı simülasyonu
             # Gerçek sistemde burada blockchain işlemi yapılır
             time.sleep(0.5)  # Simüle edilmiş blockchain işlem süresi
-            
-            # Oy vermiş olarak işaretle
-            mark_as_voted(tc_id)
+            self.tally.record_vote(vote_choice)
             
             with self.lock:
                 self.success_count += 1
@@ -85,7 +99,8 @@ class RealVotingStressTest:
                 'status': 'success',
                 'tc_id': tc_id,
                 'vote_choice': vote_choice,
-                'timestamp': time.time()
+                'timestamp': time.time(),
+                'latency': time.perf_counter() - start
             }
             
         except Exception as e:
@@ -95,7 +110,8 @@ class RealVotingStressTest:
                 'user_id': user_id,
                 'status': 'error',
                 'error': str(e),
-                'timestamp': time.time()
+                'timestamp': time.time(),
+                'latency': time.perf_counter() - start
             }
     
     def run_parallel_test(self, max_workers=10):
@@ -115,11 +131,185 @@ class RealVotingStressTest:
         
         self.end_time = time.time()
         self.print_results("Gerçek Paralel Test")
+        self.print_invariants()
+    
+    def run_pipeline_test(self, submit_delay=0.5):
+        # Aynı oyları asyncio pipeline'ı ile tek thread'lik event loop'tan gönderiyorum
+        # (oy başına thread yok; aşama limitleri ve kuyruklar eşzamanlılığı sınırlar)
+        print(f"🔄 Pipeline Testi Başlatılıyor ({self.num_users} kullanıcı)")
+        pipeline = VotePipeline(simulated_submit(submit_delay), on_commit=self.tally.on_commit)
+        error_messages = {'invalid_person': 'Invalid person data', 'already_voted': 'Already voted'}
+
+        async def vote(user_id):
+            start = time.perf_counter()
+            person = self.generate_test_data()
+            vote_choice = random.randint(0, 2)
+            try:
+                await pipeline.submit_vote(person['tc_id'], person['first_name'], person['last_name'],
+                                           person['age'], vote_choice)
+            except PipelineError as e:
+                with self.lock:
+                    self.error_count += 1
+                return {
+                    'user_id': user_id,
+                    'status': 'error',
+                    'error': error_messages.get(e.reason, str(e)),
+                    'timestamp': time.time(),
+                    'latency': time.perf_counter() - start
+                }
+            with self.lock:
+                self.success_count += 1
+            return {
+                'user_id': user_id,
+                'status': 'success',
+                'tc_id': person['tc_id'],
+                'vote_choice': vote_choice,
+                'timestamp': time.time(),
+                'latency': time.perf_counter() - start
+            }
+
+        async def run():
+            results = await asyncio.gather(*(vote(i) for i in range(self.num_users)))
+            await pipeline.close()
+            return results
+
+        self.start_time = time.time()
+        self.results.extend(asyncio.run(run()))
+        self.end_time = time.time()
+        self.print_results("Pipeline Testi")
+        self.print_invariants()
+
+        print(f"\n🧵 Pipeline Aşamaları:")
+        for stage, stats in pipeline.get_stats()['stages'].items():
+            print(f"   {stage}: {stats['processed']} işlendi, {stats['failed']} başarısız, "
+                  f"ortalama {stats['avg_seconds']*1000:.1f} ms")
+
+    def run_process_pool_test(self, max_workers=4):
+        # Her oy ProcessPoolExecutor'da ayrı bir görev: hash'leme GIL ile sınırlı değil
+        # ve çifte oy kilitleri gerçekten process'ler arası çekişir
+        print(f"🔄 Process Havuzu Testi Başlatılıyor ({self.num_users} kullanıcı, {max_workers} process)")
+        self.start_time = time.time()
+        
+        # spawn: her process Streamlit worker'ı gibi modülleri kendisi yükler
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=max_workers, mp_context=context,
+                                 initializer=_init_process_worker,
+                                 initargs=(self.num_users, self._child_sampler_options())) as executor:
+            stats = []
+            tallies = []
+            for i, (result, process_stats, tally) in enumerate(
+                    executor.map(_process_pool_vote, range(self.num_users), chunksize=4)):
+                self._collect(result)
+                stats.append(process_stats)
+                tallies.append(tally)
+                if (i + 1) % 10 == 0:
+                    print(f"   {i + 1}/{self.num_users} tamamlandı")
+        
+        self.end_time = time.time()
+        self.claim_stats = _merge_claim_stats(stats)
+        self.tally_counts = _merge_tallies(tallies)
+        self.print_results("Process Havuzu Testi")
+        self.print_invariants()
+    
+    def run_multiprocess_test(self, processes=4, threads_per_process=10):
+        # Birden fazla bağımsız process (ör. birden fazla Streamlit worker'ı), her biri kendi thread havuzuyla
+        print(f"🔄 Çok Process'li Test Başlatılıyor ({self.num_users} kullanıcı, "
+              f"{processes} process x {threads_per_process} thread)")
+        share, extra = divmod(self.num_users, processes)
+        jobs = [(share + (1 if i < extra else 0), threads_per_process, random.randrange(1 << 30),
+                 self._child_sampler_options())
+                for i in range(processes)]
+        self.start_time = time.time()
+        
+        context = multiprocessing.get_context('spawn')
+        with context.Pool(processes) as pool:
+            outputs = pool.map(_run_process_share, jobs)
+        
+        self.end_time = time.time()
+        for results, _, _ in outputs:
+            for result in results:
+                self._collect(result)
+        self.claim_stats = _merge_claim_stats([stats for _, stats, _ in outputs])
+        self.tally_counts = _merge_tallies([tally for _, _, tally in outputs])
+        self.print_results("Çok Process'li Test")
+        self.print_invariants()
     
+    def _child_sampler_options(self):
+        # Her process farklı örnekleme seed'i alır; aynı kişiler process'ler arasında da çakışabilir
+        return dict(self.sampler_options, seed=random.randrange(1 << 30))
+    
+    def _collect(self, result):
+        self.results.append(result)
+        if result['status'] == 'success':
+            self.success_count += 1
+        else:
+            self.error_count += 1
+    
+    def check_invariants(self):
+        # Test sonunda depolamayı diskten yeniden okuyup tutarlılığı kontrol ediyorum
+        # (reset_votes ile başlandığı varsayılır)
+        successes = [r for r in self.results if r['status'] == 'success']
+        success_hashes = [hash_id(r['tc_id']) for r in successes]
+        stored = set(get_vote_store().all_hashes())
+        
+        # Aynı TC için birden fazla kabul edilen oy
+        double_votes = len(success_hashes) - len(set(success_hashes))
+        # Kabul edildiği halde kayıtta olmayan oy (kaybolan yazma)
+        lost_updates = sum(1 for h in set(success_hashes) if h not in stored)
+        # Kabul edilmeden kayda girmiş oy
+        phantom_votes = len(stored - set(success_hashes))
+        # Sayım sonuçlardan değil, oy yazılırken güncellenen sayaçlardan okunur
+        tally = self.tally_counts or self.tally.snapshot()
+        distribution = dict.fromkeys(CHOICE_FIELDS.values(), 0)
+        for r in successes:
+            distribution[CHOICE_FIELDS[r['vote_choice']]] += 1
+        # Seçim bazında sayaçla başarılı oy dağılımı arasındaki fark
+        tally_mismatch = sum(abs(tally[field] - count) for field, count in distribution.items())
+        return {
+            "successes": len(successes),
+            "stored": len(stored),
+            "tally_total": tally['totalVoters'],
+            "double_votes": double_votes,
+            "lost_updates": lost_updates,
+            "phantom_votes": phantom_votes,
+            "tally_mismatch": tally_mismatch,
+            "ok": double_votes == 0 and lost_updates == 0 and phantom_votes == 0 and tally_mismatch == 0
+                  and len(stored) == len(successes) == tally['totalVoters'],
+        }
+    
+    def print_invariants(self):
+        invariants = self.check_invariants()
+        if self.reports:
+            self.reports[-1]["invariants"] = invariants
+        print(f"\n🧮 Tutarlılık Kontrolleri:")
+        print(f"   Başarılı oy: {invariants['successes']}  Kayıttaki oy: {invariants['stored']}  "
+              f"Sayım toplamı: {invariants['tally_total']}")
+        print(f"   Çifte oy: {invariants['double_votes']}")
+        print(f"   Kaybolan yazma: {invariants['lost_updates']}")
+        print(f"   Kabul edilmeden kaydedilen: {invariants['phantom_votes']}")
+        print(f"   Sayım farkı (seçim bazında): {invariants['tally_mismatch']}")
+        print(f"   {'✅ Tüm kontroller geçti' if invariants['ok'] else '❌ Tutarlılık hatası!'}")
+        return invariants
+    
+    def reset(self):
+        # Test sonuçlarını sıfırlıyorum
+        self.results = []
+        self.success_count = 0
+        self.error_count = 0
+        self.start_time = None
+        self.end_time = None
+        self.claim_stats = None
+        self.tally = TallyStore()
+        self.tally_counts = None
+        self.sampler.reset()
+        metrics.registry.reset()
+
     def print_results(self, test_name):
         # Test sonuçlarını yazdırıyorum
         duration = self.end_time - self.start_time
-        throughput = self.num_users / duration
+        throughput = self.num_users / duration if duration > 0 else 0.0
+        report = build_report(test_name, self.results, duration, self.warmup)
+        self.reports.append(report)
         
         print(f"\n📊 {test_name} Sonuçları:")
         print(f"   ⏱️  Toplam Süre: {duration:.2f} saniye")
@@ -128,6 +318,12 @@ class RealVotingStressTest:
         print(f"   ❌ Hatalı: {self.error_count}")
         print(f"   🚀 Throughput: {throughput:.2f} oy/saniye")
         print(f"   📈 Ortalama Süre: {duration/self.num_users:.3f} saniye/oy")
+        print_report(report)
+        if metrics.is_enabled() and metrics.snapshot()["stages"]:
+            # Uygulamadaki ölçüm noktaları (hash, kayıt araması, oy kaydı yazma...) testte de toplanır
+            report["stages"] = metrics.snapshot()["stages"]
+            print(f"\n⏱️  Aşama Süreleri:")
+            metrics.print_stage_summary(report["stages"])
         
         # Hata analizi
         if self.error_count > 0:
@@ -148,29 +344,113 @@ class RealVotingStressTest:
                 vote_distribution[result['vote_choice']] += 1
         
         print(f"\n🗳️ Oy Dağılımı:")
-        print(f"   🔴 Kırmızı: {vote_distribution[0]} ({vote_distribution[0]/self.success_count*100:.1f}%)")
-        print(f"   🔵 Mavi: {vote_distribution[1]} ({vote_distribution[1]/self.success_count*100:.1f}%)")
-        print(f"   🟢 Yeşil: {vote_distribution[2]} ({vote_distribution[2]/self.success_count*100:.1f}%)")
+        success_total = self.success_count or 1  # Hiç başarılı oy yoksa sıfıra bölmeyi önle
+        print(f"   🔴 Kırmızı: {vote_distribution[0]} ({vote_distribution[0]/success_total*100:.1f}%)")
+        print(f"   🔵 Mavi: {vote_distribution[1]} ({vote_distribution[1]/success_total*100:.1f}%)")
+        print(f"   🟢 Yeşil: {vote_distribution[2]} ({vote_distribution[2]/success_total*100:.1f}%)")
+        
+        # Oy hakkı ayırma kilidi çekişmesi
+        claim_stats = self.claim_stats or get_claim_stats()
+        print(f"\n🔒 Çifte Oy Kilidi:")
+        print(f"   Deneme: {claim_stats['attempts']} (çekişmeli: {claim_stats['contended']})")
+        print(f"   Ortalama Bekleme: {claim_stats['avg_wait_seconds']*1000:.3f} ms")
+        print(f"   Maksimum Bekleme: {claim_stats['max_wait_seconds']*1000:.3f} ms")
+
+# Process havuzu ve çok process'li mod için yardımcılar (spawn ile pickle edilebilmeleri için modül düzeyinde)
+_process_test = None
+
+def _init_process_worker(num_users, options):
+    global _process_test
+    warm_up_verifiers(background=False)
+    # Havuzdaki her process kendi sırasıyla örnekler (aynı seed ile hepsi aynı kişileri seçerdi)
+    options = dict(options, seed=hash((options.get('seed'), os.getpid())))
+    _process_test = RealVotingStressTest(num_users, sampler_options=options)
+
+def _process_pool_vote(user_id):
+    # Sonuçla birlikte process'in o ana kadarki kilit istatistiklerini döndürüyorum
+    result = _process_test.simulate_real_vote(user_id)
+    result['pid'] = os.getpid()
+    return result, dict(get_claim_stats(), pid=os.getpid()), dict(_process_test.tally.snapshot(), pid=os.getpid())
+
+def _run_process_share(job):
+    num_users, threads, seed, options = job
+    random.seed(seed)
+    warm_up_verifiers(background=False)
+    test = RealVotingStressTest(num_users, sampler_options=options)
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        results = list(executor.map(test.simulate_real_vote, range(num_users)))
+    for result in results:
+        result['pid'] = os.getpid()
+    return results, dict(get_claim_stats(), pid=os.getpid()), dict(test.tally.snapshot(), pid=os.getpid())
+
+def _merge_claim_stats(stats_list):
+    # Her process için en güncel (en çok denemeli) istatistiği alıp topluyorum
+    latest = {}
+    for stats in stats_list:
+        if stats['attempts'] >= latest.get(stats['pid'], {'attempts': -1})['attempts']:
+            latest[stats['pid']] = stats
+    unique = latest.values()
+    attempts = sum(s['attempts'] for s in unique)
+    total_wait = sum(s['total_wait_seconds'] for s in unique)
+    return {
+        "attempts": attempts,
+        "contended": sum(s['contended'] for s in unique),
+        "avg_wait_seconds": total_wait / attempts if attempts else 0.0,
+        "max_wait_seconds": max((s['max_wait_seconds'] for s in unique), default=0.0),
+    }
+
+def _merge_tallies(tallies):
+    # Her process için en güncel (en çok oylu) sayımı alıp topluyorum
+    latest = {}
+    for tally in tallies:
+        if tally['totalVoters'] >= latest.get(tally['pid'], {'totalVoters': -1})['totalVoters']:
+            latest[tally['pid']] = tally
+    return {field: sum(t[field] for t in latest.values()) for field in TALLY_FIELDS}
 
 def main():
+    parser = argparse.ArgumentParser(description="Gerçek sistem stress testi")
+    parser.add_argument('--users', type=int, default=100, help="Kullanıcı sayısı")
+    parser.add_argument('--warmup', type=int, default=10, help="Rapora katılmayan ısınma isteği sayısı")
+    parser.add_argument('--json', help="Sonuçların yazılacağı JSON dosyası (benchmark.py compare ile karşılaştırılır)")
+    parser.add_argument('--mode', choices=['thread', 'pipeline', 'process-pool', 'multiprocess', 'all'],
+                        default='all', help="Çalıştırılacak test modu")
+    parser.add_argument('--processes', type=int, default=4, help="Çok process'li modlarda process sayısı")
+    add_sampler_arguments(parser)
+    args = parser.parse_args()
+
     print("🧪 ZKP Oylama Sistemi Gerçek Stress Test")
     print("=" * 50)
     
+    # Kayıt index'lerini test süresine katmamak için önceden yüklüyorum
+    warm_up_verifiers(background=False)
+    
     # Test parametreleri
-    num_users = 100  # Gerçek test için daha az kullanıcı
+    num_users = args.users  # Gerçek test için daha az kullanıcı
     
     print(f"📋 Test Parametreleri:")
     print(f"   👥 Kullanıcı Sayısı: {num_users}")
     print(f"   🎯 Amaç: Gerçek sistem performansını ölçmek")
     print(f"   ⚠️  Not: Bu test gerçek hash doğrulaması ve çifte oy kontrolü yapar")
     
-    # Oy kayıtlarını sıfırla
-    print(f"\n🔄 Oy kayıtları sıfırlanıyor...")
-    reset_votes()
+    test = RealVotingStressTest(num_users, warmup=args.warmup, sampler_options=sampler_options(args))
+    runs = {
+        'thread': lambda: test.run_parallel_test(max_workers=10),
+        'pipeline': test.run_pipeline_test,
+        'process-pool': lambda: test.run_process_pool_test(max_workers=args.processes),
+        'multiprocess': lambda: test.run_multiprocess_test(processes=args.processes),
+    }
+    modes = list(runs) if args.mode == 'all' else [args.mode]
+    
+    for mode in modes:
+        # Her test temiz oy kayıtlarıyla başlar
+        print(f"\n🔄 Oy kayıtları sıfırlanıyor...")
+        reset_votes()
+        test.reset()
+        runs[mode]()
     
-    # Test başlat
-    test = RealVotingStressTest(num_users)
-    test.run_parallel_test(max_workers=10)
+    if args.json:
+        save_reports(test.reports, args.json)
+        print(f"\n💾 Sonuçlar kaydedildi: {args.json}")
     
     print(f"\n✅ Gerçek stress test tamamlandı!")
     print(f"💡 Bu test gerçek sistem davranışını simüle eder")
@@ -0,0 +1,278 @@
+import argparse
+import os
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError, wait
+
+from dotenv import load_dotenv
+
+import metrics
+from vote_worker_client import VoteWorkerClient, VoteWorkerError
+
+load_dotenv()
+
+# ConcurrentVoting için rollup zamanlayıcısı
+# Oylar castVote ile aksiyon olarak yayınlanır (state precondition'ı yok, oylar çakışmaz);
+# sayaçlar rollupVotes ile güncellenir. Rollup, bekleyen oy sayısı REDUCE_BACKLOG'a ulaşınca
+# veya en eski bekleyen oy REDUCE_INTERVAL saniyeyi geçince tetiklenir
+
+CONCURRENT_WORKER_SCRIPT = 'dist/concurrent_vote_worker.js'
+REDUCE_BACKLOG = int(os.getenv('REDUCE_BACKLOG', '16'))
+REDUCE_INTERVAL = float(os.getenv('REDUCE_INTERVAL', '10'))
+# ConcurrentVoting.ts içindeki MAX_PENDING_ACTIONS ile aynı olmalı: reduce bekleyen aksiyonların
+# hepsini işlemek zorunda, sınır aşılırsa rollup yapılamaz. Sınıra gelince yeni oylar bekletilir
+REDUCE_MAX_PENDING = 32
+# Başarısız rollup sonrası bekleme: her ardışık hatada iki katına çıkar, en fazla REDUCE_RETRY_MAX_DELAY
+REDUCE_RETRY_DELAY = float(os.getenv('REDUCE_RETRY_DELAY', '1'))
+REDUCE_RETRY_MAX_DELAY = float(os.getenv('REDUCE_RETRY_MAX_DELAY', '60'))
+
+class ReduceScheduler:
+    # Worker istekleri sırayla işlediği için rollup, kendisinden önce gönderilen tüm oyları kapsar
+    # Oylar rollup onaylanana kadar bekleyen sayılır: zincirde işlenmemiş aksiyon sayısı rollup
+    # başarısız olsa da max_pending'i aşmaz. Rollup sürerken gelen oylar bir sonraki rollup'a kalır
+    def __init__(self, worker, backlog=REDUCE_BACKLOG, interval=REDUCE_INTERVAL,
+                 max_pending=REDUCE_MAX_PENDING, timeout=120,
+                 retry_delay=REDUCE_RETRY_DELAY, retry_max_delay=REDUCE_RETRY_MAX_DELAY):
+        if not 0 < backlog <= max_pending:
+            raise ValueError(f"REDUCE_BACKLOG 1 ile {max_pending} arasında olmalı")
+        self.worker = worker
+        self.backlog = backlog
+        self.interval = interval
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.retry_delay = retry_delay
+        self.retry_max_delay = retry_max_delay
+        self._cond = threading.Condition()
+        # Worker'a yazma sırası (oy / rollup) ile bekleyen sayacın sırası aynı kalsın diye gönderimler
+        # bu kilit altında; sayaç kilidi (_cond) worker yanıt verirken veya başlatılırken tutulmaz
+        self._send_lock = threading.Lock()
+        # Rollup'ı onaylanmamış oyların gönderim zamanları (en eskisi interval tetikleyicisi için)
+        self._casts = deque()
+        # Sınır kontrolünden geçip henüz worker'a yazılmamış oylar
+        self._reserved = 0
+        self._failures = 0
+        self._retry_at = None
+        self._closed = False
+        self.submitted = 0
+        self.rollups = 0
+        self.rollup_failures = 0
+        self.reduced = 0
+        self.throttled = 0
+        self.triggers = {"backlog": 0, "interval": 0, "close": 0}
+        self.last_rollup = None
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _has_room(self):
+        return len(self._casts) + self._reserved < self.max_pending
+
+    def submit(self, choice, person_hash, age_proof, person_proof, vote_proof):
+        # VoteMicroBatcher.submit ile aynı imza: pipeline'a batcher_submit ile bağlanabilir
+        # Sınırda rollup onaylanana kadar bekleyebilir: event loop'tan çağrılmamalı (batcher_submit
+        # thread havuzunda çağırır)
+        with self._cond:
+            if self._closed:
+                raise VoteWorkerError("Rollup zamanlayıcısı kapatıldı")
+            if not self._has_room():
+                # Bir sonraki rollup'a sığmayacak oy gönderilmez (backpressure)
+                self.throttled += 1
+                start = time.perf_counter()
+                self._cond.wait_for(lambda: self._has_room() or self._closed)
+                metrics.observe('reduce_throttle', time.perf_counter() - start)
+                if self._closed:
+                    raise VoteWorkerError("Rollup zamanlayıcısı kapatıldı")
+            self._reserved += 1
+        sent = False
+        try:
+            with self._send_lock:
+                future = self.worker.submit(
+                    'castVote',
+                    choice=choice,
+                    personHash=str(person_hash),
+                    ageProof=age_proof,
+                    personProof=person_proof,
+                    voteProof=vote_proof,
+                )
+                sent = True
+                # Sayaca gönderim kilidi bırakılmadan ekleniyor: sonraki rollup bu oyu kapsar
+                with self._cond:
+                    self._reserved -= 1
+                    self._casts.append(time.monotonic())
+                    self.submitted += 1
+                    if len(self._casts) >= self.backlog:
+                        self._cond.notify_all()
+        finally:
+            if not sent:
+                with self._cond:
+                    self._reserved -= 1
+                    self._cond.notify_all()
+        return future
+
+    def _next_check(self):
+        # _due'nun değişebileceği en erken an (None: yeni oy veya kapanış beklenir)
+        if not self._casts:
+            return None
+        if self._retry_at is not None:
+            return self._retry_at
+        return self._casts[0] + self.interval
+
+    def _due(self):
+        if not self._casts:
+            return None
+        if self._retry_at is not None and time.monotonic() < self._retry_at:
+            # Başarısız rollup sonrası bekleme süresi dolmadı
+            return None
+        if len(self._casts) >= self.backlog:
+            return 'backlog'
+        if self._closed:
+            return 'close'
+        if time.monotonic() - self._casts[0] >= self.interval:
+            return 'interval'
+        return None
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while True:
+                    trigger = self._due()
+                    if trigger is not None:
+                        break
+                    if self._closed and (not self._casts or self._failures):
+                        # Kapanışta başarısız rollup tekrar denenmez: oylar zincirde aksiyon olarak kalır
+                        return
+                    check = self._next_check()
+                    self._cond.wait(None if check is None else max(0.0, check - time.monotonic()))
+                self.triggers[trigger] += 1
+            with self._send_lock:
+                # Rollup'tan önce gönderilen oylar; onaylanana kadar bekleyen sayılmaya devam eder
+                with self._cond:
+                    count = len(self._casts)
+                start = time.perf_counter()
+                try:
+                    future = self.worker.submit('rollup')
+                except VoteWorkerError as e:
+                    future = Future()
+                    future.set_exception(e)
+            self._finish_rollup(future, count, trigger, start)
+
+    def _finish_rollup(self, future, count, trigger, start):
+        try:
+            result = future.result(self.timeout)
+        except (VoteWorkerError, FutureTimeoutError) as e:
+            # Aksiyonlar zincirde bekliyor: bekleme süresinden sonra tekrar denenir
+            with self._cond:
+                self.rollup_failures += 1
+                self._failures += 1
+                delay = min(self.retry_delay * 2 ** (self._failures - 1), self.retry_max_delay)
+                self._retry_at = time.monotonic() + delay
+                waiting = len(self._casts)
+            metrics.observe('reduce_rollup', time.perf_counter() - start, error=True, trigger=trigger)
+            print(f"⚠️ Rollup başarısız ({waiting} oy bekliyor, {delay:.1f} sn sonra tekrar): {e}")
+            return
+        seconds = time.perf_counter() - start
+        with self._cond:
+            for _ in range(count):
+                self._casts.popleft()
+            self._failures = 0
+            self._retry_at = None
+            # Bekletilen oylar gönderilebilir
+            self._cond.notify_all()
+            self.rollups += 1
+            self.reduced += result.get('reduced', 0)
+            self.last_rollup = {
+                "trigger": trigger,
+                "reduced": result.get('reduced', 0),
+                "seconds": seconds,
+                "at": time.time(),
+            }
+        metrics.observe('reduce_rollup', seconds, trigger=trigger)
+        metrics.increment('reduced_votes', result.get('reduced', 0))
+
+    def get_stats(self):
+        with self._cond:
+            return {
+                "submitted": self.submitted,
+                "pending": len(self._casts),
+                "retry_in": None if self._retry_at is None else max(0.0, self._retry_at - time.monotonic()),
+                "rollups": self.rollups,
+                "rollup_failures": self.rollup_failures,
+                "reduced": self.reduced,
+                "throttled": self.throttled,
+                "triggers": dict(self.triggers),
+                "last_rollup": self.last_rollup,
+            }
+
+    def close(self):
+        # Kalan oylar son bir rollup ile işlenir (worker'ı çağıran kapatır)
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join()
+
+def projected_state(state):
+    # Kontrattaki sayaçlar + henüz rollup'a girmemiş oylar (canlı sayaç gösterimi için)
+    pending = state.get('pending') or {}
+    projected = dict(state)
+    for field in ('red', 'blue', 'green', 'totalVoters'):
+        projected[field] = str(int(state[field]) + pending.get(field, 0))
+    return projected
+
+def run_bench(votes, backlog, interval, concurrency, seed=0):
+    # Aynı anda `concurrency` oy gönderilirken rollup sayısı ve verim
+    rng = random.Random(seed)
+    ballots = [(rng.randint(0, 2), rng.getrandbits(32), 1, 1, 1) for _ in range(votes)]
+    worker = VoteWorkerClient(CONCURRENT_WORKER_SCRIPT, startup_timeout=600)
+    worker.start()
+    scheduler = ReduceScheduler(worker, backlog=backlog, interval=interval)
+    semaphore = threading.Semaphore(concurrency)
+    futures = []
+    start = time.perf_counter()
+    try:
+        for ballot in ballots:
+            semaphore.acquire()
+            future = scheduler.submit(*ballot)
+            future.add_done_callback(lambda _: semaphore.release())
+            futures.append(future)
+        wait(futures)
+        cast_seconds = time.perf_counter() - start
+        scheduler.close()
+        total_seconds = time.perf_counter() - start
+        state = worker.state(timeout=60)
+    finally:
+        worker.close()
+    failed = sum(1 for future in futures if future.exception() is not None)
+    return {
+        "votes": votes,
+        "failed": failed,
+        "cast_seconds": cast_seconds,
+        "total_seconds": total_seconds,
+        "state": state,
+        **scheduler.get_stats(),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="ConcurrentVoting rollup zamanlayıcısı")
+    sub = parser.add_subparsers(dest='command', required=True)
+    bench = sub.add_parser('bench', help="Eşzamanlı oy + rollup ölçümü")
+    bench.add_argument('--votes', type=int, default=200)
+    bench.add_argument('--backlog', type=int, default=REDUCE_BACKLOG)
+    bench.add_argument('--interval', type=float, default=REDUCE_INTERVAL)
+    bench.add_argument('--concurrency', type=int, default=64)
+    args = parser.parse_args()
+
+    if args.command == 'bench':
+        result = run_bench(args.votes, args.backlog, args.interval, args.concurrency)
+        state = result['state']
+        print(f"🗳️  {result['votes']} oy ({result['failed']} başarısız), eşzamanlılık {args.concurrency}")
+        print(f"   📨 Oy gönderimi: {result['cast_seconds']:.2f} saniye "
+              f"({result['votes'] / result['cast_seconds']:.1f} oy/saniye)")
+        print(f"   🔁 {result['rollups']} rollup ({result['rollup_failures']} başarısız), "
+              f"tetikleyiciler: {result['triggers']}, bekletilen oy: {result['throttled']}")
+        print(f"   ⏱️  Toplam (son rollup dahil): {result['total_seconds']:.2f} saniye")
+        print(f"   📊 Kırmızı {state['red']}, Mavi {state['blue']}, Yeşil {state['green']}, "
+              f"Toplam {state['totalVoters']} (bekleyen {state['pending']['totalVoters']})")
+
+if __name__ == "__main__":
+    main()
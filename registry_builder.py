@@ -0,0 +1,543 @@
+import argparse
+import hashlib
+import heapq
+import json
+import os
+import sqlite3
+import tempfile
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from hash_utils import (
+    BINARY_HEADER,
+    BINARY_MAGIC,
+    BINARY_VERSION,
+    DIGEST_SIZE,
+    PEPPER,
+    SALT,
+    BinaryRegistry,
+    hash_id,
+    hash_person_data,
+    registry_metadata,
+)
+
+# Büyük nüfus dosyalarından güvenli kayıtları akış halinde ve çok çekirdekte oluşturuyorum
+# Bellek kullanımı dosya boyutundan bağımsız: kayıtlar parça parça okunur, hash'lenir ve yazılır
+
+READ_BUFFER_SIZE = 1 << 20
+MANIFEST_FILE = 'registry_manifest.sqlite'
+
+def _iter_json_array(f, prefix=''):
+    # JSON dizisini tamamını belleğe almadan eleman eleman okuyorum
+    decoder = json.JSONDecoder()
+    buffer = prefix + f.read(READ_BUFFER_SIZE)
+    pos = 0
+    eof = not buffer
+
+    def skip(chars):
+        nonlocal pos
+        while pos < len(buffer) and buffer[pos] in chars:
+            pos += 1
+
+    skip(' \t\r\n')
+    if pos >= len(buffer) or buffer[pos] != '[':
+        raise ValueError("Girdi bir JSON dizisi değil")
+    pos += 1
+
+    while True:
+        skip(' \t\r\n,')
+        if pos < len(buffer) and buffer[pos] == ']':
+            return
+        try:
+            if pos >= len(buffer):
+                raise json.JSONDecodeError("Tampon bitti", buffer, pos)
+            record, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            # Kayıt tamponun sonunda bölünmüş: bir sonraki parçayı ekleyip tekrar deniyorum
+            if eof:
+                raise ValueError("JSON dizisi beklenmedik şekilde bitti")
+            more = f.read(READ_BUFFER_SIZE)
+            eof = not more
+            buffer = buffer[pos:] + more
+            pos = 0
+            continue
+        yield record
+        pos = end
+
+def iter_people_records(path):
+    # Kişi kayıtlarını JSON dizisi veya JSONL dosyasından akış halinde okuyorum
+    with open(path, 'r', encoding='utf-8') as f:
+        if path.endswith('.jsonl'):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from _iter_json_array(f)
+
+def iter_registry_hashes(path):
+    # secure_*.json veya secure_*.bin kaydındaki hash'leri akış halinde okuyorum
+    if path.endswith('.bin'):
+        for digest in BinaryRegistry(path):
+            yield digest.hex()
+        return
+    with open(path, 'r') as f:
+        # Hash dizisi dosyadaki ilk '[' karakteriyle başlıyor
+        buffer = ''
+        while '[' not in buffer:
+            more = f.read(READ_BUFFER_SIZE)
+            if not more:
+                return
+            buffer += more
+        yield from _iter_json_array(f, buffer[buffer.index('['):])
+
+def iter_chunks(records, chunk_size):
+    chunk = []
+    for record in records:
+        chunk.append((record['tc_id'], record['first_name'], record['last_name'], record['age']))
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def hash_chunk(chunk):
+    # Worker process'te bir parçanın TC ve kişi hash'lerini hesaplıyorum
+    id_hashes = [hash_id(tc_id) for tc_id, _, _, _ in chunk]
+    person_hashes = [hash_person_data(tc_id, first, last, age) for tc_id, first, last, age in chunk]
+    return id_hashes, person_hashes
+
+def parallel_hash(chunks, workers):
+    # Parçaları process havuzunda hash'liyorum; sırayı koruyup en fazla workers*2 parça bekletiyorum
+    if workers <= 1:
+        for chunk in chunks:
+            yield hash_chunk(chunk)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        in_flight = deque()
+        for chunk in chunks:
+            in_flight.append(executor.submit(hash_chunk, chunk))
+            if len(in_flight) >= workers * 2:
+                yield in_flight.popleft().result()
+        while in_flight:
+            yield in_flight.popleft().result()
+
+class JsonRegistryWriter:
+    # secure_*.json dosyasını kayıtları biriktirmeden satır satır yazıyorum
+    def __init__(self, path, key):
+        self.path = path
+        self.key = key
+        self.count = 0
+        self._tmp_path = f"{path}.tmp.{os.getpid()}"
+        self._file = open(self._tmp_path, 'w')
+        self._file.write('{\n  ' + json.dumps(key) + ': [')
+
+    def write(self, hashes):
+        if not hashes:
+            return
+        prefix = '\n    ' if self.count == 0 else ',\n    '
+        self._file.write(prefix + ',\n    '.join(json.dumps(h) for h in hashes))
+        self.count += len(hashes)
+
+    def close(self):
+        self._file.write('\n  ]')
+        for name, value in registry_metadata(self.key).items():
+            self._file.write(f',\n  {json.dumps(name)}: {json.dumps(value, ensure_ascii=False)}')
+        self._file.write('\n}')
+        self._file.close()
+        os.replace(self._tmp_path, self.path)
+
+class BinaryRegistryWriter:
+    # Sıralı binary kaydı harici sıralama ile yazıyorum: sıralı parçalar geçici dosyalara,
+    # sonunda heapq.merge ile birleştirme (bellekte en fazla run_size digest tutulur)
+    def __init__(self, path, run_size=1_000_000, salt=SALT):
+        self.path = path
+        self.run_size = run_size
+        self.salt = salt
+        self.count = 0
+        self._run = []
+        self._run_paths = []
+        self._tmp_dir = tempfile.mkdtemp(prefix='registry_runs_', dir=os.path.dirname(os.path.abspath(path)))
+
+    def write(self, hashes):
+        self._run.extend(bytes.fromhex(h) for h in hashes)
+        if len(self._run) >= self.run_size:
+            self._flush_run()
+
+    def _flush_run(self):
+        if not self._run:
+            return
+        self._run.sort()
+        run_path = os.path.join(self._tmp_dir, f"run_{len(self._run_paths):05d}.bin")
+        with open(run_path, 'wb') as f:
+            f.write(b''.join(self._run))
+        self._run_paths.append(run_path)
+        self._run = []
+
+    @staticmethod
+    def _read_run(path):
+        with open(path, 'rb') as f:
+            while True:
+                block = f.read(DIGEST_SIZE * 4096)
+                if not block:
+                    return
+                for i in range(0, len(block), DIGEST_SIZE):
+                    yield block[i:i + DIGEST_SIZE]
+
+    def close(self):
+        self._flush_run()
+        self.count = write_sorted_binary(
+            self.path, heapq.merge(*(self._read_run(p) for p in self._run_paths)), self.salt
+        )
+        for run_path in self._run_paths:
+            os.remove(run_path)
+        os.rmdir(self._tmp_dir)
+
+def write_sorted_binary(path, sorted_digests, salt=SALT):
+    # Sıralı digest akışını tekrarları atarak binary kayda yazıyorum
+    salt_bytes = salt.encode()
+    tmp_path = f"{path}.tmp.{os.getpid()}"
+    with open(tmp_path, 'wb') as f:
+        # Kayıt sayısı akış sonunda belli olacak; başlığı sonra güncelliyorum
+        f.write(BINARY_HEADER.pack(BINARY_MAGIC, BINARY_VERSION, 1, 0, len(salt_bytes)))
+        f.write(salt_bytes)
+        previous = None
+        count = 0
+        for digest in sorted_digests:
+            if digest != previous:
+                f.write(digest)
+                count += 1
+                previous = digest
+        f.seek(0)
+        f.write(BINARY_HEADER.pack(BINARY_MAGIC, BINARY_VERSION, 1, count, len(salt_bytes)))
+    os.replace(tmp_path, path)
+    return count
+
+class MerkleTreeWriter:
+    # Kişi hash'lerini akış sırasıyla kayıt Merkle ağacına yaprak olarak ekliyorum
+    def __init__(self, directory, batch_size=100000):
+        from merkle_tree import open_registry_tree
+        self.tree = open_registry_tree(directory)
+        self.batch_size = batch_size
+        self.count = 0
+        self._batch = []
+        self.tree.start_build()
+
+    def write(self, hashes):
+        self._batch.extend(hashes)
+        if len(self._batch) >= self.batch_size:
+            self.tree.build_append(self._batch)
+            self._batch = []
+
+    def close(self):
+        self.tree.build_append(self._batch)
+        self._batch = []
+        self.count = self.tree.finish_build()
+        print(f"🌳 Kayıt Merkle kökü: {self.tree.root} ({self.count:,} yaprak)")
+        self.tree.close()
+        self.tree.hasher.close()
+
+def _make_writers(output_format, merkle_dir=None):
+    writers = {'hashed_ids': [], 'hashed_people': []}
+    if output_format in ('json', 'both'):
+        writers['hashed_ids'].append(JsonRegistryWriter('secure_valid_ids.json', 'hashed_ids'))
+        writers['hashed_people'].append(JsonRegistryWriter('secure_people_data.json', 'hashed_people'))
+    if output_format in ('bin', 'both'):
+        writers['hashed_ids'].append(BinaryRegistryWriter('secure_valid_ids.bin'))
+        writers['hashed_people'].append(BinaryRegistryWriter('secure_people_data.bin'))
+    if merkle_dir:
+        writers['hashed_people'].append(MerkleTreeWriter(merkle_dir))
+    return writers
+
+def build_registry(input_path='people_data.json', workers=None, chunk_size=10000,
+                   output_format='json', progress_interval=2.0, merkle_dir=None):
+    # Nüfus dosyasını akış halinde okuyup hash'leri paralel hesaplayıp kayıtları yazıyorum
+    return build_registry_from_records(iter_people_records(input_path), workers, chunk_size,
+                                       output_format, progress_interval, merkle_dir)
+
+def build_registry_from_records(records, workers=None, chunk_size=10000,
+                                output_format='json', progress_interval=2.0, merkle_dir=None):
+    # Kişi kayıtları akışından (dosya veya üretici) kayıtları oluşturuyorum
+    # merkle_dir verilirse kişi hash'lerinden kayıt Merkle ağacı da kurulur (merkle_tree.py)
+    workers = workers or os.cpu_count() or 1
+    writers = _make_writers(output_format, merkle_dir)
+    start = time.perf_counter()
+    last_report = start
+    total = 0
+
+    chunks = iter_chunks(records, chunk_size)
+    for id_hashes, person_hashes in parallel_hash(chunks, workers):
+        for writer in writers['hashed_ids']:
+            writer.write(id_hashes)
+        for writer in writers['hashed_people']:
+            writer.write(person_hashes)
+        total += len(id_hashes)
+
+        now = time.perf_counter()
+        if now - last_report >= progress_interval:
+            print(f"   {total:,} kayıt | {total / (now - start):,.0f} kayıt/saniye")
+            last_report = now
+
+    for writer_list in writers.values():
+        for writer in writer_list:
+            writer.close()
+
+    duration = time.perf_counter() - start
+    return {
+        "records": total,
+        "duration": duration,
+        "throughput": total / duration if duration > 0 else 0.0,
+        "workers": workers,
+    }
+
+def _manifest_key(tc_id):
+    # Manifest anahtarı: TC'nin pepper ile anahtarlanmış kısa parmak izi (TC açık saklanmaz)
+    return hashlib.blake2b(tc_id.encode(), digest_size=16, key=PEPPER.encode()[:64]).digest()
+
+def _record_fingerprint(tc_id, first_name, last_name, age):
+    # Kayıt içeriğinin parmak izi: değişmeyen kayıtlar tekrar SHA-256 ile hash'lenmez
+    canonical = json.dumps([tc_id, first_name, last_name, str(age)], ensure_ascii=False)
+    return hashlib.blake2b(canonical.encode(), digest_size=16, key=PEPPER.encode()[:64]).digest()
+
+def _open_manifest(path):
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS manifest ("
+        " key BLOB PRIMARY KEY, fingerprint BLOB NOT NULL,"
+        " id_hash TEXT NOT NULL, person_hash TEXT NOT NULL) WITHOUT ROWID"
+    )
+    # Manifest ile aynı transaction'da kaydedilen, yerine konmayı bekleyen kayıt dosyaları
+    conn.execute("CREATE TABLE IF NOT EXISTS staged (path TEXT PRIMARY KEY, staged_path TEXT NOT NULL)")
+    # Manifest ile güncel olan çıktılar (kayıt dosyaları, Merkle klasörü); listede olmayan çıktı
+    # bir sonraki yamada sıfırdan yazılır (ör. önceki çalıştırma başka formatla yapıldıysa)
+    conn.execute("CREATE TABLE IF NOT EXISTS targets (path TEXT PRIMARY KEY)")
+    conn.execute("CREATE TEMP TABLE seen (key BLOB PRIMARY KEY) WITHOUT ROWID")
+    return conn
+
+def _publish_staged(conn):
+    # Commit edilmiş manifest'e ait hazır kayıt dosyalarını yerine koyuyorum
+    # Önceki çalıştırma commit ile rename arasında çöktüyse burada tamamlanır (ileri sarma)
+    for path, staged_path in conn.execute("SELECT path, staged_path FROM staged").fetchall():
+        if os.path.exists(staged_path):
+            os.replace(staged_path, path)
+    conn.execute("DELETE FROM staged")
+    conn.commit()
+
+def _lookup_manifest(conn, keys):
+    # Anahtarların mevcut manifest kayıtlarını (SQLite parametre sınırına göre parça parça) okuyorum
+    rows = {}
+    for i in range(0, len(keys), 500):
+        part = keys[i:i + 500]
+        placeholders = ','.join('?' * len(part))
+        for key, fingerprint, id_hash, person_hash in conn.execute(
+            f"SELECT key, fingerprint, id_hash, person_hash FROM manifest WHERE key IN ({placeholders})", part
+        ):
+            rows[key] = (fingerprint, id_hash, person_hash)
+    return rows
+
+def _fsync_path(path):
+    with open(path, 'rb') as f:
+        os.fsync(f.fileno())
+
+def _patch_registry(path, key, removed, added, full, all_hashes):
+    # Mevcut kaydı yeniden hash'lemeden akış halinde okuyup silinenleri atıp eklenenleri yazıyorum
+    # Sonuç yerinde değil <path>.staged dosyasına yazılır; manifest commit'inden sonra yerine konur
+    # full: ilk çalıştırma veya hedef dosya yok (ör. format json'dan bin'e değişti): dosya manifest'teki
+    # tüm hash'lerle sıfırdan yazılır, sadece eklenenler yazılıp eksik kayıt oluşmaz
+    staged_path = f"{path}.staged"
+    if full:
+        writer = BinaryRegistryWriter(staged_path) if path.endswith('.bin') else JsonRegistryWriter(staged_path, key)
+        batch = []
+        for h in all_hashes():
+            batch.append(h)
+            if len(batch) >= 10000:
+                writer.write(batch)
+                batch = []
+        writer.write(batch)
+        writer.close()
+        _fsync_path(staged_path)
+        return staged_path
+
+    # Eklenenler mevcut kayıttan da atılıyor: aynı değişiklik tekrar uygulanırsa kayıt çoğalmaz
+    added_set = set(added)
+    existing = iter_registry_hashes(path)
+    if path.endswith('.bin'):
+        additions = sorted(bytes.fromhex(h) for h in added_set)
+        kept = (bytes.fromhex(h) for h in existing if h not in removed and h not in added_set)
+        write_sorted_binary(staged_path, heapq.merge(kept, additions))
+        _fsync_path(staged_path)
+        return staged_path
+    writer = JsonRegistryWriter(staged_path, key)
+    batch = []
+    for h in existing:
+        if h not in removed and h not in added_set:
+            batch.append(h)
+            if len(batch) >= 10000:
+                writer.write(batch)
+                batch = []
+    writer.write(batch)
+    writer.write(added)
+    writer.close()
+    _fsync_path(staged_path)
+    return staged_path
+
+def _patch_merkle_tree(directory, removed, added, full, all_hashes):
+    # Ağacı yeniden kurmadan güncelliyorum: silinen kişilerin yaprakları sıfırlanır,
+    # yeni kişiler sona eklenir (her değişiklik sadece köke giden yolu yeniden hash'ler)
+    # Silinip tekrar eklenen kişinin yaprağı eski sırasına geri yazılır (append sıfırlanmış yaprağı geri yükler)
+    # remove/append tekrar uygulanınca aynı sonucu verir (append ağaçta geçerli yaprağı olanı atlar)
+    from merkle_tree import open_registry_tree
+    tree = open_registry_tree(directory)
+    try:
+        if full or len(tree) == 0:
+            # Boş veya manifest'in gerisinde kalmış ağaç: manifest'teki tüm kişilerle yeniden kuruluyor
+            tree.build(all_hashes())
+        else:
+            tree.remove(removed)
+            tree.append(added)
+            tree.save()
+        return tree.root
+    finally:
+        tree.close()
+        tree.hasher.close()
+
+def incremental_update(input_path='people_data.json', manifest_path=MANIFEST_FILE, workers=None,
+                       chunk_size=10000, output_format='json', merkle_dir=None):
+    # Manifest ile karşılaştırıp sadece eklenen/değişen kayıtları hash'liyorum, silinenleri düşürüyorum
+    workers = workers or os.cpu_count() or 1
+    start = time.perf_counter()
+    conn = _open_manifest(manifest_path)
+    _publish_staged(conn)
+    bootstrap = conn.execute("SELECT COUNT(*) FROM manifest").fetchone()[0] == 0
+
+    stats = {"records": 0, "added": 0, "changed": 0, "removed": 0, "unchanged": 0}
+    removed_ids, removed_people = set(), set()
+    added_ids, added_people = [], []
+    pending_meta = deque()
+
+    def changed_chunks():
+        # Değişmeyen kayıtları burada eliyorum; process havuzuna sadece değişenler gidiyor
+        for chunk in iter_chunks(iter_people_records(input_path), chunk_size):
+            keyed = [(_manifest_key(record[0]), _record_fingerprint(*record), record) for record in chunk]
+            keys = [key for key, _, _ in keyed]
+            conn.executemany("INSERT OR IGNORE INTO seen (key) VALUES (?)", ((key,) for key in keys))
+            existing = _lookup_manifest(conn, keys)
+
+            changed = []
+            for key, fingerprint, record in keyed:
+                old = existing.get(key)
+                if old is not None and old[0] == fingerprint:
+                    stats["unchanged"] += 1
+                    continue
+                if old is not None:
+                    stats["changed"] += 1
+                    removed_ids.add(old[1])
+                    removed_people.add(old[2])
+                else:
+                    stats["added"] += 1
+                changed.append((key, fingerprint, record))
+            stats["records"] += len(chunk)
+
+            if changed:
+                pending_meta.append([(key, fingerprint) for key, fingerprint, _ in changed])
+                yield [record for _, _, record in changed]
+
+    for id_hashes, person_hashes in parallel_hash(changed_chunks(), workers):
+        meta = pending_meta.popleft()
+        conn.executemany(
+            "INSERT OR REPLACE INTO manifest (key, fingerprint, id_hash, person_hash) VALUES (?, ?, ?, ?)",
+            [(key, fp, id_hash, person_hash) for (key, fp), id_hash, person_hash in zip(meta, id_hashes, person_hashes)],
+        )
+        added_ids.extend(id_hashes)
+        added_people.extend(person_hashes)
+
+    # Girdide artık olmayan kayıtlar
+    for id_hash, person_hash in conn.execute(
+        "SELECT id_hash, person_hash FROM manifest WHERE key NOT IN (SELECT key FROM seen)"
+    ):
+        removed_ids.add(id_hash)
+        removed_people.add(person_hash)
+        stats["removed"] += 1
+    conn.execute("DELETE FROM manifest WHERE key NOT IN (SELECT key FROM seen)")
+
+    # Değişen kaydın hash'i aynı kaldıysa (ör. sadece isim değişti, TC aynı) yerinde bırakıyorum
+    for removed, added in ((removed_ids, added_ids), (removed_people, added_people)):
+        unchanged_hashes = removed.intersection(added)
+        removed -= unchanged_hashes
+        added[:] = [h for h in added if h not in unchanged_hashes]
+
+    # Bu noktada manifest (commit edilmemiş hali) girdideki kayıtların tamamını tutuyor
+    def manifest_hashes(column):
+        return lambda: (row[0] for row in conn.execute(f"SELECT {column} FROM manifest"))
+
+    changes = stats["added"] or stats["changed"] or stats["removed"] or bootstrap
+    in_sync = {path for (path,) in conn.execute("SELECT path FROM targets")}
+    extensions = {'json': ['json'], 'bin': ['bin'], 'both': ['json', 'bin']}[output_format]
+    staged = []
+    targets = []
+    for ext in extensions:
+        for path, key, removed, added, column in (
+            (f'secure_valid_ids.{ext}', 'hashed_ids', removed_ids, added_ids, 'id_hash'),
+            (f'secure_people_data.{ext}', 'hashed_people', removed_people, added_people, 'person_hash'),
+        ):
+            targets.append(path)
+            full = bootstrap or path not in in_sync or not os.path.exists(path)
+            if changes or full:
+                staged.append((path, _patch_registry(path, key, removed, added, full, manifest_hashes(column))))
+    if merkle_dir:
+        target = f"merkle:{os.path.abspath(merkle_dir)}"
+        targets.append(target)
+        full = bootstrap or target not in in_sync
+        if changes or full:
+            stats["merkle_root"] = _patch_merkle_tree(merkle_dir, removed_people, added_people, full,
+                                                      manifest_hashes('person_hash'))
+
+    # Manifest ve yerine konacak kayıt dosyaları tek transaction'da kaydediliyor; dosyalar ancak
+    # commit'ten sonra yerine konur. Arada çökme olursa sonraki çalıştırma _publish_staged ile tamamlar
+    # Bu çalıştırmada yazılmayan çıktılar artık manifest'in gerisinde kalıyor
+    conn.executemany("INSERT OR REPLACE INTO staged (path, staged_path) VALUES (?, ?)", staged)
+    conn.execute("DELETE FROM targets")
+    conn.executemany("INSERT INTO targets (path) VALUES (?)", [(path,) for path in targets])
+    conn.commit()
+    _publish_staged(conn)
+    conn.close()
+
+    stats["duration"] = time.perf_counter() - start
+    return stats
+
+def main():
+    parser = argparse.ArgumentParser(description="Güvenli kayıtları akış halinde ve paralel oluşturur")
+    parser.add_argument('--input', default='people_data.json', help="JSON dizisi veya .jsonl nüfus dosyası")
+    parser.add_argument('--workers', type=int, default=None, help="Hash process sayısı (varsayılan: CPU sayısı)")
+    parser.add_argument('--chunk-size', type=int, default=10000, help="Process'e gönderilen parça boyutu")
+    parser.add_argument('--format', choices=['json', 'bin', 'both'], default='json', help="Çıktı formatı")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Manifest ile karşılaştırıp sadece eklenen/değişen kayıtları hash'le")
+    parser.add_argument('--manifest', default=MANIFEST_FILE, help="Artımlı mod manifest dosyası")
+    parser.add_argument('--merkle', action='store_true',
+                        help="Kişi kaydının Merkle ağacını da oluştur/güncelle (kök kontrata yazılır)")
+    parser.add_argument('--merkle-dir', default=None, help="Merkle katman önbelleği klasörü")
+    args = parser.parse_args()
+    merkle_dir = None
+    if args.merkle or args.merkle_dir:
+        from merkle_tree import MERKLE_DIR
+        merkle_dir = args.merkle_dir or MERKLE_DIR
+
+    if args.incremental:
+        print(f"🔄 Artımlı güncelleme: {args.input}")
+        stats = incremental_update(args.input, args.manifest, args.workers, args.chunk_size, args.format,
+                                   merkle_dir)
+        print(f"✅ {stats['records']:,} kayıt {stats['duration']:.2f} saniyede karşılaştırıldı")
+        print(f"   ➕ Eklenen: {stats['added']:,}  ✏️ Değişen: {stats['changed']:,}  "
+              f"➖ Silinen: {stats['removed']:,}  = Değişmeyen: {stats['unchanged']:,}")
+        if 'merkle_root' in stats:
+            print(f"🌳 Kayıt Merkle kökü: {stats['merkle_root']}")
+        return
+
+    print(f"🔄 Kayıtlar oluşturuluyor: {args.input}")
+    stats = build_registry(args.input, args.workers, args.chunk_size, args.format, merkle_dir=merkle_dir)
+    print(f"✅ {stats['records']:,} kayıt {stats['duration']:.2f} saniyede hash'lendi")
+    print(f"🚀 Throughput: {stats['throughput']:,.0f} kayıt/saniye ({stats['workers']} process)")
+
+if __name__ == "__main__":
+    main()
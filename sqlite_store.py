@@ -0,0 +1,230 @@
+import os
+import sqlite3
+import threading
+import time
+from dotenv import load_dotenv
+
+# .env dosyasını yükle
+load_dotenv()
+
+# Kayıtlar (secure_valid_ids / secure_people_data) ve oy vermiş hash'ler için SQLite depolama
+# WAL modunda okuyucular yazıcıyı beklemez; her thread kendi bağlantısını kullanır
+SQLITE_DB = os.getenv('SQLITE_DB', 'zkp_voting.sqlite')
+# FULL: her commit fsync edilir (log modundaki group commit ile aynı dayanıklılık)
+# NORMAL: WAL checkpoint'inde fsync (process çökmesine dayanıklı, elektrik kesintisinde son işlemler kaybolabilir)
+SQLITE_SYNCHRONOUS = os.getenv('SQLITE_SYNCHRONOUS', 'FULL')
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', '30000'))
+
+REGISTRY_TABLES = {
+    "hashed_ids": "registry_ids",
+    "hashed_people": "registry_people",
+}
+
+SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS registry_ids (digest BLOB PRIMARY KEY) WITHOUT ROWID",
+    "CREATE TABLE IF NOT EXISTS registry_people (digest BLOB PRIMARY KEY) WITHOUT ROWID",
+    "CREATE TABLE IF NOT EXISTS voted (digest BLOB PRIMARY KEY, voted_at REAL NOT NULL) WITHOUT ROWID",
+    "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)",
+)
+
+class SqliteDatabase:
+    # Thread başına bir bağlantı (sqlite3 bağlantıları thread'ler arası paylaşılmamalı)
+    def __init__(self, path=SQLITE_DB):
+        self.path = path
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+        self._schema_ready = False
+
+    def connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            # isolation_level=None: her sorgu kendi işlemi, toplu işlemler için açık BEGIN kullanılır
+            conn = sqlite3.connect(self.path, timeout=SQLITE_BUSY_TIMEOUT_MS / 1000,
+                                   isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(f"PRAGMA synchronous={SQLITE_SYNCHRONOUS}")
+            conn.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+            if not self._schema_ready:
+                for statement in SCHEMA:
+                    conn.execute(statement)
+                self._schema_ready = True
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    def get_meta(self, key, default=None):
+        row = self.connection().execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def set_meta(self, key, value, conn=None):
+        (conn or self.connection()).execute(
+            "INSERT INTO meta (key, value) VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+            (key, str(value)),
+        )
+
+    def close(self):
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            conn.close()
+        self._local = threading.local()
+
+class SqliteRegistry:
+    # RegistryVerifier ile aynı arayüz: aramalar birincil anahtar index'i üzerinden yapılır
+    def __init__(self, db, key):
+        self.db = db
+        self.key = key
+        self.table = REGISTRY_TABLES[key]
+        self.reload_count = 0
+
+    def warm_up(self, background=True):
+        # Bağlantıyı açıp sayfaları önbelleğe almak için tek bir sorgu çalıştırıyorum
+        if not background:
+            len(self)
+            return None
+        thread = threading.Thread(target=len, args=(self,), daemon=True)
+        thread.start()
+        return thread
+
+    def contains_digest(self, digest):
+        row = self.db.connection().execute(
+            f"SELECT 1 FROM {self.table} WHERE digest = ?", (digest,)
+        ).fetchone()
+        return row is not None
+
+    def __contains__(self, digest):
+        return self.contains_digest(digest)
+
+    def snapshot(self):
+        # Toplu aramalarda `digest in index` için kendini döndürüyor (aramalar tutarlı okuma yapar)
+        return self
+
+    def contains(self, hex_hash):
+        try:
+            return self.contains_digest(bytes.fromhex(hex_hash))
+        except ValueError:
+            return False
+
+    def __len__(self):
+        # Sayı içe aktarımda meta tablosuna yazılıyor (COUNT(*) tüm tabloyu tarar)
+        count = self.db.get_meta(f"{self.table}_count")
+        if count is None:
+            return self.db.connection().execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+        return int(count)
+
+class SqliteVoteStore:
+    # Oy vermiş hash'ler: çifte oy kontrolü tek INSERT ... ON CONFLICT DO NOTHING ifadesi
+    # Ekleme zaten atomik olduğu için try_claim_vote'un şeritli kilitlerine gerek yok
+    needs_claim_lock = False
+
+    def __init__(self, db):
+        self.db = db
+
+    def contains(self, tc_hash):
+        row = self.db.connection().execute(
+            "SELECT 1 FROM voted WHERE digest = ?", (bytes.fromhex(tc_hash),)
+        ).fetchone()
+        return row is not None
+
+    def add(self, tc_hash):
+        cursor = self.db.connection().execute(
+            "INSERT INTO voted (digest, voted_at) VALUES (?, ?) ON CONFLICT(digest) DO NOTHING",
+            (bytes.fromhex(tc_hash), time.time()),
+        )
+        return cursor.rowcount == 1
+
+    def discard(self, tc_hash):
+        self.db.connection().execute("DELETE FROM voted WHERE digest = ?", (bytes.fromhex(tc_hash),))
+
+    def count(self):
+        return self.db.connection().execute("SELECT COUNT(*) FROM voted").fetchone()[0]
+
+    def all_hashes(self):
+        return [row[0].hex() for row in self.db.connection().execute("SELECT digest FROM voted")]
+
+    def lock_key(self, tc_hash):
+        return None
+
+    def reset(self):
+        self.db.connection().execute("DELETE FROM voted")
+
+_database = None
+_database_lock = threading.Lock()
+
+def get_database():
+    # Process içinde paylaşılan veritabanı (bağlantılar thread başına açılır)
+    global _database
+    if _database is None:
+        with _database_lock:
+            if _database is None:
+                _database = SqliteDatabase()
+    return _database
+
+def _insert_digests(conn, table, hex_hashes, batch_size=10000):
+    count = 0
+    batch = []
+    for h in hex_hashes:
+        batch.append((bytes.fromhex(h),))
+        if len(batch) >= batch_size:
+            conn.executemany(f"INSERT INTO {table} (digest) VALUES (?) ON CONFLICT(digest) DO NOTHING", batch)
+            count += len(batch)
+            batch = []
+    if batch:
+        conn.executemany(f"INSERT INTO {table} (digest) VALUES (?) ON CONFLICT(digest) DO NOTHING", batch)
+        count += len(batch)
+    return count
+
+def import_existing_files(db=None, ids_path='secure_valid_ids.json', people_path='secure_people_data.json'):
+    # Mevcut JSON (veya .bin) kayıtlarını ve oy vermiş hash'leri tek seferde veritabanına aktarıyorum
+    # Kayıt tabloları baştan yazılır; oy kayıtları mevcut olanlarla birleştirilir
+    from registry_builder import iter_registry_hashes
+    from voted_tc_tracker import SALT, _load_all_voted_hashes
+
+    db = db or get_database()
+    conn = db.connection()
+    counts = {}
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        for path, key in ((ids_path, 'hashed_ids'), (people_path, 'hashed_people')):
+            table = REGISTRY_TABLES[key]
+            conn.execute(f"DELETE FROM {table}")
+            _insert_digests(conn, table, iter_registry_hashes(path))
+            # Aynı hash iki kez geçebilir: sayıyı tablodan alıyorum
+            counts[table] = conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+            db.set_meta(f"{table}_count", counts[table], conn)
+
+        voted_hashes, _ = _load_all_voted_hashes()
+        now = time.time()
+        before = conn.execute("SELECT COUNT(*) FROM voted").fetchone()[0]
+        conn.executemany(
+            "INSERT INTO voted (digest, voted_at) VALUES (?, ?) ON CONFLICT(digest) DO NOTHING",
+            ((bytes.fromhex(h), now) for h in voted_hashes),
+        )
+        counts["voted"] = conn.execute("SELECT COUNT(*) FROM voted").fetchone()[0] - before
+        db.set_meta("salt", SALT, conn)
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    return counts
+
+if __name__ == "__main__":
+    import sys
+
+    command = sys.argv[1] if len(sys.argv) > 1 else 'stats'
+    db = get_database()
+    if command == 'import':
+        print(f"🔄 Mevcut dosyalar {db.path} veritabanına aktarılıyor...")
+        for table, count in import_existing_files(db).items():
+            print(f"✅ {table}: {count:,} kayıt")
+    elif command == 'stats':
+        conn = db.connection()
+        for table in ('registry_ids', 'registry_people', 'voted'):
+            count = conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+            print(f"📊 {table}: {count:,} kayıt")
+        print(f"📝 journal_mode: {conn.execute('PRAGMA journal_mode').fetchone()[0]}")
+    else:
+        print("Kullanım: python3 sqlite_store.py [import|stats]")
+        sys.exit(1)
@@ -1,30 +1,34 @@
+import argparse
 import time
-import json
 import random
 from concurrent.futures import ThreadPoolExecutor
 import threading
-from hash_utils import is_valid_person
+import metrics
+from benchmark import build_report, print_report, save_reports
+from hash_utils import is_valid_person, warm_up_verifiers
+from population import add_sampler_arguments, load_sampler, sampler_options
 
 class VotingStressTest:
-    def __init__(self, num_users=1000):
+    def __init__(self, num_users=1000, warmup=0, sampler_options=None):
         self.num_users = num_users
+        self.warmup = warmup  # Rapora katılmayan ilk (ısınma) istek sayısı
+        self.reports = []
         self.results = []
         self.lock = threading.Lock()
         self.success_count = 0
         self.error_count = 0
         self.start_time = None
         self.end_time = None
+        # Kişiler bir kez belleğe alınır; oy başına dosya okunmaz
+        self.sampler = load_sampler(**(sampler_options or {}))
         
     def generate_test_data(self):
-        # Test için rastgele kişi verisi seçiyorum
-        with open('people_data.json', 'r', encoding='utf-8') as f:
-            people_data = json.load(f)
-        
-        # Rastgele kişi seç
-        return random.choice(people_data)
+        # Test için örnekleyiciden kişi verisi seçiyorum
+        return self.sampler.sample()
     
     def simulate_vote(self, user_id):
         # Tek bir oy verme işlemini simüle ediyorum
+        start = time.perf_counter()
         try:
             # Test verisi oluştur
             person = self.generate_test_data()
@@ -44,7 +48,8 @@ class VotingStressTest:
                     'user_id': user_id,
                     'status': 'error',
                     'error': 'Invalid person data',
-                    'timestamp': time.time()
+                    'timestamp': time.time(),
+                    'latency': time.perf_counter() - start
                 }
             
             # Çifte oy kontrolü (basit simülasyon)
@@ -62,7 +67,8 @@ class VotingStressTest:
                 'status': 'success',
                 'tc_id': tc_id,
                 'vote_choice': vote_choice,
-                'timestamp': time.time()
+                'timestamp': time.time(),
+                'latency': time.perf_counter() - start
             }
             
         except Exception as e:
@@ -72,7 +78,8 @@ class VotingStressTest:
                 'user_id': user_id,
                 'status': 'error',
                 'error': str(e),
-                'timestamp': time.time()
+                'timestamp': time.time(),
+                'latency': time.perf_counter() - start
             }
     
     def run_sequential_test(self):
@@ -134,7 +141,9 @@ class VotingStressTest:
     def print_results(self, test_name):
         # Test sonuçlarını yazdırıyorum
         duration = self.end_time - self.start_time
-        throughput = self.num_users / duration
+        throughput = self.num_users / duration if duration > 0 else 0.0
+        report = build_report(test_name, self.results, duration, self.warmup)
+        self.reports.append(report)
         
         print(f"\n📊 {test_name} Sonuçları:")
         print(f"   ⏱️  Toplam Süre: {duration:.2f} saniye")
@@ -143,6 +152,12 @@ class VotingStressTest:
         print(f"   ❌ Hatalı: {self.error_count}")
         print(f"   🚀 Throughput: {throughput:.2f} oy/saniye")
         print(f"   📈 Ortalama Süre: {duration/self.num_users:.3f} saniye/oy")
+        print_report(report)
+        if metrics.is_enabled() and metrics.snapshot()["stages"]:
+            # Uygulamadaki ölçüm noktaları (hash, kayıt araması, oy kaydı yazma...) testte de toplanır
+            report["stages"] = metrics.snapshot()["stages"]
+            print(f"\n⏱️  Aşama Süreleri:")
+            metrics.print_stage_summary(report["stages"])
         
         # Hata analizi
         if self.error_count > 0:
@@ -163,9 +178,10 @@ class VotingStressTest:
                 vote_distribution[result['vote_choice']] += 1
         
         print(f"\n🗳️ Oy Dağılımı:")
-        print(f"   🔴 Kırmızı: {vote_distribution[0]} ({vote_distribution[0]/self.success_count*100:.1f}%)")
-        print(f"   🔵 Mavi: {vote_distribution[1]} ({vote_distribution[1]/self.success_count*100:.1f}%)")
-        print(f"   🟢 Yeşil: {vote_distribution[2]} ({vote_distribution[2]/self.success_count*100:.1f}%)")
+        success_total = self.success_count or 1  # Hiç başarılı oy yoksa sıfıra bölmeyi önle
+        print(f"   🔴 Kırmızı: {vote_distribution[0]} ({vote_distribution[0]/success_total*100:.1f}%)")
+        print(f"   🔵 Mavi: {vote_distribution[1]} ({vote_distribution[1]/success_total*100:.1f}%)")
+        print(f"   🟢 Yeşil: {vote_distribution[2]} ({vote_distribution[2]/success_total*100:.1f}%)")
     
     def reset(self):
         # Test sonuçlarını sıfırlıyorum
@@ -174,14 +190,26 @@ class VotingStressTest:
         self.error_count = 0
         self.start_time = None
         self.end_time = None
+        self.sampler.reset()
+        metrics.registry.reset()
 
 def main():
+    parser = argparse.ArgumentParser(description="Simülasyon stress testi")
+    parser.add_argument('--users', type=int, default=1000, help="Kullanıcı sayısı")
+    parser.add_argument('--warmup', type=int, default=50, help="Rapora katılmayan ısınma isteği sayısı")
+    parser.add_argument('--json', help="Sonuçların yazılacağı JSON dosyası (benchmark.py compare ile karşılaştırılır)")
+    add_sampler_arguments(parser)
+    args = parser.parse_args()
+
     print("🧪 ZKP Oylama Sistemi Stress Test")
     print("=" * 50)
     
+    # Kayıt index'lerini test süresine katmamak için önceden yüklüyorum
+    warm_up_verifiers(background=False)
+    
     # Test parametreleri
-    num_users = 1000
-    test = VotingStressTest(num_users)
+    num_users = args.users
+    test = VotingStressTest(num_users, warmup=args.warmup, sampler_options=sampler_options(args))
     
     print(f"📋 Test Parametreleri:")
     print(f"   👥 Kullanıcı Sayısı: {num_users}")
@@ -221,6 +249,10 @@ def main():
         print("❌ Geçersiz seçim!")
         return
     
+    if args.json:
+        save_reports(test.reports, args.json)
+        print(f"\n💾 Sonuçlar kaydedildi: {args.json}")
+    
     print(f"\n✅ Stress test tamamlandı!")
     print(f"💡 Gerçek sistemde blockchain işlemleri daha yavaş olabilir")
 
@@ -0,0 +1,115 @@
+import threading
+import time
+
+# Tüm oturumların paylaştığı canlı oy sayaçları
+# Başarılı oylarla artımlı güncellenir, kontrat durumu (red, blue, green, totalVoters) ile uzlaştırılır
+# Okumalar O(1): değişmeyen sözlüğün referansı döndürülür, okuyucular kilit beklemez
+
+TALLY_FIELDS = ('red', 'blue', 'green', 'totalVoters')
+CHOICE_FIELDS = {0: 'red', 1: 'blue', 2: 'green'}
+
+class TallyStore:
+    def __init__(self, fetch_state=None, ttl=2.0):
+        # fetch_state: kontrattaki güncel sayaçları döndüren fonksiyon (ör. worker.state)
+        #              TTL dolunca en fazla bir thread tarafından arka planda çağrılır
+        self.fetch_state = fetch_state
+        self.ttl = ttl
+        self._cond = threading.Condition()
+        self._reconcile_lock = threading.Lock()
+        self._snapshot = dict.fromkeys(TALLY_FIELDS, 0)
+        self.version = 0
+        self.updated_at = 0.0
+        self.reconciled_at = 0.0
+        self.reconcile_count = 0
+        self.drift_corrections = 0
+
+    def _publish(self, counts):
+        # Yeni sayaçları tek referans ataması ile yayınlayıp bekleyenleri uyandırıyorum
+        with self._cond:
+            self._snapshot = counts
+            self.version += 1
+            self.updated_at = time.time()
+            self._cond.notify_all()
+
+    def record_vote(self, choice):
+        # Kontrat durumu bilinmeyen başarılı oy (ör. simülasyon): yerel olarak artırıyorum
+        with self._cond:
+            counts = dict(self._snapshot)
+            counts[CHOICE_FIELDS[choice]] += 1
+            counts['totalVoters'] += 1
+            self._publish(counts)
+
+    def reconcile(self, state, authoritative=False):
+        # Kontrat durumu esas: farklıysa yerel sayaçları onunla değiştiriyorum
+        # Oy sonuçları sırasız gelebilir: eski bir durum (toplam oy daha az) yenisinin üzerine yazılmaz
+        # authoritative=True (doğrudan kontrattan okuma) ise geri gitmeye de izin var (ör. yeniden deploy)
+        counts = {field: int(state[field]) for field in TALLY_FIELDS}
+        with self._cond:
+            self.reconciled_at = time.monotonic()
+            self.reconcile_count += 1
+            current = self._snapshot
+            if counts == current:
+                return False
+            if counts['totalVoters'] < current['totalVoters'] and not authoritative:
+                return False
+            if counts['totalVoters'] <= current['totalVoters']:
+                # Yerel sayaçlar kontrattan sapmış (ör. kaydedilmeyen yerel artış veya sıfırlanan kontrat)
+                self.drift_corrections += 1
+            self._publish(counts)
+            return True
+
+    def on_commit(self, job, result):
+        # VotePipeline commit aşaması için: sonuçta kontrat durumu varsa onu, yoksa seçimi kullanıyorum
+        state = result.get('state') if isinstance(result, dict) else None
+        if state:
+            self.reconcile(state)
+        else:
+            self.record_vote(job.choice)
+
+    def _maybe_refresh(self):
+        # TTL dolduysa kontratı arka planda tek bir thread ile okuyorum (izleyici başına okuma yok)
+        if self.fetch_state is None or time.monotonic() - self.reconciled_at < self.ttl:
+            return
+        if not self._reconcile_lock.acquire(blocking=False):
+            return
+        self.reconciled_at = time.monotonic()
+        threading.Thread(target=self._refresh, daemon=True).start()
+
+    def _refresh(self):
+        try:
+            state = self.fetch_state()
+            if state:
+                self.reconcile(state, authoritative=True)
+        except Exception:
+            # Kontrat okunamadı (ör. worker başlıyor): yerel sayaçlarla devam, TTL sonra tekrar dener
+            pass
+        finally:
+            self._reconcile_lock.release()
+
+    def snapshot(self):
+        # Güncel sayaçlar (değiştirilmemesi gereken paylaşılan sözlük)
+        self._maybe_refresh()
+        return self._snapshot
+
+    def poll(self, since_version):
+        # Bekletmeyen sorgu: değişiklik varsa (versiyon, sayaçlar), yoksa None
+        self._maybe_refresh()
+        if self.version == since_version:
+            return None
+        with self._cond:
+            return self.version, self._snapshot
+
+    def wait_for_change(self, since_version, timeout=None):
+        # Uzun sorgu: versiyon since_version'dan büyük olana veya süre dolana kadar bekliyorum
+        self._maybe_refresh()
+        with self._cond:
+            self._cond.wait_for(lambda: self.version != since_version, timeout)
+            return self.version, self._snapshot
+
+    def stats(self):
+        return {
+            "version": self.version,
+            "updated_at": self.updated_at,
+            "reconcile_count": self.reconcile_count,
+            "drift_corrections": self.drift_corrections,
+        }
@@ -0,0 +1,32 @@
+from hashlib import sha256
+
+from merkle_tree import RegistryMerkleTree, get_hasher
+
+# Kayıttan silinip tekrar eklenen kişi aynı yaprağıyla geri gelmeli (registry_builder._patch_merkle_tree)
+
+def digest(name):
+    return sha256(name.encode()).digest()
+
+def valid_witness(tree, person):
+    found = tree.witness_for_digest(digest(person))
+    return found is not None and tree.calculate_root(*found) == tree.root
+
+def test_removed_person_is_restored_on_append(tmp_path):
+    tree = RegistryMerkleTree(str(tmp_path / 'tree'), height=8, hasher=get_hasher('sha256'))
+    try:
+        tree.build([digest('A'), digest('C')])
+        # A,C -> B,C -> A,C
+        tree.remove([digest('A')])
+        tree.append([digest('B')])
+        assert not valid_witness(tree, 'A')
+        tree.remove([digest('B')])
+        assert tree.append([digest('A')]) == 1
+        assert valid_witness(tree, 'A')
+        assert valid_witness(tree, 'C')
+        assert not valid_witness(tree, 'B')
+        # Eski sırasına yazılır, ağaç büyümez
+        assert len(tree) == 3
+        # Ağaçta geçerli yaprağı olan kişi tekrar eklenmez
+        assert tree.append([digest('A'), digest('C')]) == 0
+    finally:
+        tree.close()
@@ -0,0 +1,129 @@
+import threading
+import time
+from concurrent.futures import Future
+
+import pytest
+
+import vote_pipeline
+import voted_tc_tracker
+from reduce_scheduler import ReduceScheduler
+from vote_pipeline import PipelineError, VotePipeline, batcher_submit
+from vote_worker_client import VoteWorkerError
+
+# Başarısız rollup'tan sonra oylar bekleyen sayılmaya devam etmeli, rollup beklemeyle tekrar denenmeli
+
+class FakeWorker:
+    # concurrent_vote_worker gibi: castVote aksiyon ekler, rollup hepsini işler (sınır aşılırsa hata)
+    def __init__(self, failures=0, max_pending=8):
+        self.failures = failures
+        self.max_pending = max_pending
+        self.actions = 0
+        self.max_actions = 0
+        self.rollup_times = []
+        self.lock = threading.Lock()
+
+    def submit(self, op, **payload):
+        future = Future()
+        with self.lock:
+            if op == 'castVote':
+                self.actions += 1
+                self.max_actions = max(self.max_actions, self.actions)
+                future.set_result({"state": None})
+            elif op == 'rollup':
+                self.rollup_times.append(time.monotonic())
+                if self.failures or self.actions > self.max_pending:
+                    self.failures = max(0, self.failures - 1)
+                    future.set_exception(VoteWorkerError("rollup başarısız"))
+                else:
+                    reduced, self.actions = self.actions, 0
+                    future.set_result({"reduced": reduced})
+        return future
+
+def cast(scheduler):
+    return scheduler.submit(0, 1, 1, 1, 1)
+
+def wait_until(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+def test_failed_rollup_keeps_votes_pending():
+    worker = FakeWorker(failures=1)
+    scheduler = ReduceScheduler(worker, backlog=4, interval=60, max_pending=8, retry_delay=0.3)
+    try:
+        for _ in range(4):
+            cast(scheduler)
+        wait_until(lambda: scheduler.get_stats()["rollup_failures"] == 1)
+        assert scheduler.get_stats()["pending"] == 4
+
+        # Bekleme süresinde 4 oy daha gönderilebilir, sonrakiler sınırda bekletilir
+        for _ in range(4):
+            cast(scheduler)
+        blocked = threading.Thread(target=cast, args=(scheduler,))
+        blocked.start()
+        blocked.join(0.1)
+        assert blocked.is_alive()
+
+        wait_until(lambda: scheduler.get_stats()["rollups"] == 1)
+        blocked.join(5)
+        assert not blocked.is_alive()
+        assert worker.max_actions <= 8
+        assert worker.rollup_times[1] - worker.rollup_times[0] >= 0.3
+    finally:
+        scheduler.close()
+    stats = scheduler.get_stats()
+    assert stats["reduced"] == 9
+    assert stats["pending"] == 0
+
+def test_rollup_retry_backs_off():
+    worker = FakeWorker(failures=100)
+    scheduler = ReduceScheduler(worker, backlog=1, interval=60, max_pending=8, retry_delay=0.05)
+    try:
+        cast(scheduler)
+        time.sleep(0.5)
+    finally:
+        scheduler.close()
+    # 0.05, 0.1, 0.2 ... sn aralıklarla: sıkı döngüde yüzlerce deneme yerine birkaç deneme
+    gaps = [b - a for a, b in zip(worker.rollup_times, worker.rollup_times[1:])]
+    assert 2 <= len(worker.rollup_times) <= 5
+    assert all(later > earlier for earlier, later in zip(gaps, gaps[1:]))
+    assert scheduler.get_stats()["pending"] == 1
+
+def test_throttled_submit_does_not_block_pipeline(tmp_path, monkeypatch):
+    # Sınırdaki zamanlayıcıda bekleyen oy, diğer oyların verify/claim/witness aşamalarını durdurmamalı
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(voted_tc_tracker, 'STORAGE_BACKEND', 'file')
+    monkeypatch.setattr(voted_tc_tracker, 'VOTE_STORAGE', 'json')
+    monkeypatch.setattr(voted_tc_tracker, 'VOTE_BLOOM', False)
+    monkeypatch.setattr(voted_tc_tracker, '_vote_store', None)
+    monkeypatch.setattr(vote_pipeline, 'is_valid_person', lambda *args: True)
+
+    worker = FakeWorker(failures=100, max_pending=2)
+    scheduler = ReduceScheduler(worker, backlog=2, interval=60, max_pending=2, retry_delay=60)
+    pipeline = VotePipeline(batcher_submit(scheduler)).start_background()
+    first = second = None
+    try:
+        cast(scheduler)
+        cast(scheduler)
+        wait_until(lambda: scheduler.get_stats()["rollup_failures"] == 1)
+
+        first = pipeline.submit_threadsafe('11111111111', 'Ali', 'Veli', 30, 0)
+        wait_until(lambda: scheduler.get_stats()["throttled"] == 1)
+        # İlk oy gönderimde beklerken ikinci oy aşamalardan geçmeye devam eder
+        second = pipeline.submit_threadsafe('22222222222', 'Ayşe', 'Kaya', 40, 1)
+        wait_until(lambda: scheduler.get_stats()["throttled"] == 2)
+        assert pipeline.get_stats()["stages"]["witness"]["processed"] == 2
+        assert not first.done() and not second.done()
+        # Bekleyen gönderimler sayaç kilidini tutmuyor
+        assert scheduler.get_stats()["pending"] == 2
+    finally:
+        # Kapanış bekleyen gönderimleri reddeder
+        scheduler.close()
+        for future in (first, second):
+            if future is None:
+                continue
+            with pytest.raises(PipelineError) as error:
+                future.result(5)
+            assert error.value.stage == 'submit'
+        pipeline.close_background()
@@ -0,0 +1,93 @@
+import asyncio
+
+import pytest
+
+import vote_pipeline
+import voted_tc_tracker
+from nullifier_set import NullifierSpent
+from vote_pipeline import PipelineError, VotePipeline, nullifier_submit
+from vote_worker_client import VoteWorkerTimeout
+from voted_tc_tracker import has_voted
+
+# Pipeline'da oy zincire ulaşmadan başarısız olursa ayrılan oy hakkı geri bırakılmalı
+
+TC_ID = '12345678901'
+
+@pytest.fixture(autouse=True)
+def vote_store(tmp_path, monkeypatch):
+    # Her test kendi JSON oy deposunu kullanır, kişi doğrulaması her zaman başarılı
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(voted_tc_tracker, 'STORAGE_BACKEND', 'file')
+    monkeypatch.setattr(voted_tc_tracker, 'VOTE_STORAGE', 'json')
+    monkeypatch.setattr(voted_tc_tracker, 'VOTE_BLOOM', False)
+    monkeypatch.setattr(voted_tc_tracker, '_vote_store', None)
+    monkeypatch.setattr(vote_pipeline, 'is_valid_person', lambda *args: True)
+
+def run_vote(submit):
+    async def run():
+        pipeline = VotePipeline(submit, timeouts={'submit': 0.2})
+        try:
+            return await pipeline.submit_vote(TC_ID, 'Ali', 'Veli', 30, 1)
+        finally:
+            await pipeline.close()
+    return asyncio.run(run())
+
+async def ok_submit(ballot):
+    return {"state": None}
+
+def test_success_keeps_claim():
+    run_vote(ok_submit)
+    assert has_voted(TC_ID)
+
+def test_witness_error_releases_claim(monkeypatch):
+    def broken_ballot(*args):
+        raise TypeError('bozuk girdi')
+    monkeypatch.setattr(vote_pipeline, 'build_ballot', broken_ballot)
+    with pytest.raises(PipelineError) as error:
+        run_vote(ok_submit)
+    assert error.value.stage == 'witness'
+    assert not has_voted(TC_ID)
+
+def test_submit_error_releases_claim():
+    async def broken_submit(ballot):
+        raise RuntimeError('worker çöktü')
+    with pytest.raises(PipelineError) as error:
+        run_vote(broken_submit)
+    assert error.value.stage == 'submit'
+    assert not has_voted(TC_ID)
+    # Hak geri bırakıldığı için kişi tekrar oy verebilir
+    run_vote(ok_submit)
+    assert has_voted(TC_ID)
+
+def test_submit_timeout_keeps_claim():
+    # Sonuç bilinmiyor: oy zincire ulaşmış olabilir, hak bırakılmaz
+    async def slow_submit(ballot):
+        raise VoteWorkerTimeout('cevap yok')
+    with pytest.raises(PipelineError) as error:
+        run_vote(slow_submit)
+    assert error.value.reason == 'timeout'
+    assert has_voted(TC_ID)
+
+class FakeVoter:
+    def __init__(self, spent=False):
+        self.spent = spent
+        self.ballots = []
+
+    def vote_ballot(self, *ballot):
+        if self.spent:
+            raise NullifierSpent("Bu TC kimlik numarası daha önce oy vermiş")
+        self.ballots.append(ballot)
+        return {"state": None}
+
+def test_nullifier_submit_sends_ballot():
+    voter = FakeVoter()
+    run_vote(nullifier_submit(voter))
+    assert len(voter.ballots) == 1
+    assert has_voted(TC_ID)
+
+def test_spent_nullifier_keeps_claim():
+    # Nullifier zincirde harcanmış: kişi gerçekten oy vermiş, hak bırakılmaz
+    with pytest.raises(PipelineError) as error:
+        run_vote(nullifier_submit(FakeVoter(spent=True)))
+    assert error.value.reason == 'already_voted'
+    assert has_voted(TC_ID)
@@ -0,0 +1,111 @@
+import threading
+import time
+from concurrent.futures import Future
+
+from vote_worker_client import VoteWorkerError
+
+# Voting.ts içindeki BATCH_SIZE ile aynı olmalı
+BATCH_SIZE = 8
+
+class VoteMicroBatcher:
+    # Gelen oyları toplayıp Voting.batchVote ile tek işlemde gönderiyorum
+    # Batch dolunca veya ilk oyun bekleme süresi (max_delay) dolunca gönderilir
+    def __init__(self, worker, max_batch_size=BATCH_SIZE, max_delay=0.05, timeout=60):
+        if not 1 <= max_batch_size <= BATCH_SIZE:
+            raise ValueError(f"max_batch_size 1 ile {BATCH_SIZE} arasında olmalı")
+        self.worker = worker
+        self.max_batch_size = max_batch_size
+        self.max_delay = max_delay
+        self.timeout = timeout
+        self._cond = threading.Condition()
+        self._queue = []
+        self._oldest = None
+        self._closed = False
+        self.batches_sent = 0
+        self.ballots_sent = 0
+        self.fallback_count = 0
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, choice, person_hash, age_proof, person_proof, vote_proof):
+        # Oyu kuyruğa ekleyip sonucu (güncel sayaçlar) Future olarak döndürüyorum
+        future = Future()
+        with self._cond:
+            if self._closed:
+                raise VoteWorkerError("Batcher kapatıldı")
+            if not self._queue:
+                self._oldest = time.monotonic()
+            self._queue.append(((choice, person_hash, age_proof, person_proof, vote_proof), future))
+            self._cond.notify()
+        return future
+
+    def _take_batch(self):
+        # Gönderilecek batch'i bekleyip kuyruktan alıyorum
+        with self._cond:
+            while True:
+                if self._queue:
+                    if len(self._queue) >= self.max_batch_size or self._closed:
+                        break
+                    remaining = self._oldest + self.max_delay - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                elif self._closed:
+                    return None
+                else:
+                    self._cond.wait()
+
+            batch = self._queue[:self.max_batch_size]
+            self._queue = self._queue[self.max_batch_size:]
+            self._oldest = time.monotonic() if self._queue else None
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._take_batch()
+            if batch is None:
+                return
+            self._flush(batch)
+
+    def _flush(self, batch):
+        ballots = [ballot for ballot, _ in batch]
+        try:
+            if len(batch) == 1:
+                result = self.worker.vote(*ballots[0], timeout=self.timeout)
+            else:
+                result = self.worker.batch_vote(ballots, timeout=self.timeout)
+        except VoteWorkerError as e:
+            if len(batch) == 1 or not self._is_ballot_error(e):
+                for _, future in batch:
+                    future.set_exception(e)
+                return
+            # Tek bir geçersiz oy tüm batch'i düşürür: oyları tek tek gönderip hatalıyı ayırıyorum
+            self.fallback_count += 1
+            for ballot, future in batch:
+                try:
+                    future.set_result(self.worker.vote(*ballot, timeout=self.timeout))
+                except Exception as single_error:
+                    future.set_exception(single_error)
+            return
+        except Exception as e:
+            # Beklenmeyen hata (ör. bozuk yanıt) flush thread'ini durdurmasın: sadece bu batch hata alır
+            for _, future in batch:
+                future.set_exception(e)
+            return
+
+        self.batches_sent += 1
+        self.ballots_sent += len(batch)
+        for _, future in batch:
+            future.set_result(result)
+
+    @staticmethod
+    def _is_ballot_error(error):
+        # Kontrat assertion'ı (zaman aşımı veya worker çökmesi değil)
+        return type(error) is VoteWorkerError
+
+    def close(self):
+        # Kuyruktaki oyları gönderip thread'i durduruyorum
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join()
@@ -0,0 +1,331 @@
+import asyncio
+import functools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import metrics
+from hash_utils import hash_person_data, is_valid_person
+from nullifier_set import NullifierSpent
+from vote_worker_client import VoteWorkerError, VoteWorkerTimeout
+from voted_tc_tracker import release_vote, try_claim_vote
+
+# Oy akışını aşamalara bölen asyncio pipeline'ı:
+#   verify -> claim -> witness -> submit -> commit
+# Her aşamanın sınırlı bir kuyruğu, eşzamanlılık limiti ve zaman aşımı var
+# Kuyruk dolunca bir önceki aşama (ve en sonda submit_vote çağıran) bekler: backpressure
+# Yüzlerce oy aynı anda işlenirken oy başına thread açılmaz
+
+STAGES = ('verify', 'claim', 'witness', 'submit', 'commit')
+
+DEFAULT_CONCURRENCY = {
+    'verify': 8,
+    'claim': 8,
+    'witness': 4,
+    'submit': 64,
+    'commit': 4,
+}
+
+DEFAULT_TIMEOUTS = {
+    'verify': 5.0,
+    'claim': 10.0,
+    'witness': 5.0,
+    'submit': 60.0,
+    'commit': 5.0,
+}
+
+class PipelineError(Exception):
+    # reason: 'invalid_person', 'already_voted', 'rejected' (kontrat reddetti),
+    # 'timeout' (aşama süresinde bitmedi) veya 'error'
+    def __init__(self, stage, reason, message, cause=None):
+        super().__init__(message)
+        self.stage = stage
+        self.reason = reason
+        self.cause = cause
+
+class VoteJob:
+    # Pipeline boyunca taşınan tek bir oy
+    def __init__(self, tc_id, first_name, last_name, age, choice, future):
+        self.tc_id = tc_id
+        self.first_name = first_name
+        self.last_name = last_name
+        self.age = age
+        self.choice = choice
+        self.future = future
+        self.ballot = None
+        self.result = None
+        self.claimed = False
+        self.created = time.perf_counter()
+        self.stage_seconds = {}
+
+class StageStats:
+    def __init__(self):
+        self.processed = 0
+        self.failed = 0
+        self.timeouts = 0
+        self.in_flight = 0
+        self.total_seconds = 0.0
+
+    def as_dict(self, queued):
+        return {
+            "processed": self.processed,
+            "failed": self.failed,
+            "timeouts": self.timeouts,
+            "in_flight": self.in_flight,
+            "queued": queued,
+            "avg_seconds": self.total_seconds / self.processed if self.processed else 0.0,
+        }
+
+def build_ballot(tc_id, first_name, last_name, age, choice):
+    # Kontrata gidecek gizli girdiler (voting_ui ile aynı)
+    person_hash = int(hash_person_data(tc_id, first_name, last_name, age)[:8], 16)
+    age_proof = 1 if age >= 18 else 0
+    person_proof = 1  # verify aşamasında doğrulandı
+    vote_proof = 1  # claim aşamasında bu oya ayrıldı
+    return (choice, person_hash, age_proof, person_proof, vote_proof)
+
+def batcher_submit(batcher):
+    # VoteMicroBatcher / ProofSequencer / ReduceScheduler'ı submit aşamasına bağlayan adaptör
+    # submit() bekleyebilir (ReduceScheduler sınırda rollup'ı bekler, worker ilk istekte başlatılır):
+    # event loop'u durdurmasın diye thread havuzunda çağrılıyor
+    async def submit(ballot):
+        loop = asyncio.get_running_loop()
+        future = await loop.run_in_executor(None, functools.partial(batcher.submit, *ballot))
+        return await asyncio.wrap_future(future)
+    return submit
+
+def nullifier_submit(voter):
+    # NullifierVoter'ı submit aşamasına bağlayan adaptör (pusula: ballot_builder=voter.ballot_for)
+    # Çifte oy kontratta nullifier ile engellenir; gönderimler voter'ın kilidinde sıraya girer
+    async def submit(ballot):
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(None, functools.partial(voter.vote_ballot, *ballot))
+        except NullifierSpent as e:
+            raise PipelineError('submit', 'already_voted', str(e), e)
+    return submit
+
+def simulated_submit(delay=0.5):
+    # Stress testleri için blockchain işlemi simülasyonu (thread bloklamaz)
+    async def submit(ballot):
+        await asyncio.sleep(delay)
+        return {"state": None, "simulated": True}
+    return submit
+
+class VotePipeline:
+    def __init__(self, submit, concurrency=None, timeouts=None, queue_size=256, on_commit=None,
+                 ballot_builder=None):
+        # submit: ballot_builder'ın ürettiği demeti alıp sonucu döndüren async fonksiyon
+        # ballot_builder: (tc_id, first_name, last_name, age, choice) -> ballot; varsayılan build_ballot
+        #                 (ör. NullifierVoter.ballot_for: kayıt yaprağı + tanık)
+        # on_commit: başarılı her oy için (job, result) ile çağrılır (ör. sayaç güncelleme)
+        self.submit_ballot = submit
+        self.ballot_builder = ballot_builder
+        self.concurrency = dict(DEFAULT_CONCURRENCY, **(concurrency or {}))
+        self.timeouts = dict(DEFAULT_TIMEOUTS, **(timeouts or {}))
+        self.queue_size = queue_size
+        self.on_commit = on_commit
+        self.stats = {stage: StageStats() for stage in STAGES}
+        self.completed = 0
+        self.failed = 0
+        self.commit_errors = 0
+        self._queues = None
+        self._tasks = []
+        self._executor = None
+        self._loop = None
+        self._thread = None
+
+    async def start(self):
+        # Aşama kuyruklarını ve worker task'larını çalışan event loop'ta oluşturuyorum
+        if self._queues is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        # Bloklayan aşamalar (dosya/SQLite erişimi) için paylaşılan sınırlı thread havuzu
+        blocking = self.concurrency['verify'] + self.concurrency['claim'] + self.concurrency['witness']
+        self._executor = ThreadPoolExecutor(max_workers=blocking, thread_name_prefix='vote-pipeline')
+        self._queues = {stage: asyncio.Queue(self.queue_size) for stage in STAGES}
+        handlers = {
+            'verify': self._verify,
+            'claim': self._claim,
+            'witness': self._witness,
+            'submit': self._submit,
+            'commit': self._commit,
+        }
+        for index, stage in enumerate(STAGES):
+            next_stage = STAGES[index + 1] if index + 1 < len(STAGES) else None
+            for _ in range(self.concurrency[stage]):
+                self._tasks.append(asyncio.create_task(self._stage_worker(stage, handlers[stage], next_stage)))
+
+    async def submit_vote(self, tc_id, first_name, last_name, age, choice):
+        # Oyu pipeline'a verip sonucunu bekliyorum; ilk kuyruk doluysa burada beklenir
+        await self.start()
+        job = VoteJob(tc_id, first_name, last_name, age, choice, self._loop.create_future())
+        await self._queues['verify'].put(job)
+        return await job.future
+
+    def start_background(self):
+        # Streamlit gibi senkron kodlar için pipeline'ı ayrı bir thread'deki event loop'ta çalıştırıyorum
+        if self._thread is not None:
+            return self
+        loop = asyncio.new_event_loop()
+        started = threading.Event()
+
+        def run():
+            asyncio.set_event_loop(loop)
+            loop.run_until_complete(self.start())
+            started.set()
+            loop.run_forever()
+
+        self._thread = threading.Thread(target=run, name='vote-pipeline-loop', daemon=True)
+        self._thread.start()
+        started.wait()
+        return self
+
+    def submit_threadsafe(self, tc_id, first_name, last_name, age, choice):
+        # Başka bir thread'den oy gönderir; concurrent.futures.Future döndürür
+        if self._thread is None:
+            raise RuntimeError("Önce start_background() çağrılmalı")
+        return asyncio.run_coroutine_threadsafe(
+            self.submit_vote(tc_id, first_name, last_name, age, choice), self._loop
+        )
+
+    async def _stage_worker(self, stage, handler, next_stage):
+        queue = self._queues[stage]
+        stats = self.stats[stage]
+        while True:
+            job = await queue.get()
+            stats.in_flight += 1
+            start = time.perf_counter()
+            try:
+                await handler(job)
+            except PipelineError as e:
+                stats.failed += 1
+                if e.reason == 'timeout':
+                    stats.timeouts += 1
+                metrics.observe(f'pipeline_{stage}', time.perf_counter() - start, True)
+                metrics.increment('pipeline_failures', stage=stage, reason=e.reason)
+                await self._fail(job, e)
+            except Exception as e:
+                stats.failed += 1
+                metrics.observe(f'pipeline_{stage}', time.perf_counter() - start, True)
+                metrics.increment('pipeline_failures', stage=stage, reason='error')
+                await self._fail(job, PipelineError(stage, 'error', str(e), e))
+            else:
+                elapsed = time.perf_counter() - start
+                metrics.observe(f'pipeline_{stage}', elapsed)
+                stats.processed += 1
+                stats.total_seconds += elapsed
+                job.stage_seconds[stage] = elapsed
+                if next_stage is not None:
+                    # Sonraki kuyruk doluysa bu worker bekler: backpressure geriye doğru yayılır
+                    await self._queues[next_stage].put(job)
+            finally:
+                stats.in_flight -= 1
+                queue.task_done()
+
+    async def _fail(self, job, error):
+        self.failed += 1
+        if job.claimed and not (error.stage == 'submit' and error.reason in ('timeout', 'already_voted')):
+            # Oy zincire ulaşmadı (witness/submit hatası): ayrılan hakkı geri bırakıyorum, yoksa kişi
+            # kalıcı olarak oy vermiş görünür. Gönderim zaman aşımında sonuç bilinmediği için, nullifier
+            # zaten harcanmışsa kişi gerçekten oy verdiği için bırakılmaz
+            job.claimed = False
+            try:
+                await self._loop.run_in_executor(self._executor, release_vote, job.tc_id)
+            except Exception:
+                metrics.increment('pipeline_release_errors')
+        if not job.future.done():
+            job.future.set_exception(error)
+
+    async def _run_blocking(self, stage, func, *args, late_result=None):
+        # Bloklayan çağrıyı thread havuzunda zaman aşımı ile çalıştırıyorum
+        # Thread'deki iş iptal edilemez: zaman aşımından sonra biten sonuç late_result'a verilir
+        future = self._loop.run_in_executor(self._executor, func, *args)
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), self.timeouts[stage])
+        except asyncio.TimeoutError:
+            if late_result is not None:
+                future.add_done_callback(late_result)
+            raise PipelineError(stage, 'timeout', f"'{stage}' aşaması {self.timeouts[stage]} saniyede bitmedi")
+
+    async def _verify(self, job):
+        valid = await self._run_blocking('verify', is_valid_person,
+                                         job.tc_id, job.first_name, job.last_name, job.age)
+        if not valid:
+            raise PipelineError('verify', 'invalid_person', "Geçersiz kişi verileri")
+
+    async def _claim(self, job):
+        # Zaman aşımından sonra hak yine de ayrılırsa kimseye ait olmadan kalmasın
+        def release_late_claim(future):
+            if not future.cancelled() and future.exception() is None and future.result():
+                self._executor.submit(release_vote, job.tc_id)
+
+        claimed = await self._run_blocking('claim', try_claim_vote, job.tc_id, late_result=release_late_claim)
+        if not claimed:
+            raise PipelineError('claim', 'already_voted', "Bu TC kimlik numarası daha önce oy vermiş")
+        job.claimed = True
+
+    async def _witness(self, job):
+        job.ballot = await self._run_blocking('witness', self.ballot_builder or build_ballot,
+                                              job.tc_id, job.first_name, job.last_name, job.age, job.choice)
+
+    async def _submit(self, job):
+        task = asyncio.ensure_future(self.submit_ballot(job.ballot))
+        try:
+            # shield: zaman aşımında worker'a gitmiş isteği iptal etmiyorum
+            job.result = await asyncio.wait_for(asyncio.shield(task), self.timeouts['submit'])
+        except (asyncio.TimeoutError, VoteWorkerTimeout) as e:
+            # Sonuç bilinmiyor: oy zincire ulaşmış olabilir, hakkı geri bırakmıyorum
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+            raise PipelineError('submit', 'timeout', "Oy gönderimi zaman aşımına uğradı", e)
+        except VoteWorkerError as e:
+            # Oy kaydedilemedi: ayrılan oy hakkı _fail içinde geri bırakılır
+            raise PipelineError('submit', 'rejected', str(e), e)
+
+    async def _commit(self, job):
+        # Oy zincire ulaştı: on_commit hatası oyu başarısız saymaz, sadece sayılır
+        if self.on_commit is not None:
+            try:
+                await asyncio.wait_for(
+                    self._loop.run_in_executor(self._executor, self.on_commit, job, job.result),
+                    self.timeouts['commit'],
+                )
+            except Exception:
+                self.commit_errors += 1
+        self.completed += 1
+        if not job.future.done():
+            job.future.set_result(job.result)
+
+    def get_stats(self):
+        # Aşama bazında işlenen/başarısız/zaman aşımı, kuyrukta ve işlemde olan oy sayıları
+        queues = self._queues or {}
+        return {
+            "completed": self.completed,
+            "failed": self.failed,
+            "commit_errors": self.commit_errors,
+            "stages": {
+                stage: self.stats[stage].as_dict(queues[stage].qsize() if stage in queues else 0)
+                for stage in STAGES
+            },
+        }
+
+    async def close(self):
+        # Kuyruklardaki oyların bitmesini bekleyip worker'ları durduruyorum
+        if self._queues is None:
+            return
+        for stage in STAGES:
+            await self._queues[stage].join()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queues = None
+        self._executor.shutdown(wait=False)
+
+    def close_background(self):
+        if self._thread is None:
+            return
+        asyncio.run_coroutine_threadsafe(self.close(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._thread = None
@@ -0,0 +1,385 @@
+import 'reflect-metadata';
+import * as fs from 'fs';
+import * as path from 'path';
+import * as readline from 'readline';
+import { Mina, PrivateKey, Field, Bool, AccountUpdate, MerkleMapWitness } from 'snarkyjs';
+import { Voting, Ballot, BallotBatch, BallotProof, RegistryWitness, BATCH_SIZE } from './Voting';
+import { compileVoting, CompileInfo } from './proof_cache';
+
+// Uzun ömürlü oy worker'ı: kontratı bir kez deploy edip stdin/stdout üzerinden istek alıyorum
+// Protokol: her satır bir JSON mesajı (istek: {id, op, ...}, yanıt: {id, ok, result | error})
+
+// stdout sadece protokol mesajları için kullanılıyor, loglar stderr'e gidiyor
+const protocolOut = process.stdout;
+console.log = (...args: unknown[]) => console.error(...args);
+
+type VoteRequest = {
+  id: number;
+  op: 'vote';
+  choice: number;
+  personHash: string;
+  ageProof: number;
+  personProof: number;
+  voteProof: number;
+};
+
+type BallotInput = Omit<VoteRequest, 'id' | 'op'>;
+
+type BatchVoteRequest = { id: number; op: 'batchVote'; ballots: BallotInput[] };
+
+type WitnessStep = { isLeft: boolean; sibling: string };
+
+// Prover havuzunda üretilmiş oy pusulası proof'u (BallotProof.toJSON() çıktısı) ve proof'taki
+// nullifier'ın boş yaprak tanığı (nullifier_set.py)
+type VoteWithProofRequest = { id: number; op: 'voteWithProof'; proof: any; nullifierWitness: WitnessStep[] };
+
+// Kayıt ağacında üyelik kanıtıyla oy (tanık merkle_tree.py'den gelir)
+type MembershipVoteRequest = {
+  id: number;
+  op: 'voteWithMembership';
+  choice: number;
+  personLeaf: string;
+  witness: { isLeft: boolean; sibling: string }[];
+  ageProof: number;
+  voteProof: number;
+};
+
+// Kayıt üyeliği + nullifier haritasında boş yaprak kanıtıyla oy (tanıklar nullifier_set.py'den gelir)
+type NullifierVoteRequest = {
+  id: number;
+  op: 'voteWithNullifier';
+  choice: number;
+  personLeaf: string;
+  registryWitness: WitnessStep[];
+  nullifierWitness: WitnessStep[];
+  ageProof: number;
+};
+
+type Request =
+  | VoteRequest
+  | BatchVoteRequest
+  | VoteWithProofRequest
+  | MembershipVoteRequest
+  | NullifierVoteRequest
+  | { id: number; op: 'setRegistryRoot'; root: string }
+  | { id: number; op: 'setNullifierRoot'; root: string }
+  | { id: number; op: 'state' }
+  | { id: number; op: 'ping' };
+
+let feePayer: PrivateKey;
+let zkAppPrivateKey: PrivateKey;
+let zkAppInstance: Voting;
+
+// merkle_tree.py'nin kaydettiği ağaç (Poseidon ile kurulduysa) deploy sonrası kontrata yazılır
+const REGISTRY_MERKLE_DIR = process.env.REGISTRY_MERKLE_DIR ?? 'registry_merkle';
+
+// PROOFS_ENABLED=1: gerçek proof'lar üretilir; kontrat başlatmada derlenir, doğrulama anahtarı
+// proof_cache ile diskte saklanır (prover anahtarları saklanmaz, her başlatmada derleme yapılır)
+const PROOFS_ENABLED = process.env.PROOFS_ENABLED === '1';
+let compileInfo: CompileInfo | undefined;
+
+function send(message: object) {
+  protocolOut.write(JSON.stringify(message) + '\n');
+}
+
+// Oy işleminin aşama süreleri (saniye); Python istemcisi metrics ile kaydeder
+class PhaseTimer {
+  timings: Record<string, number> = {};
+  private last = performance.now();
+
+  mark(phase: string) {
+    const now = performance.now();
+    this.timings[phase] = (now - this.last) / 1000;
+    this.last = now;
+  }
+}
+
+async function setup() {
+  // Local blockchain kur ve kontratı bir kez deploy et
+  let Local = await Mina.LocalBlockchain({ proofsEnabled: PROOFS_ENABLED });
+  Mina.setActiveInstance(Local);
+  if (PROOFS_ENABLED) {
+    compileInfo = await compileVoting();
+    console.error(
+      `🔑 Voting derlendi${compileInfo.cacheHit ? ' (doğrulama anahtarı önbellekle aynı)' : ''} ` +
+        `(${compileInfo.seconds.toFixed(1)} sn, ${compileInfo.digest})`
+    );
+  }
+
+  const account0 = Local.testAccounts[0]!;
+  feePayer = account0.privateKey;
+
+  zkAppPrivateKey = PrivateKey.random();
+  zkAppInstance = new Voting(zkAppPrivateKey.toPublicKey());
+
+  // Proof'lu modda hesaba derlenen doğrulama anahtarı yazılır
+  const verificationKey = compileInfo && {
+    data: compileInfo.verificationKey.data,
+    hash: Field(compileInfo.verificationKey.hash),
+  };
+  let txn = await Mina.transaction(feePayer, async () => {
+    AccountUpdate.fundNewAccount(feePayer);
+    await zkAppInstance.deploy(
+      verificationKey ? { zkappKey: zkAppPrivateKey, verificationKey } : { zkappKey: zkAppPrivateKey }
+    );
+  });
+  await txn.prove();
+  await txn.sign([feePayer, zkAppPrivateKey]).send();
+
+  const registryRoot = savedRegistryRoot();
+  if (registryRoot !== undefined) {
+    await setRegistryRoot(registryRoot);
+    console.error(`🌳 Kayıt kökü yüklendi: ${registryRoot}`);
+  }
+}
+
+function savedRegistryRoot() {
+  try {
+    const meta = JSON.parse(fs.readFileSync(path.join(REGISTRY_MERKLE_DIR, 'meta.json'), 'utf8'));
+    // sha256 ile kurulan ağaç devredeki Poseidon ile doğrulanamaz
+    return meta.hasher === 'poseidon' ? String(meta.root) : undefined;
+  } catch {
+    return undefined;
+  }
+}
+
+async function setRegistryRoot(root: string) {
+  // Kök güncellemesi zkApp anahtarıyla imzalanır (kontrat requireSignature ile kontrol eder)
+  let txn = await Mina.transaction(feePayer, async () => {
+    await zkAppInstance.setRegistryRoot(Field(root));
+  });
+  await txn.prove();
+  await txn.sign([feePayer, zkAppPrivateKey]).send();
+  return { registryRoot: root };
+}
+
+async function setNullifierRoot(root: string) {
+  // Diskteki nullifier haritasının kökü (worker yeniden başlayınca kontrattaki kök boş haritanınki)
+  let txn = await Mina.transaction(feePayer, async () => {
+    await zkAppInstance.setNullifierRoot(Field(root));
+  });
+  await txn.prove();
+  await txn.sign([feePayer, zkAppPrivateKey]).send();
+  return { nullifierRoot: root };
+}
+
+async function readState() {
+  await zkAppInstance.red.fetch();
+  await zkAppInstance.blue.fetch();
+  await zkAppInstance.green.fetch();
+  await zkAppInstance.totalVoters.fetch();
+  await zkAppInstance.registryRoot.fetch();
+  await zkAppInstance.nullifierRoot.fetch();
+
+  return {
+    red: zkAppInstance.red.get().toString(),
+    blue: zkAppInstance.blue.get().toString(),
+    green: zkAppInstance.green.get().toString(),
+    totalVoters: zkAppInstance.totalVoters.get().toString(),
+    registryRoot: zkAppInstance.registryRoot.get().toString(),
+    nullifierRoot: zkAppInstance.nullifierRoot.get().toString(),
+  };
+}
+
+async function vote(req: VoteRequest) {
+  // ZKP ile oy ver (kimlik bilgileri gizli)
+  const timer = new PhaseTimer();
+  let txn = await Mina.transaction(feePayer, async () => {
+    await zkAppInstance.vote(
+      Field(req.choice),
+      Field(req.personHash),
+      Field(req.ageProof),
+      Field(req.personProof),
+      Field(req.voteProof)
+    );
+  });
+  timer.mark('build');
+  await txn.prove();
+  timer.mark('prove');
+  await txn.sign([feePayer, zkAppPrivateKey]).send();
+  timer.mark('send');
+  const state = await readState();
+  timer.mark('state');
+  return { state, timings: timer.timings };
+}
+
+async function batchVote(req: BatchVoteRequest) {
+  // En fazla BATCH_SIZE oyu tek işlemde gönderiyorum, boş slotları dolduruyorum
+  if (req.ballots.length === 0 || req.ballots.length > BATCH_SIZE) {
+    throw new Error(`Toplu oy sayısı 1 ile ${BATCH_SIZE} arasında olmalı`);
+  }
+  const ballots = req.ballots.map(
+    (b) =>
+      new Ballot({
+        choice: Field(b.choice),
+        personHash: Field(b.personHash),
+        ageProof: Field(b.ageProof),
+        personProof: Field(b.personProof),
+        voteProof: Field(b.voteProof),
+        isDummy: Bool(false),
+      })
+  );
+  while (ballots.length < BATCH_SIZE) ballots.push(Ballot.dummy());
+
+  const timer = new PhaseTimer();
+  let txn = await Mina.transaction(feePayer, async () => {
+    await zkAppInstance.batchVote(new BallotBatch({ ballots }));
+  });
+  timer.mark('build');
+  await txn.prove();
+  timer.mark('prove');
+  await txn.sign([feePayer, zkAppPrivateKey]).send();
+  timer.mark('send');
+  const state = await readState();
+  timer.mark('state');
+  return { state, timings: timer.timings };
+}
+
+function nullifierWitnessFrom(steps: WitnessStep[]) {
+  return new MerkleMapWitness(
+    steps.map((step) => Bool(step.isLeft)),
+    steps.map((step) => Field(step.sibling))
+  );
+}
+
+async function voteWithProof(req: VoteWithProofRequest) {
+  // Proof paralel üretildi; burada sadece kontrat işlemi sırayla oluşturulup gönderiliyor
+  const timer = new PhaseTimer();
+  const proof = BallotProof.fromJSON(req.proof);
+  const nullifierWitness = nullifierWitnessFrom(req.nullifierWitness);
+  timer.mark('decode');
+  let txn = await Mina.transaction(feePayer, async () => {
+    await zkAppInstance.voteWithProof(proof, nullifierWitness);
+  });
+  timer.mark('build');
+  await txn.prove();
+  timer.mark('prove');
+  await txn.sign([feePayer]).send();
+  timer.mark('send');
+  const state = await readState();
+  timer.mark('state');
+  return { state, timings: timer.timings };
+}
+
+async function voteWithMembership(req: MembershipVoteRequest) {
+  // Kişi kontrolü kontratta: yaprak + tanıktan hesaplanan kök registryRoot ile karşılaştırılır
+  const timer = new PhaseTimer();
+  const witness = new RegistryWitness(
+    req.witness.map((step) => ({ isLeft: step.isLeft, sibling: Field(step.sibling) }))
+  );
+  let txn = await Mina.transaction(feePayer, async () => {
+    await zkAppInstance.voteWithMembership(
+      Field(req.choice),
+      Field(req.personLeaf),
+      witness,
+      Field(req.ageProof),
+      Field(req.voteProof)
+    );
+  });
+  timer.mark('build');
+  await txn.prove();
+  timer.mark('prove');
+  await txn.sign([feePayer, zkAppPrivateKey]).send();
+  timer.mark('send');
+  const state = await readState();
+  timer.mark('state');
+  return { state, timings: timer.timings };
+}
+
+async function voteWithNullifier(req: NullifierVoteRequest) {
+  // Çifte oy kontrolü kontratta: nullifier'ın haritada boş olduğu kanıtlanıp harcanır
+  const timer = new PhaseTimer();
+  const registryWitness = new RegistryWitness(
+    req.registryWitness.map((step) => ({ isLeft: step.isLeft, sibling: Field(step.sibling) }))
+  );
+  const nullifierWitness = nullifierWitnessFrom(req.nullifierWitness);
+  let txn = await Mina.transaction(feePayer, async () => {
+    await zkAppInstance.voteWithNullifier(
+      Field(req.choice),
+      Field(req.personLeaf),
+      registryWitness,
+      nullifierWitness,
+      Field(req.ageProof)
+    );
+  });
+  timer.mark('build');
+  await txn.prove();
+  timer.mark('prove');
+  await txn.sign([feePayer]).send();
+  timer.mark('send');
+  const state = await readState();
+  timer.mark('state');
+  return { state, timings: timer.timings };
+}
+
+async function handle(req: Request) {
+  switch (req.op) {
+    case 'vote':
+      return vote(req);
+    case 'batchVote':
+      return batchVote(req);
+    case 'voteWithProof':
+      return voteWithProof(req);
+    case 'voteWithMembership':
+      return voteWithMembership(req);
+    case 'voteWithNullifier':
+      return voteWithNullifier(req);
+    case 'setRegistryRoot':
+      return setRegistryRoot(req.root);
+    case 'setNullifierRoot':
+      return setNullifierRoot(req.root);
+    case 'state':
+      return readState();
+    case 'ping':
+      return { pong: true, batchSize: BATCH_SIZE, proofsEnabled: PROOFS_ENABLED };
+    default:
+      throw new Error(`Bilinmeyen işlem: ${(req as { op: string }).op}`);
+  }
+}
+
+async function processLine(line: string) {
+  if (!line.trim()) return;
+  let req: Request;
+  try {
+    req = JSON.parse(line);
+  } catch (err) {
+    send({ id: null, ok: false, error: `Geçersiz mesaj: ${line}` });
+    return;
+  }
+  try {
+    send({ id: req.id, ok: true, result: await handle(req) });
+  } catch (err) {
+    send({ id: req.id, ok: false, error: err instanceof Error ? err.message : String(err) });
+  }
+}
+
+async function main() {
+  await setup();
+
+  // İstekler sırayla işleniyor: kontrat durumu her oyda bir önceki oya bağlı
+  let queue = Promise.resolve();
+  const rl = readline.createInterface({ input: process.stdin });
+  rl.on('line', (line) => {
+    queue = queue.then(() => processLine(line));
+  });
+  rl.on('close', () => {
+    queue.then(() => process.exit(0));
+  });
+
+  // Derleme bilgisi (önbellek isabeti, süre) istemcinin ölçümlerine gidiyor
+  send({
+    event: 'ready',
+    proofsEnabled: PROOFS_ENABLED,
+    compile: compileInfo && {
+      digest: compileInfo.digest,
+      cacheHit: compileInfo.cacheHit,
+      seconds: compileInfo.seconds,
+      verificationKeyHash: compileInfo.verificationKey.hash,
+    },
+  });
+}
+
+main().catch((err) => {
+  console.error(err);
+  process.exit(1);
+});
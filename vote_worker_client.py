@@ -0,0 +1,255 @@
+import json
+import os
+import subprocess
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+
+import metrics
+
+# Uzun ömürlü Node oy worker'ı (dist/vote_worker.js) için Python istemcisi
+# Her oy için yeni node process'i açmak yerine tek bağlantı açık tutuluyor
+
+WORKER_SCRIPT = 'dist/vote_worker.js'
+
+class VoteWorkerError(Exception):
+    # Worker'ın döndürdüğü hata (ör. kontrattaki assertion mesajı)
+    pass
+
+class VoteWorkerTimeout(VoteWorkerError):
+    # Yanıt süresinde gelmedi; işlemin sonucu bilinmiyor
+    pass
+
+class VoteWorkerUnavailable(VoteWorkerError):
+    # Worker başlatılamadı, kapandı veya yazılamadı
+    pass
+
+class VoteWorkerClient:
+    def __init__(self, script=WORKER_SCRIPT, node='node', startup_timeout=120, extra_env=None):
+        self.script = script
+        self.node = node
+        self.startup_timeout = startup_timeout
+        self.extra_env = extra_env
+        self._process = None
+        self._reader = None
+        self._ready = threading.Event()
+        self._start_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._pending_lock = threading.Lock()
+        self._pending = None  # İstek id -> Future (her process için ayrı; process kapanınca None)
+        self._next_id = 1
+        self.ready_info = None  # Worker'ın 'ready' mesajı (proof modu, derleme bilgisi)
+
+    def start(self):
+        # Worker process'ini başlatıp 'ready' mesajını bekliyorum
+        with self._start_lock:
+            if not self.is_alive():
+                self._spawn()
+
+    def _spawn(self):
+        env = None
+        if self.extra_env:
+            env = dict(os.environ, **self.extra_env)
+        self._ready.clear()
+        start = time.perf_counter()
+        self._process = subprocess.Popen(
+            [self.node, self.script],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            text=True,
+            bufsize=1,
+            env=env,
+        )
+        # Eski process'in okuyucusu geç biterse yeni process'in isteklerine dokunmasın diye
+        # her process kendi bekleyen istek tablosunu kullanıyor
+        pending = {}
+        with self._pending_lock:
+            self._pending = pending
+        self._reader = threading.Thread(target=self._read_loop, args=(self._process, pending), daemon=True)
+        self._reader.start()
+        if not self._ready.wait(self.startup_timeout):
+            metrics.observe('worker_start', time.perf_counter() - start, True)
+            self.close()
+            raise VoteWorkerTimeout("Oy worker'ı zamanında başlamadı")
+        if not self.is_alive():
+            metrics.observe('worker_start', time.perf_counter() - start, True)
+            raise VoteWorkerUnavailable("Oy worker'ı başlatılamadı")
+        # Node başlatma + kontrat derleme/deploy süresi
+        metrics.observe('worker_start', time.perf_counter() - start)
+
+    def is_alive(self):
+        return self._process is not None and self._process.poll() is None
+
+    def is_ready(self):
+        # Kontrat deploy edildi ve worker istek kabul ediyor
+        return self._ready.is_set() and self.is_alive()
+
+    def _read_loop(self, process, pending):
+        # Worker'dan gelen satırları ilgili isteğin Future'ına eşliyorum
+        for line in process.stdout:
+            try:
+                message = json.loads(line)
+            except ValueError:
+                continue
+            if message.get('event') == 'ready':
+                self.ready_info = message
+                compile_info = message.get('compile')
+                if compile_info:
+                    # Proof'lu modda derleme süresi (cache: doğrulama anahtarı önbellekle aynı mı)
+                    metrics.observe('worker_compile', compile_info['seconds'],
+                                    cache='hit' if compile_info['cacheHit'] else 'miss')
+                self._ready.set()
+                continue
+            with self._pending_lock:
+                future = pending.pop(message.get('id'), None)
+            if future is None:
+                continue
+            if message.get('ok'):
+                result = message.get('result')
+                if isinstance(result, dict) and 'timings' in result:
+                    # Worker içindeki aşamalar: işlem oluşturma, proof, imza+gönderim, durum okuma
+                    for phase, seconds in result['timings'].items():
+                        metrics.observe('worker', seconds, phase=phase)
+                future.set_result(result)
+            else:
+                future.set_exception(VoteWorkerError(message.get('error', 'Bilinmeyen hata')))
+
+        # Process kapandı: bekleyen tüm istekleri hata ile sonlandırıyorum
+        # Tablo kilit altında kapatılıyor: bundan sonra gelen istekler de hata alır, kaybolmaz
+        with self._pending_lock:
+            failed = list(pending.values())
+            pending.clear()
+            if self._pending is pending:
+                self._pending = None
+        if self._process is process:
+            self._ready.set()
+        for future in failed:
+            future.set_exception(VoteWorkerUnavailable("Oy worker'ı beklenmedik şekilde kapandı"))
+
+    def submit(self, op, **payload):
+        # İsteği gönderip sonucu Future olarak döndürüyorum (worker hazır olduktan sonra bloklamaz)
+        # Worker başka bir thread'de başlatılıyorsa start() kilidinde hazır olmasını bekliyorum
+        if not self.is_ready():
+            self.start()
+        future = Future()
+        if metrics.is_enabled():
+            # İstek gönderiminden yanıta kadar geçen süre (worker kuyruğunda bekleme dahil)
+            start = time.perf_counter()
+            future.add_done_callback(lambda f: metrics.observe(
+                'worker_request', time.perf_counter() - start, f.exception() is not None, op=op))
+        with self._pending_lock:
+            pending = self._pending
+            if pending is None:
+                raise VoteWorkerUnavailable("Oy worker'ı kapandı")
+            request_id = self._next_id
+            self._next_id += 1
+            pending[request_id] = future
+        message = json.dumps(dict(payload, id=request_id, op=op))
+        try:
+            with self._write_lock:
+                self._process.stdin.write(message + '\n')
+                self._process.stdin.flush()
+        except (OSError, ValueError) as e:
+            with self._pending_lock:
+                pending.pop(request_id, None)
+            raise VoteWorkerUnavailable(f"Oy worker'ına yazılamadı: {e}")
+        return future
+
+    def request(self, op, timeout=30, **payload):
+        # İsteği gönderip yanıtı bekliyorum
+        future = self.submit(op, **payload)
+        try:
+            return future.result(timeout)
+        except FutureTimeoutError:
+            raise VoteWorkerTimeout(f"'{op}' isteği {timeout} saniyede yanıtlanmadı")
+
+    def vote(self, choice, person_hash, age_proof, person_proof, vote_proof, timeout=30):
+        # Kontrata oy gönderip güncel sayaçları döndürüyorum
+        return self.request(
+            'vote',
+            timeout=timeout,
+            choice=choice,
+            personHash=str(person_hash),
+            ageProof=age_proof,
+            personProof=person_proof,
+            voteProof=vote_proof,
+        )
+
+    def batch_vote(self, ballots, timeout=60):
+        # En fazla BATCH_SIZE oyu tek işlemde gönderiyorum
+        # ballots: (choice, person_hash, age_proof, person_proof, vote_proof) demetleri
+        return self.request(
+            'batchVote',
+            timeout=timeout,
+            ballots=[
+                {
+                    'choice': choice,
+                    'personHash': str(person_hash),
+                    'ageProof': age_proof,
+                    'personProof': person_proof,
+                    'voteProof': vote_proof,
+                }
+                for choice, person_hash, age_proof, person_proof, vote_proof in ballots
+            ],
+        )
+
+    def vote_with_membership(self, choice, person_leaf, witness, age_proof, vote_proof, timeout=30):
+        # Kişi kontrolü kontratta kayıt ağacı üyeliğiyle yapılır (tanık: merkle_tree.py)
+        return self.request(
+            'voteWithMembership',
+            timeout=timeout,
+            choice=choice,
+            personLeaf=str(person_leaf),
+            witness=witness,
+            ageProof=age_proof,
+            voteProof=vote_proof,
+        )
+
+    def vote_with_nullifier(self, choice, person_leaf, registry_witness, nullifier_witness, age_proof,
+                            timeout=30):
+        # Çifte oy kontrolü kontratta nullifier haritasıyla yapılır (tanık: nullifier_set.py)
+        return self.request(
+            'voteWithNullifier',
+            timeout=timeout,
+            choice=choice,
+            personLeaf=str(person_leaf),
+            registryWitness=registry_witness,
+            nullifierWitness=nullifier_witness,
+            ageProof=age_proof,
+        )
+
+    def vote_with_proof(self, proof, nullifier_witness, timeout=30):
+        # Prover havuzunda üretilen oy pusulası proof'u; nullifier kontratta harcanır (tanık: nullifier_set.py)
+        return self.request('voteWithProof', timeout=timeout, proof=proof, nullifierWitness=nullifier_witness)
+
+    def set_registry_root(self, root, timeout=60):
+        # Kayıt güncellendikten sonra yeni Merkle kökünü kontrata yazıyorum
+        return self.request('setRegistryRoot', timeout=timeout, root=str(root))
+
+    def set_nullifier_root(self, root, timeout=60):
+        return self.request('setNullifierRoot', timeout=timeout, root=str(root))
+
+    def state(self, timeout=30):
+        # Kontrattaki güncel sayaçlar (red, blue, green, totalVoters)
+        return self.request('state', timeout=timeout)
+
+    def ping(self, timeout=5):
+        return self.request('ping', timeout=timeout)
+
+    def kill(self):
+        # Takılan worker'ı beklemeden sonlandırıyorum; bekleyen istekler VoteWorkerUnavailable alır
+        process = self._process
+        if process is not None and process.poll() is None:
+            process.kill()
+            process.wait()
+
+    def close(self):
+        # stdin kapanınca worker bekleyen işleri bitirip çıkıyor
+        if self._process is None:
+            return
+        try:
+            self._process.stdin.close()
+            self._process.wait(timeout=10)
+        except (OSError, subprocess.TimeoutExpired):
+            self._process.kill()
+        self._process = None
@@ -1,8 +1,21 @@
 import json
 import hashlib
+import math
+import mmap
 import os
+import struct
+import threading
+import time
+from contextlib import contextmanager
 from dotenv import load_dotenv
 
+import metrics
+
+try:
+    import fcntl
+except ImportError:  # Windows: sadece process içi kilitler kullanılır
+    fcntl = None
+
 # .env dosyasını yükle
 load_dotenv()
 
@@ -10,49 +23,806 @@ load_dotenv()
 SALT = os.getenv('SALT', 'zkp_voting_salt_2024')
 PEPPER = os.getenv('PEPPER', 'mina_protocol_pepper')
 
+# Depolama modu: 'json' (tüm dosyayı yeniden yazar), 'log' (append-only log + snapshot)
+# veya 'sharded' (hash önekine göre N ayrı log, her birinin kendi dosyası ve kilidi)
+VOTE_STORAGE = os.getenv('VOTE_STORAGE', 'json')
+# STORAGE_BACKEND=sqlite ise oy kayıtları VOTE_STORAGE'dan bağımsız olarak SQLite'ta tutulur
+STORAGE_BACKEND = os.getenv('STORAGE_BACKEND', 'file')
+VOTED_FILE = 'voted_tc_hashes.json'
+VOTE_LOG_FILE = 'voted_tc_hashes.log'
+VOTE_LOCK_FILE = 'voted_tc_hashes.lock'
+# Log bu kadar kayda ulaşınca snapshot'a sıkıştırılır (0 = otomatik sıkıştırma kapalı)
+VOTE_LOG_COMPACT_THRESHOLD = int(os.getenv('VOTE_LOG_COMPACT_THRESHOLD', '50000'))
+# try_claim_vote için hash önekine göre ayrılmış kilit şeridi sayısı
+VOTE_LOCK_STRIPES = int(os.getenv('VOTE_LOCK_STRIPES', '64'))
+VOTE_LOCK_DIR = '.vote_locks'
+# Sharded modda shard sayısı ve dosyaların tutulduğu klasör
+VOTE_SHARDS = int(os.getenv('VOTE_SHARDS', '16'))
+VOTE_SHARD_DIR = 'voted_shards'
+
+# Oy vermiş hash'lerin önünde opsiyonel Bloom filtresi
+VOTE_BLOOM = os.getenv('VOTE_BLOOM', '0') == '1'
+VOTE_BLOOM_FILE = 'voted_tc_hashes.bloom'
+VOTE_BLOOM_FP_RATE = float(os.getenv('VOTE_BLOOM_FP_RATE', '0.001'))
+# Beklenen seçmen sayısı (0 = secure_valid_ids kaydındaki kişi sayısı)
+VOTE_BLOOM_EXPECTED_VOTERS = int(os.getenv('VOTE_BLOOM_EXPECTED_VOTERS', '0'))
+
 def hash_id(tc_id):
     # TC kimlik numarasını hash'liyorum
     combined = SALT + tc_id + PEPPER
     return hashlib.sha256(combined.encode()).hexdigest()
 
-def load_voted_tc_list():
+def load_voted_tc_list(path=VOTED_FILE):
     # Oy vermiş TC kimlik numaralarını yüklüyorum
     try:
-        with open('voted_tc_hashes.json', 'r') as f:
+        with open(path, 'r') as f:
             data = json.load(f)
             return data.get('voted_hashes', [])
     except:
         return []
 
-def save_voted_tc_list(voted_hashes):
-    # Oy vermiş TC kimlik numaralarını kaydediyorum
-    data = {
+def _snapshot_data(voted_hashes):
+    return {
         "voted_hashes": voted_hashes,
         "description": "Oy vermiş TC kimlik numaralarının hash'leri (salt+pepper ile)",
         "salt": SALT,
         "algorithm": "SHA-256",
         "note": "Pepper değeri .env dosyasında saklanır ve GitHub'a yüklenmez"
     }
+
+def save_voted_tc_list(voted_hashes):
+    # Oy vermiş TC kimlik numaralarını kaydediyorum
+    data = _snapshot_data(voted_hashes)
     
-    with open('voted_tc_hashes.json', 'w') as f:
+    with metrics.timer('voted_write', store='json'), open(VOTED_FILE, 'w') as f:
         json.dump(data, f, indent=2)
 
+@contextmanager
+def _file_lock(path, exclusive=True, on_contention=None):
+    # Process'ler arası kilit (fcntl yoksa kilitsiz devam eder)
+    # on_contention: kilit hemen alınamazsa çağrılır
+    if fcntl is None:
+        yield
+        return
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    mode = fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH
+    try:
+        try:
+            fcntl.flock(fd, mode | fcntl.LOCK_NB)
+        except BlockingIOError:
+            if on_contention is not None:
+                on_contention()
+            fcntl.flock(fd, mode)
+        yield
+    finally:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+        os.close(fd)
+
+def _replace_file(path, content):
+    # Dosyayı geçici dosya + os.replace ile atomik olarak değiştiriyorum
+    tmp_path = f"{path}.tmp.{os.getpid()}"
+    with open(tmp_path, 'wb') as f:
+        f.write(content)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+class JsonVoteStore:
+    # Eski davranış: her işaretlemede tüm JSON dosyası yeniden yazılır
+    needs_claim_lock = True
+
+    def contains(self, tc_hash):
+        return tc_hash in load_voted_tc_list()
+
+    def add(self, tc_hash):
+        voted_hashes = load_voted_tc_list()
+        if tc_hash in voted_hashes:
+            return False
+        voted_hashes.append(tc_hash)
+        save_voted_tc_list(voted_hashes)
+        return True
+
+    def discard(self, tc_hash):
+        voted_hashes = load_voted_tc_list()
+        if tc_hash in voted_hashes:
+            voted_hashes.remove(tc_hash)
+            save_voted_tc_list(voted_hashes)
+
+    def count(self):
+        return len(load_voted_tc_list())
+
+    def all_hashes(self):
+        return load_voted_tc_list()
+
+    def reset(self):
+        save_voted_tc_list([])
+
+    def lock_key(self, tc_hash):
+        # Tüm dosya yeniden yazıldığı için tek bir kilit gerekiyor
+        return None
+
+# Log satırı: 64 karakter hex hash + satır sonu ('-' önekli satırlar geri alınan oyları işaretler)
+_RECORD_SIZE = 65
+
+class AppendOnlyVoteLog:
+    # Her yeni oy log dosyasına tek satır olarak ekleniyor
+    # Başlangıç: snapshot (voted_tc_hashes.json) + log kuyruğunun tekrar oynatılması
+    needs_claim_lock = True
+
+    def __init__(self, snapshot_path=VOTED_FILE, log_path=VOTE_LOG_FILE,
+                 lock_path=VOTE_LOCK_FILE, compact_threshold=VOTE_LOG_COMPACT_THRESHOLD):
+        self.snapshot_path = snapshot_path
+        self.log_path = log_path
+        self.lock_path = lock_path
+        self.compact_threshold = compact_threshold
+
+        self._hashes = set()
+        self._log_offset = 0
+        self._log_identity = None
+        self._state_lock = threading.RLock()
+
+        # Group commit durumu
+        self._commit_cond = threading.Condition()
+        self._pending = []
+        self._flushing = False
+        self._next_ticket = 1
+        self._durable_ticket = 0
+        self._failed_batches = []
+        self.fsync_count = 0
+        self.committed_records = 0
+
+        self._full_reload()
+
+    def _log_stat(self):
+        try:
+            stat = os.stat(self.log_path)
+        except FileNotFoundError:
+            return None, 0
+        return (stat.st_dev, stat.st_ino), stat.st_size
+
+    def _full_reload(self):
+        # Snapshot'ı yükleyip log'u baştan oynatıyorum
+        with self._state_lock:
+            self._hashes = set(load_voted_tc_list(self.snapshot_path))
+            self._log_offset = 0
+            self._log_identity, _ = self._log_stat()
+            self._replay_tail()
+
+    def _replay_tail(self):
+        # Log'a (başka process'ler dahil) eklenmiş yeni satırları okuyorum
+        # Dosyayı önce açıp kimliğini açık dosyadan alıyorum: stat ile açma arasında sıkıştırma
+        # olursa yeni (boş) log okunur ve snapshot'a taşınan hash'ler kaçırılırdı
+        with self._state_lock:
+            try:
+                f = open(self.log_path, 'rb')
+            except FileNotFoundError:
+                f = None
+            try:
+                if f is None:
+                    identity, size = None, 0
+                else:
+                    stat = os.fstat(f.fileno())
+                    identity, size = (stat.st_dev, stat.st_ino), stat.st_size
+                if identity != self._log_identity or size < self._log_offset:
+                    # Log sıkıştırılmış veya sıfırlanmış: snapshot'tan yeniden yükle
+                    # (sıkıştırma snapshot'ı log'dan önce değiştirdiği için yeni log'un snapshot'ı hazır)
+                    self._hashes = set(load_voted_tc_list(self.snapshot_path))
+                    self._log_offset = 0
+                    self._log_identity = identity
+                if f is None or size == self._log_offset:
+                    return
+                f.seek(self._log_offset)
+                chunk = f.read(size - self._log_offset)
+            finally:
+                if f is not None:
+                    f.close()
+
+            # Yarım yazılmış son satırı bir sonraki okumaya bırakıyorum
+            end = chunk.rfind(b'\n') + 1
+            for line in chunk[:end].splitlines():
+                self._apply_record(line.decode('ascii'))
+            self._log_offset += end
+
+    def _apply_record(self, record):
+        if record.startswith('-'):
+            self._hashes.discard(record[1:])
+        elif record:
+            self._hashes.add(record)
+
+    def _write_batch(self, lines):
+        # Toplu yazma: tek write + tek fsync
+        with metrics.timer('voted_write', store='log'), _file_lock(self.lock_path, exclusive=False):
+            fd = os.open(self.log_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, ''.join(lines).encode('ascii'))
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+        self.fsync_count += 1
+        self.committed_records += len(lines)
+
+    def _append(self, record):
+        # Group commit: aynı anda gelen yazmalar tek fsync ile diske iniyor
+        with self._commit_cond:
+            ticket = self._next_ticket
+            self._next_ticket += 1
+            self._pending.append(record + '\n')
+
+            while self._durable_ticket < ticket:
+                if self._flushing:
+                    self._commit_cond.wait()
+                    continue
+
+                # Lider thread bekleyen tüm kayıtları yazıyor
+                self._flushing = True
+                batch = self._pending
+                self._pending = []
+                first_ticket = self._durable_ticket + 1
+                last_ticket = self._next_ticket - 1
+                self._commit_cond.release()
+                error = None
+                try:
+                    self._write_batch(batch)
+                except OSError as e:
+                    error = e
+                finally:
+                    self._commit_cond.acquire()
+                    self._flushing = False
+                    self._durable_ticket = last_ticket
+                    if error is not None:
+                        # [ilk bilet, son bilet, hata, hatayı henüz almamış bilet sayısı]
+                        self._failed_batches.append([first_ticket, last_ticket, error,
+                                                     last_ticket - first_ticket + 1])
+                    self._commit_cond.notify_all()
+
+            for failed in self._failed_batches:
+                first_ticket, last_ticket, error, waiting = failed
+                if first_ticket <= ticket <= last_ticket:
+                    # Toplu yazmadaki her bilet hatayı bir kez alır; sonuncusu kaydı siliyor
+                    if waiting == 1:
+                        self._failed_batches.remove(failed)
+                    else:
+                        failed[3] = waiting - 1
+                    raise error
+
+    def contains(self, tc_hash):
+        with self._state_lock:
+            if tc_hash in self._hashes:
+                return True
+            self._replay_tail()
+            return tc_hash in self._hashes
+
+    def add(self, tc_hash):
+        with self._state_lock:
+            if self.contains(tc_hash):
+                return False
+            self._hashes.add(tc_hash)
+        try:
+            self._append(tc_hash)
+        except OSError:
+            with self._state_lock:
+                self._hashes.discard(tc_hash)
+            raise
+        if self._log_over_threshold():
+            self.compact(only_if_needed=True)
+        return True
+
+    def _log_over_threshold(self):
+        return bool(self.compact_threshold) and self._log_stat()[1] >= self.compact_threshold * _RECORD_SIZE
+
+    def discard(self, tc_hash):
+        # Geri alma kaydı ekliyorum; sıkıştırmada kalıcı olarak düşer
+        with self._state_lock:
+            if not self.contains(tc_hash):
+                return
+            self._hashes.discard(tc_hash)
+        self._append('-' + tc_hash)
+
+    def count(self):
+        with self._state_lock:
+            self._replay_tail()
+            return len(self._hashes)
+
+    def all_hashes(self):
+        with self._state_lock:
+            self._replay_tail()
+            return list(self._hashes)
+
+    def lock_key(self, tc_hash):
+        # Her satır bağımsız eklendiği için hash önekine göre şeritli kilit yeterli
+        return int(tc_hash[:8], 16) % VOTE_LOCK_STRIPES
+
+    def compact(self, only_if_needed=False):
+        # Log'u snapshot'a katlayıp boş bir log ile değiştiriyorum
+        with _file_lock(self.lock_path, exclusive=True), self._state_lock:
+            if only_if_needed and not self._log_over_threshold():
+                # Başka bir thread/process az önce sıkıştırmış
+                return
+            self._replay_tail()
+            snapshot = json.dumps(_snapshot_data(sorted(self._hashes)), separators=(',', ':'))
+            _replace_file(self.snapshot_path, snapshot.encode('ascii'))
+            _replace_file(self.log_path, b'')
+            self._log_identity, self._log_offset = self._log_stat()
+
+    def reset(self):
+        with _file_lock(self.lock_path, exclusive=True), self._state_lock:
+            save_voted_tc_list([])
+            _replace_file(self.log_path, b'')
+            self._hashes = set()
+            self._log_identity, self._log_offset = self._log_stat()
+
+SHARD_META_FILE = 'shards.json'
+
+def _shard_of(tc_hash, shard_count):
+    # Hash'in ilk 4 byte'ı shard'ı belirliyor (SHA-256 çıktısı düzgün dağılır)
+    return int(tc_hash[:8], 16) % shard_count
+
+def _read_shard_meta(directory):
+    try:
+        with open(os.path.join(directory, SHARD_META_FILE), 'r') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+def _write_shard_meta(directory, shard_count):
+    meta = {"shards": shard_count, "key": "hash[:8] % shards", "salt": SALT}
+    _replace_file(os.path.join(directory, SHARD_META_FILE), json.dumps(meta, indent=2).encode('ascii'))
+
+def _shard_paths(directory, index):
+    base = os.path.join(directory, f"shard_{index:03d}")
+    return base + '.json', base + '.log', base + '.lock'
+
+class ShardedVoteStore:
+    # Hash önekine göre N adet AppendOnlyVoteLog: her shard'ın kendi snapshot'ı, log'u,
+    # group commit'i ve dosya kilidi var, farklı shard'lara yazmalar paralel ilerler
+    needs_claim_lock = True
+
+    def __init__(self, directory=VOTE_SHARD_DIR, shard_count=VOTE_SHARDS,
+                 compact_threshold=VOTE_LOG_COMPACT_THRESHOLD):
+        meta = _read_shard_meta(directory)
+        if meta is None:
+            os.makedirs(directory, exist_ok=True)
+            _write_shard_meta(directory, shard_count)
+        elif meta["shards"] != shard_count:
+            # Yanlış shard'a bakmak çifte oya izin verir: sessizce devam etmiyorum
+            raise ValueError(
+                f"{directory} {meta['shards']} shard ile oluşturulmuş (VOTE_SHARDS={shard_count}). "
+                f"Yeniden dağıtmak için: python3 voted_tc_tracker.py reshard {shard_count}"
+            )
+        self.directory = directory
+        self.shard_count = shard_count
+        # Sıkıştırma eşiği tüm store için: shard'lara bölüştürüyorum
+        shard_threshold = max(1, compact_threshold // shard_count) if compact_threshold else 0
+        self.shards = [
+            AppendOnlyVoteLog(*_shard_paths(directory, i), compact_threshold=shard_threshold)
+            for i in range(shard_count)
+        ]
+
+    def shard_for(self, tc_hash):
+        return self.shards[_shard_of(tc_hash, self.shard_count)]
+
+    def contains(self, tc_hash):
+        return self.shard_for(tc_hash).contains(tc_hash)
+
+    def add(self, tc_hash):
+        return self.shard_for(tc_hash).add(tc_hash)
+
+    def discard(self, tc_hash):
+        self.shard_for(tc_hash).discard(tc_hash)
+
+    def count(self):
+        # Her shard bellekteki kümesinin boyunu veriyor (sadece log kuyruğu okunur)
+        return sum(shard.count() for shard in self.shards)
+
+    def all_hashes(self):
+        hashes = []
+        for shard in self.shards:
+            hashes.extend(shard.all_hashes())
+        return hashes
+
+    def shard_counts(self):
+        return [shard.count() for shard in self.shards]
+
+    def lock_key(self, tc_hash):
+        # Her hash tek bir shard'a düştüğü için log modundaki şeritli kilit yeterli
+        return int(tc_hash[:8], 16) % VOTE_LOCK_STRIPES
+
+    @property
+    def fsync_count(self):
+        return sum(shard.fsync_count for shard in self.shards)
+
+    def compact(self, only_if_needed=False):
+        for shard in self.shards:
+            shard.compact(only_if_needed=only_if_needed)
+
+    def reset(self):
+        for shard in self.shards:
+            shard.reset()
+
+def _load_all_voted_hashes(source_dir=VOTE_SHARD_DIR):
+    # Mevcut kayıtları okuyorum: önce sharded klasör, yoksa tek dosyalı store (snapshot + log)
+    meta = _read_shard_meta(source_dir)
+    if meta is not None:
+        return ShardedVoteStore(source_dir, meta["shards"], compact_threshold=0).all_hashes(), meta["shards"]
+    return AppendOnlyVoteLog(compact_threshold=0).all_hashes(), 1
+
+def reshard_votes(shard_count, directory=VOTE_SHARD_DIR):
+    # Tek dosyalı veya farklı sayıda shard'lı store'u shard_count shard'a yeniden dağıtıyorum
+    # Oylama durdurulmuşken çalıştırılmalı; eski klasör yedek olarak bırakılır
+    if shard_count < 1:
+        raise ValueError("Shard sayısı en az 1 olmalı")
+    with _file_lock(VOTE_LOCK_FILE, exclusive=True):
+        hashes, source_shards = _load_all_voted_hashes(directory)
+
+        buckets = [[] for _ in range(shard_count)]
+        for tc_hash in hashes:
+            buckets[_shard_of(tc_hash, shard_count)].append(tc_hash)
+
+        # Yeni shard'ları geçici klasöre yazıp tek rename ile yerine koyuyorum
+        tmp_dir = f"{directory}.tmp.{os.getpid()}"
+        os.makedirs(tmp_dir)
+        for index, bucket in enumerate(buckets):
+            snapshot_path, log_path, _ = _shard_paths(tmp_dir, index)
+            snapshot = json.dumps(_snapshot_data(sorted(bucket)), separators=(',', ':'))
+            _replace_file(snapshot_path, snapshot.encode('ascii'))
+            _replace_file(log_path, b'')
+        _write_shard_meta(tmp_dir, shard_count)
+
+        backup_dir = None
+        if os.path.exists(directory):
+            backup_dir = f"{directory}.bak.{int(time.time())}"
+            os.rename(directory, backup_dir)
+        os.rename(tmp_dir, directory)
+
+    return {
+        "hashes": len(hashes),
+        "source_shards": source_shards,
+        "shards": shard_count,
+        "backup": backup_dir,
+    }
+
+# Bloom dosya başlığı: magic, versiyon, hash fonksiyonu sayısı (k), bit sayısı (m), hedef hata oranı
+BLOOM_MAGIC = b'ZKBF'
+BLOOM_HEADER = struct.Struct('<4sHIQd')
+
+class VoteBloomFilter:
+    # Çoğu has_voted çağrısı henüz oy vermemiş kişiler için: kesin "yok" cevabını
+    # store'a gitmeden veriyorum, sadece olası pozitifler store'a soruluyor
+    # Bitler mmap'lenmiş dosyada tutulduğu için güncellemeler diğer process'lerce de görülür
+    # Dosya sadece bloom kilidi altında oluşturulur veya değiştirilir; her process eşlediği dosyanın
+    # inode'unu kontrol eder, dosya değiştiyse (rebuild) yenisini eşler
+    def __init__(self, path, expected_items, fp_rate, initial_hashes=None):
+        self.path = path
+        self.lock_path = path + '.lock'
+        self.expected_items = expected_items
+        self.target_fp_rate = fp_rate
+        self._lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._view = None  # (mmap, k, m): okuyucular üçünü birlikte alır
+        self._identity = None
+        self.lookups = 0
+        self.negatives = 0
+        self.positives = 0
+        self.false_positives = 0
+
+        with self._lock, _file_lock(self.lock_path):
+            self.created = False
+            if not os.path.exists(path):
+                # initial_hashes dosya yayınlanmadan önce yazılıyor: yarım dolu filtre görülmez
+                self.created = self._publish(initial_hashes, replace=False)
+            self._remap()
+
+    @staticmethod
+    def _positions(tc_hash, k, m):
+        # Hash zaten SHA-256 olduğu için bitleri doğrudan ondan türetiyorum (double hashing)
+        h1 = int(tc_hash[:16], 16)
+        h2 = int(tc_hash[16:32], 16) | 1
+        return [(h1 + i * h2) % m for i in range(k)]
+
+    def _build(self, hashes):
+        # Boyutu beklenen seçmen sayısı ve hedef hata oranından hesaplayıp bitleri geçici dosyaya yazıyorum
+        n = max(self.expected_items, 1)
+        m = max(8, math.ceil(-n * math.log(self.target_fp_rate) / (math.log(2) ** 2)))
+        m = (m + 7) // 8 * 8
+        k = max(1, round(m / n * math.log(2)))
+        bits = bytearray(m // 8)
+        for tc_hash in hashes or ():
+            for pos in self._positions(tc_hash, k, m):
+                bits[pos >> 3] |= 1 << (pos & 7)
+        tmp_path = f"{self.path}.tmp.{os.getpid()}"
+        with open(tmp_path, 'wb') as f:
+            f.write(BLOOM_HEADER.pack(BLOOM_MAGIC, 1, k, m, self.target_fp_rate))
+            f.write(bits)
+            f.flush()
+            os.fsync(f.fileno())
+        return tmp_path
+
+    def _publish(self, hashes, replace):
+        # Bloom kilidi altında çağrılır. İlk dosya link ile yayınlanır (O_EXCL gibi: dosya varsa
+        # hata verir, başka process'in filtresi ezilmez); rebuild'de os.replace kullanılır
+        tmp_path = self._build(hashes() if callable(hashes) else hashes)
+        try:
+            if replace:
+                os.replace(tmp_path, self.path)
+                return True
+            try:
+                os.link(tmp_path, self.path)
+                return True
+            except FileExistsError:
+                return False
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def _remap(self):
+        # Dosyayı açıp eşliyorum; kimlik açık dosyadan alınır (açma ile stat arasında değişemez)
+        # Eski eşleme kapatılmıyor: onu okuyan thread'ler bitince GC kapatır
+        with open(self.path, 'r+b') as f:
+            stat = os.fstat(f.fileno())
+            mm = mmap.mmap(f.fileno(), 0)
+        magic, _, k, m, fp_rate = BLOOM_HEADER.unpack_from(mm, 0)
+        if magic != BLOOM_MAGIC:
+            mm.close()
+            raise ValueError(f"Geçersiz Bloom filtresi dosyası: {self.path}")
+        self.k, self.m, self.fp_rate = k, m, fp_rate
+        self._identity = (stat.st_dev, stat.st_ino)
+        self._view = (mm, k, m)
+
+    def replaced_since(self, identity):
+        # Dosya verilen kimlikten (add() dönüşü) bu yana rebuild ile değiştirildi mi
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return True
+        return (stat.st_dev, stat.st_ino) != identity
+
+    def _current(self):
+        # Dosya başka bir process'te yeniden oluşturulduysa yeni dosyayı eşliyorum
+        if self.replaced_since(self._identity):
+            with self._lock:
+                if self.replaced_since(self._identity):
+                    self._remap()
+        return self._view
+
+    def might_contain(self, tc_hash):
+        mm, k, m = self._current()
+        offset = BLOOM_HEADER.size
+        for pos in self._positions(tc_hash, k, m):
+            if not mm[offset + (pos >> 3)] & (1 << (pos & 7)):
+                return False
+        return True
+
+    def add(self, tc_hash):
+        # Bit güncellemesi read-modify-write olduğu için process'ler arası kilit altında yapıyorum
+        # İnode kilit altında kontrol ediliyor: bitler rebuild ile değiştirilmiş ölü dosyaya yazılmaz
+        # Yazılan dosyanın kimliğini döndürüyorum (bkz. try_claim_vote)
+        offset = BLOOM_HEADER.size
+        with self._lock, _file_lock(self.lock_path):
+            if self.replaced_since(self._identity):
+                self._remap()
+            mm, k, m = self._view
+            for pos in self._positions(tc_hash, k, m):
+                index = offset + (pos >> 3)
+                mm[index] = mm[index] | (1 << (pos & 7))
+            return self._identity
+
+    def rebuild(self, hashes):
+        # Filtreyi verilen hash'lerden yeni dosyada kuruyorum (boyut güncel ayarlardan hesaplanır)
+        # Eski dosya silinmiyor, yerine os.replace ile yenisi konuyor: onu eşleyen process'ler geçiş yapar
+        with self._lock, _file_lock(self.lock_path):
+            self._publish(hashes, replace=True)
+            self._remap()
+
+    def clear(self):
+        with self._lock, _file_lock(self.lock_path):
+            self._remap()
+            mm, _, m = self._view
+            mm[BLOOM_HEADER.size:] = bytes(m // 8)
+
+    def record_lookup(self, maybe, found=None):
+        with self._stats_lock:
+            self.lookups += 1
+            if not maybe:
+                self.negatives += 1
+            else:
+                self.positives += 1
+                if found is False:
+                    self.false_positives += 1
+
+    def stats(self):
+        with self._stats_lock:
+            return {
+                "lookups": self.lookups,
+                "negatives": self.negatives,
+                "positives": self.positives,
+                "false_positives": self.false_positives,
+                "store_skip_ratio": self.negatives / self.lookups if self.lookups else 0.0,
+                "bits": self.m,
+                "hash_functions": self.k,
+                "target_fp_rate": self.fp_rate,
+            }
+
+_vote_store = None
+_vote_store_lock = threading.Lock()
+_vote_bloom = None
+_vote_bloom_lock = threading.Lock()
+
+def get_vote_store():
+    # Seçili depolama moduna göre process içinde paylaşılan store'u döndürüyorum
+    global _vote_store
+    if _vote_store is None:
+        with _vote_store_lock:
+            if _vote_store is None:
+                if STORAGE_BACKEND == 'sqlite':
+                    from sqlite_store import SqliteVoteStore, get_database
+                    _vote_store = SqliteVoteStore(get_database())
+                elif VOTE_STORAGE == 'log':
+                    _vote_store = AppendOnlyVoteLog()
+                elif VOTE_STORAGE == 'sharded':
+                    _vote_store = ShardedVoteStore()
+                else:
+                    _vote_store = JsonVoteStore()
+    return _vote_store
+
+def _expected_voters():
+    if VOTE_BLOOM_EXPECTED_VOTERS > 0:
+        return VOTE_BLOOM_EXPECTED_VOTERS
+    from hash_utils import id_verifier
+    return max(len(id_verifier), 1000)
+
+def get_vote_bloom():
+    # VOTE_BLOOM=1 ise paylaşılan Bloom filtresini döndürüyorum (yoksa store'dan oluşturulur)
+    global _vote_bloom
+    if not VOTE_BLOOM:
+        return None
+    if _vote_bloom is None:
+        with _vote_bloom_lock:
+            if _vote_bloom is None:
+                # Dosya yoksa store'daki hash'lerle doldurulup öyle yayınlanır
+                _vote_bloom = VoteBloomFilter(VOTE_BLOOM_FILE, _expected_voters(), VOTE_BLOOM_FP_RATE,
+                                              initial_hashes=lambda: get_vote_store().all_hashes())
+    return _vote_bloom
+
+def rebuild_vote_bloom():
+    # Bloom filtresini store'daki hash'lerden yeniden oluşturuyorum (çalışan process'ler yeni dosyaya geçer)
+    bloom = get_vote_bloom()
+    if bloom is not None and not bloom.created:
+        bloom.rebuild(lambda: get_vote_store().all_hashes())
+    return bloom
+
+def get_bloom_stats():
+    # Bloom filtresi isabet/ıska sayaçları (filtre kapalıysa None)
+    bloom = get_vote_bloom()
+    return bloom.stats() if bloom is not None else None
+
+class ClaimStats:
+    # try_claim_vote çekişme ve bekleme istatistikleri
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.attempts = 0
+            self.claimed = 0
+            self.duplicates = 0
+            self.contended = 0
+            self.total_wait = 0.0
+            self.max_wait = 0.0
+
+    def record(self, claimed, contended, wait):
+        with self._lock:
+            self.attempts += 1
+            if claimed:
+                self.claimed += 1
+            else:
+                self.duplicates += 1
+            if contended:
+                self.contended += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+
+    def as_dict(self):
+        with self._lock:
+            return {
+                "attempts": self.attempts,
+                "claimed": self.claimed,
+                "duplicates": self.duplicates,
+                "contended": self.contended,
+                "contention_ratio": self.contended / self.attempts if self.attempts else 0.0,
+                "total_wait_seconds": self.total_wait,
+                "avg_wait_seconds": self.total_wait / self.attempts if self.attempts else 0.0,
+                "max_wait_seconds": self.max_wait,
+            }
+
+claim_stats = ClaimStats()
+_stripe_locks = [threading.Lock() for _ in range(VOTE_LOCK_STRIPES)]
+_global_claim_lock = threading.Lock()
+
+def _claim_lock_paths(key):
+    # Şerit kilidi dosyası (key None ise tüm store için tek kilit)
+    if key is None:
+        return _global_claim_lock, VOTE_LOCK_FILE
+    os.makedirs(VOTE_LOCK_DIR, exist_ok=True)
+    return _stripe_locks[key], os.path.join(VOTE_LOCK_DIR, f"stripe_{key:03d}.lock")
+
+@contextmanager
+def _claim_lock(tc_hash):
+    # Önce process içi, sonra process'ler arası kilidi alıyorum; bekleme süresini ölçüyorum
+    store = get_vote_store()
+    if not store.needs_claim_lock:
+        # Store eklemeyi kendisi atomik yapıyor (ör. SQLite INSERT ... ON CONFLICT)
+        yield store, False, 0.0
+        return
+    thread_lock, lock_path = _claim_lock_paths(store.lock_key(tc_hash))
+    contended = [False]
+
+    def mark_contended():
+        contended[0] = True
+
+    start = time.perf_counter()
+    if not thread_lock.acquire(blocking=False):
+        mark_contended()
+        thread_lock.acquire()
+    try:
+        with _file_lock(lock_path, exclusive=True, on_contention=mark_contended):
+            wait = time.perf_counter() - start
+            yield store, contended[0], wait
+    finally:
+        thread_lock.release()
+
+def try_claim_vote(tc_id):
+    # Kontrol + işaretleme tek atomik adımda: thread'ler ve process'ler arası güvenli
+    # True = oy hakkı bu çağrıya ayrıldı, False = daha önce oy vermiş
+    tc_hash = hash_id(tc_id)
+    bloom = get_vote_bloom()
+    if bloom is not None:
+        # Store'dan önce ekliyorum: filtre yanlış negatif vermemeli (fazladan pozitif zararsız)
+        bloom_identity = bloom.add(tc_hash)
+    with metrics.timer('claim'):
+        with _claim_lock(tc_hash) as (store, contended, wait):
+            claimed = store.add(tc_hash)
+    if bloom is not None and bloom.replaced_since(bloom_identity):
+        # Arada rebuild olduysa yeni filtre store'u bu eklemeden önce okumuş olabilir
+        bloom.add(tc_hash)
+    claim_stats.record(claimed, contended, wait)
+    metrics.observe('claim_lock_wait', wait)
+    metrics.increment('claims', result='claimed' if claimed else 'already_voted')
+    return claimed
+
+def release_vote(tc_id):
+    # Oy gönderimi başarısız olursa ayrılan hakkı geri bırakıyorum
+    tc_hash = hash_id(tc_id)
+    with _claim_lock(tc_hash) as (store, _, _):
+        store.discard(tc_hash)
+    metrics.increment('claims', result='released')
+
+def get_claim_stats():
+    # Çekişme ve bekleme istatistiklerini döndürüyorum
+    return claim_stats.as_dict()
+
 def has_voted(tc_id):
     # Bu TC kimlik numarası daha önce oy vermiş mi kontrol ediyorum
     tc_hash = hash_id(tc_id)
-    voted_hashes = load_voted_tc_list()
-    return tc_hash in voted_hashes
+    bloom = get_vote_bloom()
+    if bloom is not None and not bloom.might_contain(tc_hash):
+        # Kesin negatif: store'a gitmeye gerek yok
+        bloom.record_lookup(False)
+        return False
+    found = get_vote_store().contains(tc_hash)
+    if bloom is not None:
+        bloom.record_lookup(True, found)
+    return found
 
 def mark_as_voted(tc_id):
-    # Bu TC kimlik numarasını oy vermiş olarak işaretliyorum
-    tc_hash = hash_id(tc_id)
-    voted_hashes = load_voted_tc_list()
-    
-    if tc_hash not in voted_hashes:
-        voted_hashes.append(tc_hash)
-        save_voted_tc_list(voted_hashes)
-        return True
-    return False
+    # Bu TC kimlik numarasını oy vermiş olarak işaretliyorum (try_claim_vote ile aynı kilitleri kullanır)
+    return try_claim_vote(tc_id)
+
+def compact_votes():
+    # Log ve sharded modda log'ları snapshot'a sıkıştırıyorum
+    store = get_vote_store()
+    if isinstance(store, (AppendOnlyVoteLog, ShardedVoteStore)):
+        store.compact()
 
 def get_vote_proof(tc_id):
     # Oy verme yetkisi proof'u döndürüyorum
@@ -61,10 +831,39 @@ def get_vote_proof(tc_id):
 
 def reset_votes():
     # Tüm oy kayıtlarını sıfırlıyorum (test için)
-    save_voted_tc_list([])
+    get_vote_store().reset()
+    claim_stats.reset()
+    bloom = get_vote_bloom()
+    if bloom is not None:
+        bloom.clear()
     print("✅ Tüm oy kayıtları sıfırlandı")
 
 if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) > 1 and sys.argv[1] == 'compact':
+        compact_votes()
+        print(f"✅ Oy log'u sıkıştırıldı: {get_vote_store().count()} kayıt")
+        sys.exit(0)
+
+    if len(sys.argv) > 1 and sys.argv[1] == 'reshard':
+        target = int(sys.argv[2]) if len(sys.argv) > 2 else VOTE_SHARDS
+        result = reshard_votes(target)
+        print(f"✅ {result['hashes']} kayıt {result['source_shards']} -> {result['shards']} shard'a dağıtıldı")
+        if result['backup']:
+            print(f"📁 Eski shard'lar: {result['backup']}")
+        if target != VOTE_SHARDS:
+            print(f"⚠️ .env dosyasında VOTE_SHARDS={target} olarak ayarlayın")
+        sys.exit(0)
+
+    if len(sys.argv) > 1 and sys.argv[1] == 'rebuild-bloom':
+        bloom = rebuild_vote_bloom()
+        if bloom is None:
+            print("⚠️ Bloom filtresi kapalı (VOTE_BLOOM=1 ile açın)")
+        else:
+            print(f"✅ Bloom filtresi oluşturuldu: {bloom.m} bit, {bloom.k} hash fonksiyonu")
+        sys.exit(0)
+
     print("🧪 Çifte Oy Engelleme Testi")
     print("=" * 50)
     
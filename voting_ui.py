@@ -1,7 +1,114 @@
 import streamlit as st
-import subprocess
 import json
+import os
+import threading
 import time
+import metrics
+from hash_utils import id_verifier, people_verifier, warm_up_verifiers
+from voted_tc_tracker import get_vote_bloom, get_vote_store
+from vote_worker_client import VoteWorkerClient
+from vote_pipeline import VotePipeline, PipelineError, batcher_submit, nullifier_submit
+from tally_store import TallyStore
+from prover_pool import ProverPool, ProofSequencer
+from merkle_tree import open_registry_tree
+from nullifier_set import NullifierVoter, open_nullifier_set
+from reduce_scheduler import CONCURRENT_WORKER_SCRIPT, ReduceScheduler, projected_state
+
+# PROVER_POOL=1: oy pusulası proof'ları prover havuzunda paralel üretilir, kontrata
+# voteWithProof ile sırayla gönderilir (PROOFS_ENABLED=1 ile anlamlı, kayıt Merkle ağacı gerekir)
+USE_PROVER_POOL = os.getenv('PROVER_POOL') == '1'
+# CONCURRENT_VOTING=1: oylar ConcurrentVoting.castVote ile aksiyon olarak yayınlanır,
+# sayaçlar reduce_scheduler'ın tetiklediği rollup'larla güncellenir
+USE_CONCURRENT_VOTING = os.getenv('CONCURRENT_VOTING') == '1'
+
+@st.cache_resource
+def get_vote_worker():
+    # Tüm oturumların paylaştığı Node oy worker'ı (kontrat bir kez deploy edilir)
+    # Deploy uzun sürdüğü için arka planda başlatılıyor; ilk oy hazır olmasını bekler
+    worker = VoteWorkerClient(CONCURRENT_WORKER_SCRIPT) if USE_CONCURRENT_VOTING else VoteWorkerClient()
+    threading.Thread(target=worker.start, daemon=True).start()
+    return worker
+
+@st.cache_resource
+def get_nullifier_voter():
+    # Kayıt ağacından tanık üretip nullifier haritasını kontratla birlikte güncelleyen paylaşılan gönderici
+    return NullifierVoter(get_vote_worker(), open_registry_tree(), open_nullifier_set())
+
+@st.cache_resource
+def get_proof_sequencer():
+    # Paylaşılan prover havuzu (CPU çekirdeği kadar worker) ve proof'ları sırayla gönderen sıralayıcı
+    # Worker'lar arka planda başlatılıyor; hazır olan worker'lar hemen iş almaya başlar
+    pool = ProverPool().start(wait=False)
+    return ProofSequencer(pool, get_nullifier_voter())
+
+@st.cache_resource
+def get_reduce_scheduler():
+    # Bekleyen oy sayısı veya süre dolunca rollup tetikleyen paylaşılan zamanlayıcı
+    return ReduceScheduler(get_vote_worker())
+
+@st.cache_resource
+def get_tally_store():
+    # Tüm oturumların okuduğu canlı sayaçlar: başarılı oylarla güncellenir,
+    # en fazla 2 saniyede bir (izleyici sayısından bağımsız) kontrat durumu ile uzlaştırılır
+    worker = get_vote_worker()
+
+    def fetch_state():
+        if not worker.is_ready():
+            return None
+        state = worker.state(timeout=5)
+        # Rollup'ı bekleyen oylar da gösteriliyor (aksi halde sayaçlar rollup'a kadar geri gider)
+        return projected_state(state) if USE_CONCURRENT_VOTING else state
+
+    return TallyStore(fetch_state, ttl=2.0)
+
+@st.cache_resource
+def get_vote_pipeline():
+    # Doğrulama -> oy hakkı ayırma -> witness -> gönderim -> kayıt aşamalarını
+    # arka plandaki tek bir event loop'ta çalıştıran paylaşılan pipeline
+    # Varsayılan: voteWithNullifier (kayıt üyeliği ve çifte oy kontrolü devre içinde);
+    # bayraklara güvenen vote/batchVote zkApp anahtarı gerektirir ve burada kullanılmaz
+    if USE_CONCURRENT_VOTING:
+        submit, ballot_builder = batcher_submit(get_reduce_scheduler()), None
+    else:
+        # Pusula kayıt yaprağı + tanıkla kurulur; prover havuzunda proof kayıt köküne ve nullifier'a bağlanır
+        voter = get_nullifier_voter()
+        submit = batcher_submit(get_proof_sequencer()) if USE_PROVER_POOL else nullifier_submit(voter)
+        ballot_builder = voter.ballot_for
+    return VotePipeline(submit, on_commit=get_tally_store().on_commit,
+                        ballot_builder=ballot_builder).start_background()
+
+@st.cache_resource
+def get_voting_services():
+    # Sunucu başına bir kez: kayıt index'leri, oy store'u ve Bloom filtresi yüklenir,
+    # oy worker'ı başlatılır; sonraki rerun'lar ve tüm oturumlar aynı nesneleri kullanır
+    start = time.perf_counter()
+    warm_up_verifiers(background=False)
+    store = get_vote_store()
+    store.count()
+    get_vote_bloom()
+    get_vote_pipeline()
+    return {"warm_up_seconds": time.perf_counter() - start, "started_at": time.time()}
+
+@st.cache_data(ttl=5)
+def get_service_health():
+    # Kenar çubuğundaki durum göstergesi (tüm oturumlar için 5 saniyede bir hesaplanır)
+    worker = get_vote_worker()
+    pipeline_stats = get_vote_pipeline().get_stats()
+    ready_info = worker.ready_info or {}
+    return {
+        "valid_ids": len(id_verifier),
+        "people": len(people_verifier),
+        "store": type(get_vote_store()).__name__,
+        "voted": get_vote_store().count(),
+        "worker": "ready" if worker.is_ready() else ("starting" if worker.is_alive() else "down"),
+        "completed": pipeline_stats["completed"],
+        "failed": pipeline_stats["failed"],
+        "in_flight": sum(stage["in_flight"] + stage["queued"] for stage in pipeline_stats["stages"].values()),
+        "proofs": ready_info.get("proofsEnabled", False),
+        "compile": ready_info.get("compile"),
+        "provers": get_proof_sequencer().get_stats()["pool"]["workers"] if USE_PROVER_POOL else None,
+        "reducer": get_reduce_scheduler().get_stats() if USE_CONCURRENT_VOTING else None,
+    }
 
 # Sayfa konfigürasyonu
 st.set_page_config(
@@ -10,6 +117,37 @@ st.set_page_config(
     layout="centered"
 )
 
+# Paylaşılan servisler (ilk ziyarette yüklenir, sonra önbellekten gelir)
+with st.spinner("Kayıtlar yükleniyor..."):
+    services = get_voting_services()
+
+# Sistem durumu
+with st.sidebar:
+    st.markdown("### 🩺 Sistem Durumu")
+    health = get_service_health()
+    registries_ok = health["valid_ids"] > 0 and health["people"] > 0
+    worker_icons = {"ready": "🟢 Hazır", "starting": "🟡 Başlatılıyor", "down": "🔴 Kapalı"}
+    st.markdown(f"{'🟢' if registries_ok else '🔴'} **Kayıtlar:** {health['valid_ids']} TC, {health['people']} kişi")
+    st.markdown(f"🟢 **Oy kaydı:** {health['store']} ({health['voted']} oy)")
+    st.markdown(f"**Oy worker'ı:** {worker_icons[health['worker']]}")
+    if health["proofs"] and health["compile"]:
+        compile_info = health["compile"]
+        source = "anahtar önbellekle aynı" if compile_info["cacheHit"] else "yeni anahtar"
+        st.markdown(f"🔑 **Proof modu:** açık (derlendi, {source}, {compile_info['seconds']:.1f} sn)")
+    if health["provers"] is not None:
+        ready = sum(1 for worker in health["provers"] if worker["state"] == "ready")
+        restarts = sum(worker["restarts"] for worker in health["provers"])
+        st.markdown(f"{'🟢' if ready else '🟡'} **Prover havuzu:** {ready}/{len(health['provers'])} hazır, "
+                    f"{restarts} yeniden başlatma")
+    if health["reducer"] is not None:
+        reducer = health["reducer"]
+        st.markdown(f"🔁 **Rollup:** {reducer['rollups']} rollup, {reducer['pending']} oy bekliyor, "
+                    f"{reducer['rollup_failures']} hata")
+    st.markdown(f"**Pipeline:** {health['completed']} başarılı, {health['failed']} hatalı, {health['in_flight']} işlemde")
+    st.caption(f"Isınma süresi: {services['warm_up_seconds']:.2f} saniye")
+    if metrics.is_enabled():
+        st.caption(f"Ölçümler: {metrics.METRICS}")
+
 # Ana başlık
 st.title("🗳️ ZKP Oylama Sistemi")
 
@@ -27,49 +165,6 @@ with col2:
     
     # Yaş kanıtı oluştur
     age_proof = 1 if age >= 18 else 0
-    
-    # ID kanıtı oluşturma fonksiyonları (sadece submit'te kullanılacak)
-    import json
-    import hashlib
-    import os
-    from dotenv import load_dotenv
-    
-    # .env dosyasını yükle
-    load_dotenv()
-    
-    # Hash utility fonksiyonları
-    SALT = os.getenv('SALT', 'zkp_voting_salt_2024')  # Varsayılan değer
-    PEPPER = os.getenv('PEPPER', 'mina_protocol_pepper')  # Varsayılan değer
-    
-    def hash_id(tc_id):
-        combined = SALT + tc_id + PEPPER
-        return hashlib.sha256(combined.encode()).hexdigest()
-    
-    def is_valid_id(tc_id):
-        try:
-            with open('secure_valid_ids.json', 'r') as f:
-                data = json.load(f)
-                hashed_ids = data['hashed_ids']
-            
-            input_hash = hash_id(tc_id)
-            return input_hash in hashed_ids
-        except:
-            return False
-    
-    def hash_person_data(tc_id, first_name, last_name, age):
-        combined = SALT + tc_id + first_name + last_name + str(age) + PEPPER
-        return hashlib.sha256(combined.encode()).hexdigest()
-    
-    def is_valid_person(tc_id, first_name, last_name, age):
-        try:
-            with open('secure_people_data.json', 'r') as f:
-                data = json.load(f)
-                hashed_people = data['hashed_people']
-            
-            input_hash = hash_person_data(tc_id, first_name, last_name, age)
-            return input_hash in hashed_people
-        except:
-            return False
 
 # Oylama seçenekleri
 st.markdown("### 🗳️ Hangi seçeneği destekliyorsunuz?")
@@ -104,155 +199,67 @@ if hasattr(st.session_state, 'vote_choice'):
         if st.button("🗳️ OY VER", key="submit_vote"):
             with st.spinner("ZKP ile kimlik doğrulama ve oy işleniyor..."):
                 try:
-                    # Kişi verileri doğrulaması (submit'te)
-                    if not is_valid_person(tc_id, name, surname, age):
+                    # Kişi doğrulaması, çifte oy kontrolü (atomik), hash'ler ve oyun gönderimi
+                    # pipeline aşamalarında yapılır; aynı anda gelen oylar tek batchVote işleminde toplanır
+                    with metrics.timer('ui_submit'):
+                        get_vote_pipeline().submit_threadsafe(
+                            tc_id, name, surname, age,
+                            st.session_state.vote_value  # choice: açık
+                        ).result()
+                    metrics.increment('ui_votes', outcome='success')
+                    
+                    # Sayaçlar pipeline'ın commit aşamasında paylaşılan tally store'a yazıldı
+                    st.success("✅ Oyunuz başarıyla kaydedildi!")
+                    st.info("🔒 Kimlik bilgileriniz gizli, sadece 18+ yaş, geçerli kişi verileri ve daha önce oy vermemiş olduğunuz ZKP tarafından kanıtlandı.")
+                
+                except PipelineError as e:
+                    metrics.increment('ui_votes', outcome=e.reason)
+                    error_message = str(e)
+                    
+                    # Hata kontrolü
+                    if e.reason == 'timeout':
+                        # Gönderimde zaman aşımı: oy zincire ulaşmış olabilir, hak geri bırakılmadı
+                        st.error("⏰ İşlem zaman aşımına uğradı")
+                    elif e.reason == 'invalid_person' or "Geçersiz kişi verileri" in error_message:
                         st.error("❌ Geçersiz kişi verileri!")
                         st.info("🔒 Kimlik bilgileriniz bilinmiyor, sadece geçersiz olduğu ZKP tarafından tespit edildi.")
-                        st.stop()
-                    
-                    # Çifte oy kontrolü (submit'te)
-                    from voted_tc_tracker import has_voted, mark_as_voted, get_vote_proof
-                    if has_voted(tc_id):
+                    elif e.reason == 'already_voted' or "Bu TC kimlik numarası daha önce oy vermiş" in error_message:
                         st.error("❌ Bu TC kimlik numarası daha önce oy vermiş!")
                         st.info("🔒 TC kimlik numaranız bilinmiyor, sadece daha önce oy verdiğiniz ZKP tarafından tespit edildi.")
-                        st.stop()
-                    
-                    # Hash'leri oluştur
-                    import hashlib
-                    # Kişi verileri için güvenli hash (TC+isim+soyisim+yaş+salt+pepper)
-                    person_hash = int(hash_person_data(tc_id, name, surname, age)[:8], 16)
-                    
-                    # Proof'ları oluştur
-                    age_proof = 1 if age >= 18 else 0
-                    person_proof = 1  # Yukarıda zaten doğrulandı
-                    vote_proof = get_vote_proof(tc_id)  # Daha önce oy vermemiş kanıtı
-                    
-                    # Oy verme scripti
-                    vote_script = f"""
-const {{ Voting }} = require('./dist/Voting.js');
-const {{ Mina, PrivateKey, PublicKey, Field, AccountUpdate }} = require('snarkyjs');
-
-async function singleVote() {{
-    // Local blockchain kur
-    let Local = await Mina.LocalBlockchain({{ proofsEnabled: false }});
-    Mina.setActiveInstance(Local);
-    
-    const account0 = Local.testAccounts[0];
-    const feePayer = account0.privateKey;
-    
-    // zkApp hesabı
-    const zkAppPrivateKey = PrivateKey.random();
-    const zkAppAddress = zkAppPrivateKey.toPublicKey();
-    const zkAppInstance = new Voting(zkAppAddress);
-    
-    // Deploy
-    let txn = await Mina.transaction(feePayer, async () => {{
-        AccountUpdate.fundNewAccount(feePayer);
-        await zkAppInstance.deploy({{ zkappKey: zkAppPrivateKey }});
-    }});
-    await txn.prove();
-    await txn.sign([feePayer, zkAppPrivateKey]).send();
-    
-    // ZKP ile oy ver (kimlik bilgileri gizli)
-    let voteTxn = await Mina.transaction(feePayer, async () => {{
-        await zkAppInstance.vote(
-            Field({st.session_state.vote_value}),    // choice: açık
-            Field({person_hash}),                    // personHash: gizli (TC+isim+soyisim+yaş)
-            Field({age_proof}),                     // ageProof: gizli (1 = yaş >= 18)
-            Field({person_proof}),                  // personProof: gizli (1 = geçerli kişi verileri)
-            Field({vote_proof})                     // voteProof: gizli (1 = daha önce oy vermemiş)
-        );
-    }});
-    await voteTxn.prove();
-    await voteTxn.sign([feePayer]).send();
-    
-    // Sonuçları göster
-    await zkAppInstance.red.fetch();
-    await zkAppInstance.blue.fetch();
-    await zkAppInstance.green.fetch();
-    await zkAppInstance.totalVoters.fetch();
-    
-    console.log('🔴 Kırmızı:', zkAppInstance.red.get().toString());
-    console.log('🔵 Mavi:', zkAppInstance.blue.get().toString());
-    console.log('🟢 Yeşil:', zkAppInstance.green.get().toString());
-    console.log('👥 Toplam Oy Veren:', zkAppInstance.totalVoters.get().toString());
-}}
-
-singleVote().catch(console.error);
-"""
-                    
-                    # Geçici dosya oluştur ve çalıştır
-                    with open('temp_vote.js', 'w') as f:
-                        f.write(vote_script)
-                    
-                    result = subprocess.run([
-                        'node', 'temp_vote.js'
-                    ], capture_output=True, text=True, timeout=30)
-                    
-                    # Temizlik
-                    import os
-                    if os.path.exists('temp_vote.js'):
-                        os.remove('temp_vote.js')
-                    
-                    if result.returncode == 0:
-                        # Oy vermiş olarak işaretle
-                        mark_as_voted(tc_id)
-                        
-                        st.success("✅ Oyunuz başarıyla kaydedildi!")
-                        st.info("🔒 Kimlik bilgileriniz gizli, sadece 18+ yaş, geçerli kişi verileri ve daha önce oy vermemiş olduğunuz ZKP tarafından kanıtlandı.")
-                        
-                        
-                        # Sayaçları güncelle
-                        output_lines = result.stdout.split('\n')
-                        for line in output_lines:
-                            if 'Kırmızı:' in line:
-                                red_count = int(line.split(':')[1].strip())
-                                st.session_state.vote_counts['Kırmızı'] = red_count
-                            elif 'Mavi:' in line:
-                                blue_count = int(line.split(':')[1].strip())
-                                st.session_state.vote_counts['Mavi'] = blue_count
-                            elif 'Yeşil:' in line:
-                                green_count = int(line.split(':')[1].strip())
-                                st.session_state.vote_counts['Yeşil'] = green_count
-                                
+                    elif "Yaş 18'den küçük olamaz" in error_message:
+                        st.error("❌ Yaşınız yeterli değil!")
+                        st.info("🔒 Yaşınız bilinmiyor, sadece 18 yaşından küçük olduğunuz ZKP tarafından tespit edildi.")
                     else:
-                        # Hata kontrolü
-                        if "Yaş 18'den küçük olamaz" in result.stderr:
-                            st.error("❌ Yaşınız yeterli değil!")
-                            st.info("🔒 Yaşınız bilinmiyor, sadece 18 yaşından küçük olduğunuz ZKP tarafından tespit edildi.")
-                        elif "Geçersiz kişi verileri" in result.stderr:
-                            st.error("❌ Geçersiz kişi verileri!")
-                            st.info("🔒 Kimlik bilgileriniz bilinmiyor, sadece geçersiz olduğu ZKP tarafından tespit edildi.")
-                        elif "Bu TC kimlik numarası daha önce oy vermiş" in result.stderr:
-                            st.error("❌ Bu TC kimlik numarası daha önce oy vermiş!")
-                            st.info("🔒 TC kimlik numaranız bilinmiyor, sadece daha önce oy verdiğiniz ZKP tarafından tespit edildi.")
-                        else:
-                            st.error("❌ Hata: Oyunuz kaydedilemedi")
-                            st.error(result.stderr)
-                        
-                except subprocess.TimeoutExpired:
-                    st.error("⏰ İşlem zaman aşımına uğradı")
+                        st.error("❌ Hata: Oyunuz kaydedilemedi")
+                        st.error(error_message)
                 except Exception as e:
+                    metrics.increment('ui_votes', outcome='error')
                     st.error(f"❌ Beklenmeyen hata: {str(e)}")
 
 # Mevcut oy sayıları
 st.markdown("---")
 st.markdown("### 📊 Mevcut Oy Sayıları")
 
-# Demo için basit sayaçlar
-if 'vote_counts' not in st.session_state:
-    st.session_state.vote_counts = {'Kırmızı': 0, 'Mavi': 0, 'Yeşil': 0}
-
-col1, col2, col3 = st.columns(3)
-
-with col1:
-    st.metric("🔴 Kırmızı", st.session_state.vote_counts['Kırmızı'])
-
-with col2:
-    st.metric("🔵 Mavi", st.session_state.vote_counts['Mavi'])
+def render_vote_counts():
+    # Tüm oturumlar aynı sayaçları okur (O(1), kontrata izleyici başına istek gitmez)
+    counts = get_tally_store().snapshot()
+    col1, col2, col3 = st.columns(3)
+    
+    with col1:
+        st.metric("🔴 Kırmızı", counts['red'])
+    
+    with col2:
+        st.metric("🔵 Mavi", counts['blue'])
+    
+    with col3:
+        st.metric("🟢 Yeşil", counts['green'])
+    
+    st.caption(f"Toplam oy: {counts['totalVoters']}")
 
-with col3:
-    st.metric("🟢 Yeşil", st.session_state.vote_counts['Yeşil'])
+# Sonuç paneli sayfanın geri kalanını yeniden çalıştırmadan 2 saniyede bir yenilenir
+if hasattr(st, 'fragment'):
+    render_vote_counts = st.fragment(run_every=2)(render_vote_counts)
+render_vote_counts()
 
 # ZKP açıklaması
 st.markdown("---")
@@ -263,27 +270,23 @@ st.markdown("""
 
 1. **🔐 Gizli Kimlik:** İsim, soyisim, yaş ve TC kimlik numarası blockchain'de görünmez
 2. **✅ Yaş Kanıtı:** ZKP ile sadece yaş >= 18 olduğunun kanıtı verilir
-3. **✅ Kişi Kanıtı:** ZKP ile sadece geçerli kişi verileri (TC+isim+soyisim+yaş) olduğunun kanıtı verilir
-4. **✅ Çifte Oy Engelleme:** ZKP ile daha önce oy vermemiş olduğunun kanıtı verilir
+3. **✅ Kişi Kanıtı:** ZKP ile kişinin hash'inin seçmen kaydının Merkle ağacında olduğu kanıtlanır (yaprak ve yol gizli)
+4. **✅ Çifte Oy Engelleme:** Kişiden türetilen nullifier'ın daha önce harcanmadığı kontratta kanıtlanır
 5. **📊 Şeffaflık:** Oy dağılımı ve toplam sayılar açık
 
 **Kod Örneği:**
 ```typescript
-@method vote(choice, personHash, ageProof, personProof, voteProof) {
-    // ZKP ile yaş kanıtı kontrolü
-    const isValidAgeProof = ageProof.equals(Field(1));
-    Provable.if(isValidAgeProof, Bool(true), Bool(false)).assertTrue('Yaş 18\'den küçük olamaz');
-    
-    // ZKP ile kişi verileri kanıtı kontrolü
-    const isValidPersonProof = personProof.equals(Field(1));
-    Provable.if(isValidPersonProof, Bool(true), Bool(false)).assertTrue('Geçersiz kişi verileri');
+@method voteWithNullifier(choice, personLeaf, registryWitness, nullifierWitness, ageProof) {
+    // ZKP ile kişi kanıtı: yaprak kayıt ağacında (yaprak ve tanık gizli)
+    registryWitness.calculateRoot(personLeaf).assertEquals(registryRoot, 'Geçersiz kişi verileri');
     
-    // ZKP ile çifte oy engelleme kanıtı kontrolü
-    const isValidVoteProof = voteProof.equals(Field(1));
-    Provable.if(isValidVoteProof, Bool(true), Bool(false)).assertTrue('Daha önce oy vermiş');
+    // ZKP ile çifte oy engelleme: nullifier haritada boş, aynı tanıkla harcanıyor
+    const [emptyRoot, key] = nullifierWitness.computeRootAndKey(Field(0));
+    emptyRoot.assertEquals(nullifierRoot, 'Bu TC kimlik numarası daha önce oy vermiş');
+    key.assertEquals(nullifierFor(personLeaf), 'Geçersiz nullifier tanığı');
     
-    // Tüm kimlik bilgileri gizli (hash'ler)
-    // personHash (TC+isim+soyisim+yaş) blockchain'de görünmez
+    // ZKP ile yaş kanıtı kontrolü
+    ageProof.assertEquals(Field(1), 'Yaş 18\'den küçük olamaz');
     
     // Oy tercihi açık (sayım için)
     const isRed = choice.equals(Field(0));    // Açık